@@ -0,0 +1,176 @@
+"""
+analitica.py
+Análisis del grafo de interacciones (grafo.py) mantenido de forma incremental.
+
+ - UnionFind: componentes conexas ("comunidades de lectura"). Cada arista nueva
+   une dos conjuntos en O(α(n)); el número de componentes y el tamaño de la de
+   un nodo se responden sin recorrer el grafo.
+ - RankingGrados: top-k de usuarios y libros más conectados con un montículo
+   por tipo. Cada cambio de grado agrega una entrada; las entradas viejas se
+   descartan al consultar (invalidación perezosa) y el montículo se compacta
+   cuando acumula demasiadas.
+ - bfs_acotado: vecinos a k saltos o menos (p. ej. usuarios cerca de un libro);
+   el costo depende del vecindario visitado, no del tamaño del grafo.
+
+"""
+
+import heapq
+import itertools
+from collections import deque
+
+from grafo import LIBRO, USUARIO
+
+
+# ---------------------------
+# UNION-FIND
+# ---------------------------
+
+class UnionFind:
+    """Conjuntos disjuntos con unión por tamaño y compresión de caminos (por mitades)."""
+    def __init__(self):
+        self.padre = {}
+        self.tamanio = {}
+        self.uniones = 0   # uniones efectivas (cada una reduce en 1 el número de componentes)
+
+    def encontrar(self, x):
+        padre = self.padre
+        if x not in padre:
+            return x        # nodo nunca unido: es su propia componente
+        while padre[x] != x:
+            padre[x] = padre[padre[x]]
+            x = padre[x]
+        return x
+
+    def unir(self, a, b):
+        """Une las componentes de a y b. Retorna True si estaban separadas."""
+        for x in (a, b):
+            if x not in self.padre:
+                self.padre[x] = x
+                self.tamanio[x] = 1
+        ra, rb = self.encontrar(a), self.encontrar(b)
+        if ra == rb:
+            return False
+        if self.tamanio[ra] < self.tamanio[rb]:
+            ra, rb = rb, ra
+        self.padre[rb] = ra
+        self.tamanio[ra] += self.tamanio.pop(rb)
+        self.uniones += 1
+        return True
+
+    def tamanio_de(self, x):
+        return self.tamanio.get(self.encontrar(x), 1)
+
+    def conectados(self, a, b):
+        return self.encontrar(a) == self.encontrar(b)
+
+
+# ---------------------------
+# RANKING DE GRADOS
+# ---------------------------
+
+class RankingGrados:
+    """Top-k por grado para un tipo de nodo, siempre al día con las aristas agregadas."""
+    def __init__(self):
+        self.grados = {}        # nodo -> grado actual
+        self._monticulo = []    # (-grado, orden, nodo); puede tener entradas viejas
+        self._orden = itertools.count()
+
+    def actualizar(self, nodo, grado):
+        self.grados[nodo] = grado
+        heapq.heappush(self._monticulo, (-grado, next(self._orden), nodo))
+        if len(self._monticulo) > 2 * len(self.grados) + 64:
+            self._compactar()
+
+    def _compactar(self):
+        self._monticulo = [(-g, next(self._orden), n) for n, g in self.grados.items()]
+        heapq.heapify(self._monticulo)
+
+    def top(self, k):
+        """[(nodo, grado)] de mayor a menor grado. O((k + entradas viejas) log n)."""
+        monticulo, grados = self._monticulo, self.grados
+        validos, vistos = [], set()
+        while monticulo and len(validos) < k:
+            entrada = heapq.heappop(monticulo)
+            nodo = entrada[2]
+            if grados.get(nodo) != -entrada[0] or nodo in vistos:
+                continue    # entrada vieja: se descarta para siempre
+            vistos.add(nodo)
+            validos.append(entrada)
+        for entrada in validos:
+            heapq.heappush(monticulo, entrada)
+        return [(nodo, -g) for g, _, nodo in validos]
+
+
+# ---------------------------
+# ANALÍTICA DEL GRAFO
+# ---------------------------
+
+class AnaliticaGrafo:
+    """
+    Llamar a nueva_arista(a, b) cada vez que el grafo gana una arista (no en
+    los préstamos repetidos, que solo cambian el peso).
+    """
+    def __init__(self, grafo):
+        self.grafo = grafo
+        self.componentes = UnionFind()
+        self.rankings = {USUARIO: RankingGrados(), LIBRO: RankingGrados()}
+
+    def nueva_arista(self, a, b):
+        self.componentes.unir(a, b)
+        ady = self.grafo.ady
+        for nodo in (a, b):
+            self.rankings[nodo[0]].actualizar(nodo, len(ady[nodo]))
+
+    def reconstruir(self):
+        """Recalcula todo desde el grafo actual."""
+        self.componentes = UnionFind()
+        self.rankings = {USUARIO: RankingGrados(), LIBRO: RankingGrados()}
+        for nodo, vecinos in self.grafo.ady.items():
+            for vecino in vecinos:
+                self.componentes.unir(nodo, vecino)
+            if vecinos:
+                self.rankings[nodo[0]].actualizar(nodo, len(vecinos))
+
+    # ---------- componentes ----------
+    def num_componentes(self):
+        """Componentes conexas entre todos los nodos del grafo (los aislados cuentan como una cada uno)."""
+        return len(self.grafo) - self.componentes.uniones
+
+    def tamanio_componente(self, nodo):
+        return self.componentes.tamanio_de(nodo)
+
+    def conectados(self, a, b):
+        return self.componentes.conectados(a, b)
+
+    # ---------- ranking ----------
+    def mas_conectados(self, tipo, k=10):
+        return self.rankings[tipo].top(k)
+
+    # ---------- BFS ----------
+    def bfs_acotado(self, origen, saltos, tipo=None, limite=None):
+        """
+        [(nodo, distancia)] de los nodos a 1..saltos de 'origen', en orden de
+        distancia. 'tipo' filtra el resultado (no el recorrido); 'limite' corta
+        la búsqueda en cuanto hay suficientes resultados.
+        """
+        ady = self.grafo.ady
+        if origen not in ady:
+            return []
+        distancias = {origen: 0}
+        pendientes = deque([origen])
+        resultado = []
+        while pendientes:
+            nodo = pendientes.popleft()
+            d = distancias[nodo]
+            if d == saltos:
+                continue
+            for vecino in ady[nodo]:
+                if vecino in distancias:
+                    continue
+                distancias[vecino] = d + 1
+                pendientes.append(vecino)
+                if tipo is None or vecino[0] == tipo:
+                    resultado.append((vecino, d + 1))
+                    if limite is not None and len(resultado) >= limite:
+                        return resultado
+        return resultado
@@ -0,0 +1,472 @@
+"""
+benchmark.py
+Banco de pruebas (sin interfaz gráfica) para comparar las implementaciones de Biblioteca:
+ - lineal : biblioteca.py  (arreglo + lista enlazada)
+ - abb    : biblioteca2.py (árboles)
+ - grafo  : biblioteca3.py (árboles + grafo de interacciones)
+ - sqlite : biblioteca_sqlite.py (SQLite en un archivo temporal)
+
+Genera catálogos y usuarios sintéticos (IDs secuenciales o aleatorios, popularidad
+de títulos con distribución de Zipf), ejecuta una carga mixta de registro /
+préstamo / devolución / búsqueda y reporta throughput, latencias p50/p99 por
+operación, memoria pico, bytes retenidos por libro/usuario y tiempo de
+importación en frío de cada módulo. Además compara la búsqueda difusa (árbol
+BK de indices.py) contra recorrer todas las claves calculando la distancia de
+edición. Los resultados se guardan en JSON y pueden compararse con una
+ejecución anterior para detectar regresiones.
+
+Uso:
+    python benchmark.py --libros 20000 --usuarios 5000 --operaciones 50000 --salida res.json
+    python benchmark.py --comparar res.json   # compara contra una ejecución previa
+"""
+
+import argparse
+import bisect
+import importlib
+import itertools
+import json
+import platform
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+MOTORES = {
+    "lineal": "biblioteca",
+    "abb": "biblioteca2",
+    "grafo": "biblioteca3",
+    "sqlite": "biblioteca_sqlite",
+}
+
+PALABRAS = ["cien", "años", "soledad", "amor", "tiempos", "cólera", "rayuela", "ficciones",
+            "aleph", "pedro", "páramo", "casa", "espíritus", "ciudad", "perros", "noche",
+            "guerra", "paz", "mar", "sombra", "viento", "laberinto", "túnel", "sueño"]
+AUTORES = ["García Márquez", "Cortázar", "Borges", "Rulfo", "Allende", "Vargas Llosa",
+           "Neruda", "Mistral", "Paz", "Fuentes", "Bolaño", "Sabato", "Onetti", "Storni"]
+GENEROS = ["novela", "cuento", "poesía", "ensayo", "ciencia ficción", "historia"]
+
+MEZCLA_POR_DEFECTO = {"prestar": 0.40, "devolver": 0.35, "buscar": 0.25}
+
+
+# ---------------------------
+# DATOS SINTÉTICOS
+# ---------------------------
+
+class Zipf:
+    """Muestreador de rangos 0..n-1 con probabilidad proporcional a 1 / (k+1)^s."""
+    def __init__(self, n, s=1.1, rng=None):
+        self.rng = rng or random.Random()
+        pesos = [1.0 / (k + 1) ** s for k in range(n)]
+        self.acumulado = list(itertools.accumulate(pesos))
+
+    def muestra(self):
+        return bisect.bisect_left(self.acumulado, self.rng.random() * self.acumulado[-1])
+
+
+def generar_ids(n, orden, rng):
+    if orden == "secuencial":
+        return list(range(1, n + 1))
+    return rng.sample(range(1, n * 10 + 1), n)
+
+
+def generar_titulos(n, rng):
+    """Conjunto de títulos distintos; su popularidad la decide Zipf (rango 0 = el más popular)."""
+    titulos = set()
+    while len(titulos) < n:
+        titulos.add(" ".join(rng.choice(PALABRAS) for _ in range(rng.randint(1, 4))) + f" {len(titulos)}")
+    return sorted(titulos)
+
+
+def generar_catalogo(n, orden="secuencial", semilla=0, titulos_distintos=None):
+    """Lista de tuplas (id, titulo, autor, genero, anio); los títulos se repiten según Zipf."""
+    rng = random.Random(semilla)
+    titulos = generar_titulos(titulos_distintos or max(1, n // 4), rng)
+    zipf = Zipf(len(titulos), rng=rng)
+    return [(id_libro, titulos[zipf.muestra()], rng.choice(AUTORES), rng.choice(GENEROS),
+             rng.randint(1900, 2024))
+            for id_libro in generar_ids(n, orden, rng)], titulos
+
+
+def generar_usuarios(n, orden="secuencial", semilla=0):
+    rng = random.Random(semilla + 1)
+    return [(id_usuario, f"Usuario {id_usuario}", f"usuario{id_usuario}@correo.com")
+            for id_usuario in generar_ids(n, orden, rng)]
+
+
+def generar_operaciones(n, ids_libros, ids_usuarios, titulos, mezcla, semilla=0):
+    """
+    Secuencia de operaciones ('prestar', id_usuario, id_libro) / ('devolver', id_libro) /
+    ('buscar', fragmento). Libros y consultas siguen la popularidad de Zipf.
+    """
+    rng = random.Random(semilla + 2)
+    zipf_libros = Zipf(len(ids_libros), rng=rng)
+    zipf_titulos = Zipf(len(titulos), rng=rng)
+    tipos = list(mezcla)
+    pesos = [mezcla[t] for t in tipos]
+    prestados = []   # libros prestados (según el generador) para producir devoluciones válidas
+    operaciones = []
+    for tipo in rng.choices(tipos, pesos, k=n):
+        if tipo == "devolver" and prestados:
+            i = rng.randrange(len(prestados))
+            prestados[i], prestados[-1] = prestados[-1], prestados[i]
+            operaciones.append(("devolver", prestados.pop()))
+        elif tipo == "buscar":
+            titulo = titulos[zipf_titulos.muestra()]
+            inicio = rng.randrange(max(1, len(titulo) - 3))
+            operaciones.append(("buscar", titulo[inicio:inicio + rng.randint(3, 8)]))
+        else:
+            id_libro = ids_libros[zipf_libros.muestra()]
+            operaciones.append(("prestar", rng.choice(ids_usuarios), id_libro))
+            prestados.append(id_libro)
+    return operaciones
+
+
+# ---------------------------
+# ADAPTADORES POR MOTOR
+# ---------------------------
+
+def cargar_motor(nombre):
+    return importlib.import_module(MOTORES[nombre])
+
+
+def crear_biblioteca(nombre):
+    """Instancia el motor; los motores en disco usan un archivo temporal."""
+    modulo = cargar_motor(nombre)
+    if nombre == "sqlite":
+        descriptor, ruta = tempfile.mkstemp(suffix=".db")
+        os.close(descriptor)
+        return modulo.Biblioteca(ruta)
+    return modulo.Biblioteca()
+
+
+def liberar_biblioteca(bib):
+    if hasattr(bib, "cerrar"):
+        bib.cerrar()
+        ruta = getattr(bib, "ruta", ":memory:")
+        for sufijo in ("", "-wal", "-shm"):
+            if ruta != ":memory:" and os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+
+
+def funcion_busqueda(bib):
+    """
+    Búsqueda por fragmento de título según la API de cada versión (None si no
+    existe). Los motores sin búsqueda por fragmento usan su búsqueda rankeada
+    (buscar_libros, primera página) con el mismo texto.
+    """
+    if hasattr(bib, "buscar_libros_por_titulo"):
+        return bib.buscar_libros_por_titulo
+    if hasattr(bib, "buscar_libro"):
+        return lambda fragmento: bib.buscar_libro("titulo", fragmento)
+    if hasattr(bib, "buscar_libros"):
+        return bib.buscar_libros
+    return None
+
+
+# ---------------------------
+# MEDICIÓN
+# ---------------------------
+
+def percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    k = min(len(ordenadas) - 1, max(0, round(p / 100.0 * (len(ordenadas) - 1))))
+    return ordenadas[k]
+
+
+def resumir(latencias_ns, exitos):
+    ordenadas = sorted(latencias_ns)
+    total_s = sum(ordenadas) / 1e9
+    return {
+        "n": len(ordenadas),
+        "exitos": exitos,
+        "ops_por_seg": round(len(ordenadas) / total_s, 1) if total_s else 0.0,
+        "p50_us": round(percentil(ordenadas, 50) / 1e3, 2),
+        "p99_us": round(percentil(ordenadas, 99) / 1e3, 2),
+    }
+
+
+def ejecutar(nombre, catalogo, usuarios, operaciones):
+    """Ejecuta la carga completa sobre un motor y retorna las métricas por operación."""
+    bib = crear_biblioteca(nombre)
+    reloj = time.perf_counter_ns
+    latencias = {}
+    exitos = {}
+
+    def medir(op, funcion, *args):
+        inicio = reloj()
+        resultado = funcion(*args)
+        latencias.setdefault(op, []).append(reloj() - inicio)
+        ok = resultado[0] if isinstance(resultado, tuple) else bool(resultado)
+        exitos[op] = exitos.get(op, 0) + (1 if ok else 0)
+
+    for datos in catalogo:
+        medir("registrar_libro", bib.registrar_libro, *datos)
+    for datos in usuarios:
+        medir("registrar_usuario", bib.registrar_usuario, *datos)
+
+    buscar = funcion_busqueda(bib)
+    for op in operaciones:
+        if op[0] == "prestar":
+            medir("prestar", bib.prestar_libro, op[1], op[2])
+        elif op[0] == "devolver":
+            medir("devolver", bib.devolver_libro, op[1])
+        elif buscar is not None:
+            medir("buscar", buscar, op[1])
+
+    liberar_biblioteca(bib)
+    return {op: resumir(valores, exitos[op]) for op, valores in latencias.items()}
+
+
+def memoria_pico(nombre, catalogo, usuarios):
+    """
+    Memoria pico (MB, tracemalloc) al cargar el catálogo y los usuarios en el motor.
+    Solo cuenta memoria de objetos Python (la caché de páginas de SQLite no aparece).
+    """
+    tracemalloc.start()
+    bib = None
+    try:
+        bib = crear_biblioteca(nombre)
+        for datos in catalogo:
+            bib.registrar_libro(*datos)
+        for datos in usuarios:
+            bib.registrar_usuario(*datos)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        if bib is not None:
+            liberar_biblioteca(bib)
+    return round(pico / (1024 * 1024), 2)
+
+
+def memoria_por_registro(nombre, catalogo, usuarios):
+    """
+    Bytes retenidos por libro y por usuario una vez cargados (memoria viva de
+    tracemalloc tras cada fase, dividida por el número de registros). A
+    diferencia de memoria_pico, no incluye temporales ya liberados.
+    """
+    tracemalloc.start()
+    bib = None
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        bib = crear_biblioteca(nombre)
+        for datos in catalogo:
+            bib.registrar_libro(*datos)
+        tras_libros = tracemalloc.get_traced_memory()[0]
+        for datos in usuarios:
+            bib.registrar_usuario(*datos)
+        tras_usuarios = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+        if bib is not None:
+            liberar_biblioteca(bib)
+    return {
+        "bytes_por_libro": round((tras_libros - base) / max(len(catalogo), 1), 1),
+        "bytes_por_usuario": round((tras_usuarios - tras_libros) / max(len(usuarios), 1), 1),
+    }
+
+
+_SCRIPT_IMPORTACION = (
+    "import sys, time; t = time.perf_counter(); import {modulo}; "
+    "print(time.perf_counter() - t, 'tkinter' in sys.modules)"
+)
+
+
+def tiempo_importacion(nombre, repeticiones=5):
+    """
+    Importa el módulo del motor en intérpretes nuevos y retorna la mediana (ms)
+    y si la importación arrastró tkinter (el núcleo no debería).
+    """
+    tiempos = []
+    carga_tk = False
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", _SCRIPT_IMPORTACION.format(modulo=MOTORES[nombre])],
+                                capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        tiempos.append(float(salida[0]) * 1000)
+        carga_tk = carga_tk or salida[1] == "True"
+    tiempos.sort()
+    return {"importacion_ms": round(tiempos[len(tiempos) // 2], 2), "importa_tkinter": carga_tk}
+
+
+# ---------------------------
+# BÚSQUEDA DIFUSA
+# ---------------------------
+
+def con_errores(texto, rng, errores):
+    """Copia del texto con 'errores' ediciones al azar (sustitución, borrado o inserción)."""
+    letras = "abcdefghijklmnopqrstuvwxyz"
+    texto = list(texto)
+    for _ in range(errores):
+        i = rng.randrange(len(texto) + 1)
+        tipo = rng.choice(("sustituir", "borrar", "insertar")) if i < len(texto) else "insertar"
+        if tipo == "sustituir":
+            texto[i] = rng.choice(letras)
+        elif tipo == "borrar" and len(texto) > 1:
+            del texto[i]
+        else:
+            texto.insert(i, rng.choice(letras))
+    return "".join(texto)
+
+
+def busqueda_difusa(titulos, n_consultas=200, max_distancia=2, semilla=0):
+    """
+    Árbol BK contra fuerza bruta (distancia de edición contra cada clave) sobre
+    los títulos distintos y los autores, con consultas de 1 o 2 errores. Verifica
+    que ambos encuentren lo mismo y retorna construcción y latencia media.
+    """
+    from indices import IndiceDifuso, distancia_edicion, plegar
+    rng = random.Random(semilla)
+    claves = sorted(set(titulos) | set(AUTORES))
+    t0 = time.perf_counter()
+    indice = IndiceDifuso()
+    for clave in claves:
+        indice.agregar(clave, clave)
+    construccion = time.perf_counter() - t0
+    consultas = [con_errores(rng.choice(claves), rng, rng.randint(1, max_distancia))
+                 for _ in range(n_consultas)]
+    plegadas = [(clave, plegar(clave)) for clave in claves]
+
+    t0 = time.perf_counter()
+    por_indice = [indice.buscar(c, max_distancia) for c in consultas]
+    t_indice = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    por_fuerza_bruta = []
+    for consulta in consultas:
+        q = plegar(consulta)
+        encontrados = [(clave, d) for clave, p in plegadas
+                       if (d := distancia_edicion(q, p)) <= max_distancia]
+        por_fuerza_bruta.append(encontrados)
+    t_bruta = time.perf_counter() - t0
+
+    coinciden = all(sorted(a) == sorted(b) for a, b in zip(por_indice, por_fuerza_bruta))
+    return {
+        "claves": len(claves),
+        "consultas": n_consultas,
+        "max_distancia": max_distancia,
+        "construccion_ms": round(construccion * 1000, 2),
+        "arbol_bk_us": round(t_indice / n_consultas * 1e6, 2),
+        "fuerza_bruta_us": round(t_bruta / n_consultas * 1e6, 2),
+        "aceleracion": round(t_bruta / t_indice, 2) if t_indice else None,
+        "resultados_iguales": coinciden,
+    }
+
+
+def comparar(actual, anterior, umbral):
+    """Lista de regresiones: operaciones cuyo throughput cayó más de 'umbral' (fracción)."""
+    regresiones = []
+    for motor, metricas in actual["resultados"].items():
+        previas = anterior.get("resultados", {}).get(motor, {})
+        for op, datos in metricas.get("operaciones", {}).items():
+            previo = previas.get("operaciones", {}).get(op)
+            if not previo or not previo["ops_por_seg"]:
+                continue
+            cambio = datos["ops_por_seg"] / previo["ops_por_seg"] - 1.0
+            if cambio < -umbral:
+                regresiones.append((motor, op, previo["ops_por_seg"], datos["ops_por_seg"], cambio))
+        for clave in ("bytes_por_libro", "bytes_por_usuario"):
+            antes = previas.get("registro", {}).get(clave)
+            ahora = metricas.get("registro", {}).get(clave)
+            if antes and ahora and ahora / antes - 1.0 > umbral:
+                regresiones.append((motor, clave, antes, ahora, ahora / antes - 1.0))
+        antes = previas.get("importacion", {}).get("importacion_ms")
+        ahora = metricas.get("importacion", {}).get("importacion_ms")
+        if antes and ahora and ahora / antes - 1.0 > umbral:
+            # para el tiempo de importación, subir es empeorar
+            regresiones.append((motor, "importacion_ms", antes, ahora, ahora / antes - 1.0))
+    antes = anterior.get("difusa", {}).get("arbol_bk_us")
+    ahora = actual.get("difusa", {}).get("arbol_bk_us")
+    if antes and ahora and ahora / antes - 1.0 > umbral:
+        regresiones.append(("difusa", "arbol_bk_us", antes, ahora, ahora / antes - 1.0))
+    return regresiones
+
+
+def imprimir(resultados):
+    for motor, metricas in resultados.items():
+        print(f"== {motor} ({MOTORES[motor]}.py) memoria pico: {metricas.get('memoria_pico_mb', '-')} MB")
+        if "registro" in metricas:
+            reg = metricas["registro"]
+            print(f"   memoria retenida: {reg['bytes_por_libro']} B/libro, {reg['bytes_por_usuario']} B/usuario")
+        if "importacion" in metricas:
+            imp = metricas["importacion"]
+            print(f"   importación en frío: {imp['importacion_ms']} ms (tkinter: {'sí' if imp['importa_tkinter'] else 'no'})")
+        for op, d in metricas["operaciones"].items():
+            print(f"   {op:<18} n={d['n']:<8} ok={d['exitos']:<8} {d['ops_por_seg']:>12.1f} ops/s"
+                  f"   p50={d['p50_us']:>9.2f} us   p99={d['p99_us']:>9.2f} us")
+
+
+def imprimir_difusa(d):
+    print(f"== búsqueda difusa ({d['claves']} claves, distancia <= {d['max_distancia']}, "
+          f"{d['consultas']} consultas) construcción: {d['construccion_ms']} ms")
+    print(f"   árbol BK: {d['arbol_bk_us']:.2f} us/consulta   fuerza bruta: {d['fuerza_bruta_us']:.2f} us/consulta"
+          f"   x{d['aceleracion']}   resultados iguales: {'sí' if d['resultados_iguales'] else 'NO'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de las implementaciones de Biblioteca.")
+    parser.add_argument("--motores", default=",".join(MOTORES), help="lista separada por comas")
+    parser.add_argument("--libros", type=int, default=10000)
+    parser.add_argument("--usuarios", type=int, default=2000)
+    parser.add_argument("--operaciones", type=int, default=20000)
+    parser.add_argument("--orden", choices=["secuencial", "aleatorio"], default="secuencial")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--sin-memoria", action="store_true", help="omite las mediciones de memoria")
+    parser.add_argument("--sin-importacion", action="store_true", help="omite la medición del tiempo de importación")
+    parser.add_argument("--sin-difusa", action="store_true", help="omite la comparación de búsqueda difusa")
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de una ejecución previa para detectar regresiones")
+    parser.add_argument("--umbral", type=float, default=0.10, help="caída de throughput tolerada (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    motores = [m.strip() for m in args.motores.split(",") if m.strip()]
+    catalogo, titulos = generar_catalogo(args.libros, args.orden, args.semilla)
+    usuarios = generar_usuarios(args.usuarios, args.orden, args.semilla)
+    operaciones = generar_operaciones(args.operaciones, [c[0] for c in catalogo],
+                                      [u[0] for u in usuarios], titulos, MEZCLA_POR_DEFECTO, args.semilla)
+
+    resultados = {}
+    for motor in motores:
+        resultados[motor] = {"operaciones": ejecutar(motor, catalogo, usuarios, operaciones)}
+        if not args.sin_memoria:
+            resultados[motor]["memoria_pico_mb"] = memoria_pico(motor, catalogo, usuarios)
+            resultados[motor]["registro"] = memoria_por_registro(motor, catalogo, usuarios)
+        if not args.sin_importacion:
+            resultados[motor]["importacion"] = tiempo_importacion(motor)
+
+    informe = {
+        "meta": {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "parametros": vars(args),
+        },
+        "resultados": resultados,
+    }
+    if not args.sin_difusa:
+        informe["difusa"] = busqueda_difusa(titulos, semilla=args.semilla)
+    imprimir(resultados)
+    if "difusa" in informe:
+        imprimir_difusa(informe["difusa"])
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        regresiones = comparar(informe, anterior, args.umbral)
+        for motor, op, antes, ahora, cambio in regresiones:
+            print(f"REGRESIÓN {motor}/{op}: {antes:.1f} -> {ahora:.1f} ({cambio:+.1%})")
+        if regresiones:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,65 +1,147 @@
 from collections import deque
-import tkinter as tk
-from tkinter import messagebox, simpledialog
+from collections.abc import Mapping
+
+from estructuras import ListasEspera, compartir
+from indices import IndiceDifuso, IndiceNgramas
 
 class Nodo:
-    """Nodo para la Lista Enlazada de usuarios."""
+    """Nodo para la Lista Enlazada de usuarios (doblemente enlazado para borrar en O(1))."""
     def __init__(self, data):
         self.data = data
         self.next = None
+        self.prev = None
+
+def _id_de(data):
+    """ID de un elemento de la lista: dict con clave 'id' u objeto con atributo id."""
+    return data["id"] if isinstance(data, dict) else data.id
+
+class VistaPorId(Mapping):
+    """Vista de solo lectura id -> elemento sobre el índice id -> Nodo de una ListaEnlazada."""
+    def __init__(self, nodos):
+        self._nodos = nodos
+
+    def __getitem__(self, id):
+        return self._nodos[id].data
+
+    def __contains__(self, id):
+        return id in self._nodos
+
+    def __iter__(self):
+        return iter(self._nodos)
+
+    def __len__(self):
+        return len(self._nodos)
 
 class ListaEnlazada:
-    """Lista Enlazada para gestionar usuarios dinámicamente."""
+    """Lista Enlazada para gestionar usuarios dinámicamente.
+    Mantiene puntero a la cola y un índice id -> nodo: append, find_by_id y remove_by_id son O(1).
+    """
     def __init__(self):
         self.head = None
+        self.tail = None
+        self._nodos = {}  # id -> Nodo
+
+    def __len__(self):
+        return len(self._nodos)
+
+    def __iter__(self):
+        current = self.head
+        while current:
+            yield current.data
+            current = current.next
 
     def append(self, data):
-        """Inserta un nuevo usuario al final de la lista."""
+        """Inserta un nuevo usuario al final de la lista (los IDs deben ser únicos)."""
         new_node = Nodo(data)
+        self._nodos[_id_de(data)] = new_node
         if not self.head:
-            self.head = new_node
+            self.head = self.tail = new_node
             return
-        last = self.head
-        while last.next:
-            last = last.next
-        last.next = new_node
+        new_node.prev = self.tail
+        self.tail.next = new_node
+        self.tail = new_node
 
     def find_by_id(self, user_id):
-        """Busca un usuario por ID (O(n))."""
-        current = self.head
-        while current:
-            if current.data["id"] == user_id:
-                return current.data
-            current = current.next
-        return None
+        """Busca un usuario por ID (O(1) vía índice)."""
+        nodo = self._nodos.get(user_id)
+        return nodo.data if nodo else None
+
+    def por_id(self):
+        """Vista id -> elemento (se actualiza sola al agregar o eliminar)."""
+        return VistaPorId(self._nodos)
+
+    def __getstate__(self):
+        # se serializa como lista: pickle recursivo sobre los nodos enlazados desbordaría la pila
+        return list(self)
+
+    def __setstate__(self, elementos):
+        self.__init__()
+        for data in elementos:
+            self.append(data)
 
     def remove_by_id(self, user_id):
-        """Elimina un usuario por ID (no usado en este prototipo, pero útil)."""
-        if not self.head:
-            return
-        if self.head.data["id"] == user_id:
-            self.head = self.head.next
-            return
-        current = self.head
-        while current.next:
-            if current.next.data["id"] == user_id:
-                current.next = current.next.next
-                return
-            current = current.next
+        """Elimina un usuario por ID (O(1)). Retorna el elemento eliminado o None."""
+        nodo = self._nodos.pop(user_id, None)
+        if not nodo:
+            return None
+        if nodo.prev:
+            nodo.prev.next = nodo.next
+        else:
+            self.head = nodo.next
+        if nodo.next:
+            nodo.next.prev = nodo.prev
+        else:
+            self.tail = nodo.prev
+        return nodo.data
+
+class ArrayLibros:
+    """Arreglo (lista dinámica) para libros con acceso rápido.
+    Los libros se agregan con append, que mantiene el índice por ID, los de trigramas
+    y los árboles BK (búsqueda con errores de tipeo). Los índices guardan posiciones,
+    así que no se hereda de list: solo se exponen append y operaciones de lectura
+    (insert, pop, remove o asignar una posición los dejarían desactualizados).
+    """
+    CRITERIOS = ("titulo", "autor")
+
+    def __init__(self, libros=()):
+        self._libros = []
+        self.indice_ids = {}  # id -> Libro
+        # Índices de trigramas por criterio: posición en el arreglo -> texto
+        self.indices_ngramas = {criterio: IndiceNgramas() for criterio in self.CRITERIOS}
+        self.indices_difusos = {criterio: IndiceDifuso() for criterio in self.CRITERIOS}
+        for libro in libros:
+            self.append(libro)
+
+    def __len__(self):
+        return len(self._libros)
+
+    def __iter__(self):
+        return iter(self._libros)
+
+    def __getitem__(self, posicion):
+        return self._libros[posicion]
+
+    def append(self, libro):
+        """Agrega un libro al final y lo indexa por título y autor."""
+        posicion = len(self._libros)
+        self._libros.append(libro)
+        self.indice_ids[libro.id] = libro
+        for criterio, indice in self.indices_ngramas.items():
+            indice.agregar(posicion, getattr(libro, criterio))
+            self.indices_difusos[criterio].agregar(posicion, getattr(libro, criterio))
 
-class ArrayLibros(list):
-    """Arreglo (lista dinámica) para libros con acceso rápido."""
     def find_by_id(self, book_id):
-        """Busca un libro por ID (O(n))."""
-        for libro in self:
-            if libro.id == book_id:
-                return libro
-        return None
+        """Busca un libro por ID (O(1) vía índice)."""
+        return self.indice_ids.get(book_id)
 
     def search_by_criteria(self, criterio, valor):
-        """Busca libros por título o autor."""
-        resultados = [libro for libro in self if valor.lower() in libro.__dict__[criterio].lower()]
-        return resultados
+        """Busca libros por título o autor (índice de trigramas, solo verifica candidatos)."""
+        posiciones = self.indices_ngramas[criterio].buscar(valor)
+        return [self[i] for i in sorted(posiciones)]
+
+    def search_approximate(self, criterio, valor, max_distancia=None):
+        """Libros cuyo título o autor está a pocos errores de tipeo del valor (los más parecidos primero)."""
+        return [self[i] for i, _ in self.indices_difusos[criterio].buscar(valor, max_distancia)]
 
 class PilaPrestamos(list):
     """Pila (LIFO) para historial de préstamos de un usuario."""
@@ -93,38 +175,52 @@ class ColaSolicitudes(deque):
 
 class Libro:
     """Clase para representar un libro."""
+    __slots__ = ("id", "titulo", "autor", "genero", "anio", "disponible")
+
     def __init__(self, id, titulo, autor, genero, anio):
         self.id = id
         self.titulo = titulo
-        self.autor = autor
-        self.genero = genero
+        self.autor = compartir(autor)
+        self.genero = compartir(genero)
         self.anio = anio
         self.disponible = True
 
-    def __dict__(self):
-        return {
-            'titulo': self.titulo,
-            'autor': self.autor
-        }
-
 class Usuario:
     """Clase para representar un usuario."""
+    __slots__ = ("id", "nombre", "correo", "_prestamos")
+
     def __init__(self, id, nombre, correo):
         self.id = id
         self.nombre = nombre
         self.correo = correo
-        self.prestamos = PilaPrestamos()  # Pila para historial
+        self._prestamos = None  # Pila para historial (perezosa)
+
+    @property
+    def prestamos(self):
+        """Pila de préstamos; se crea con el primer acceso (la mayoría de usuarios no tiene ninguno)."""
+        if self._prestamos is None:
+            self._prestamos = PilaPrestamos()
+        return self._prestamos
+
+    def cantidad_prestamos(self):
+        """Préstamos activos sin materializar la pila vacía."""
+        return len(self._prestamos) if self._prestamos is not None else 0
 
 class Biblioteca:
     def __init__(self):
         self.libros = ArrayLibros()  # Arreglo para libros
         self.usuarios = ListaEnlazada()  # Lista enlazada para usuarios
-        self.solicitudes = ColaSolicitudes()  # Cola para solicitudes en espera
-        self.indices_usuarios = {}  # Diccionario para búsqueda rápida por ID
+        self.solicitudes = ListasEspera(ColaSolicitudes)  # Una cola de solicitudes en espera por libro
+        self.prestamos_activos = {}  # id_libro -> Usuario que lo tiene prestado
+
+    @property
+    def indices_usuarios(self):
+        """Diccionario (de solo lectura) id -> Usuario para búsqueda rápida por ID."""
+        return self.usuarios.por_id()
 
     def registrar_libro(self, id, titulo, autor, genero, anio):
         """Registra un nuevo libro si el ID no está duplicado."""
-        if any(libro.id == id for libro in self.libros):
+        if self.libros.find_by_id(id) is not None:
             return False, f"Error: El ID {id} ya está registrado."
         nuevo_libro = Libro(id, titulo, autor, genero, anio)
         self.libros.append(nuevo_libro)
@@ -132,16 +228,37 @@ class Biblioteca:
 
     def registrar_usuario(self, id, nombre, correo):
         """Registra un nuevo usuario si el ID no está duplicado."""
-        if id in self.indices_usuarios:
+        if self.usuarios.find_by_id(id) is not None:
             return False, f"Error: El ID {id} ya está registrado."
         nuevo_usuario = Usuario(id, nombre, correo)
-        self.usuarios.append(nuevo_usuario)
-        self.indices_usuarios[id] = nuevo_usuario  # Índice para optimización
+        self.usuarios.append(nuevo_usuario)  # También actualiza el índice por ID
         return True, f"Usuario '{nombre}' registrado con éxito."
 
+    def registrar_libros_lote(self, registros):
+        """Registra tuplas (id, titulo, autor, genero, anio). Retorna (aceptados, rechazados)."""
+        aceptados, rechazados = 0, []
+        for registro in registros:
+            exito, msg = self.registrar_libro(*registro)
+            if exito:
+                aceptados += 1
+            else:
+                rechazados.append((registro, msg))
+        return aceptados, rechazados
+
+    def registrar_usuarios_lote(self, registros):
+        """Registra tuplas (id, nombre, correo). Retorna (aceptados, rechazados)."""
+        aceptados, rechazados = 0, []
+        for registro in registros:
+            exito, msg = self.registrar_usuario(*registro)
+            if exito:
+                aceptados += 1
+            else:
+                rechazados.append((registro, msg))
+        return aceptados, rechazados
+
     def prestar_libro(self, id_usuario, id_libro):
         """Presta un libro: si disponible, lo asigna; si no, encola solicitud."""
-        usuario = self.indices_usuarios.get(id_usuario)
+        usuario = self.usuarios.find_by_id(id_usuario)
         libro = self.libros.find_by_id(id_libro)
         
         if not usuario:
@@ -149,12 +266,14 @@ class Biblioteca:
         if not libro:
             return False, "Error: Libro no encontrado."
         if not libro.disponible:
-            # Encola solicitud en lugar de rechazar
-            self.solicitudes.enqueue((id_usuario, id_libro))
+            # Encola solicitud en lugar de rechazar (sin duplicados)
+            if not self.solicitudes.encolar(id_usuario, id_libro):
+                return False, f"El libro '{libro.titulo}' no está disponible. Ya existe una solicitud suya en espera."
             return False, f"El libro '{libro.titulo}' no está disponible. Solicitud encolada."
 
         libro.disponible = False
         usuario.prestamos.push(id_libro)  # Agrega a pila (historial LIFO)
+        self.prestamos_activos[id_libro] = usuario
         return True, f"Libro '{libro.titulo}' prestado a {usuario.nombre} con éxito."
 
     def devolver_libro(self, id_libro):
@@ -165,39 +284,74 @@ class Biblioteca:
         if libro.disponible:
             return False, f"Error: El libro '{libro.titulo}' ya está disponible."
 
-        # Buscar usuario que tenga este libro como último préstamo (LIFO)
-        usuario_encontrado = None
-        for user_id in list(self.indices_usuarios.keys()):
-            usuario = self.indices_usuarios[user_id]
-            if usuario.prestamos.peek_last() == id_libro:
-                usuario_encontrado = usuario
-                break
-        
-        if not usuario_encontrado:
+        # Usuario que tiene el libro (índice libro -> usuario); debe ser su último préstamo (LIFO)
+        usuario_encontrado = self.prestamos_activos.get(id_libro)
+        if not usuario_encontrado or usuario_encontrado.prestamos.peek_last() != id_libro:
             return False, "Error: No se encontró un préstamo activo para este libro."
 
         libro.disponible = True
         usuario_encontrado.prestamos.pop_last()  # Remueve de pila
-        # Remover de cola si está (por si acaso)
-        self.solicitudes = ColaSolicitudes([req for req in self.solicitudes if req[1] != id_libro])
+        del self.prestamos_activos[id_libro]
+        # Remover de cola si está (por si acaso); solo se toca la cola de este libro
+        self.solicitudes.descartar(id_libro)
         return True, f"Libro '{libro.titulo}' devuelto por {usuario_encontrado.nombre} con éxito."
 
+    def prestar_lote(self, transacciones):
+        """Presta pares (id_usuario, id_libro) en orden. Retorna la lista de (exito, msg)."""
+        return [self.prestar_libro(id_usuario, id_libro) for id_usuario, id_libro in transacciones]
+
+    def devolver_lote(self, ids_libros):
+        """Devuelve los libros en orden. Retorna la lista de (exito, msg)."""
+        return [self.devolver_libro(id_libro) for id_libro in ids_libros]
+
+    def posicion_en_espera(self, id_usuario, id_libro):
+        """Posición (1 = siguiente) del usuario en la cola del libro, o None."""
+        return self.solicitudes.posicion(id_usuario, id_libro)
+
+    def cancelar_solicitud(self, id_usuario, id_libro):
+        """Retira la solicitud en espera del usuario por el libro."""
+        if not self.solicitudes.cancelar(id_usuario, id_libro):
+            return False, "No existe una solicitud en espera para ese usuario y libro."
+        return True, "Solicitud cancelada."
+
+    def solicitudes_en_espera(self, id_libro):
+        """Número de solicitudes en espera para el libro."""
+        return self.solicitudes.longitud(id_libro)
+
     def buscar_libro(self, criterio, valor):
         """Busca libros por título o autor."""
         if criterio not in ["titulo", "autor"]:
             return False, "Criterio inválido. Use 'titulo' o 'autor'."
         resultados = self.libros.search_by_criteria(criterio, valor)
+        msg = "Resultados:\n"
+        if not resultados:
+            # Sin coincidencias: probar con errores de tipeo ("Borjes" -> "Borges")
+            resultados = self.libros.search_approximate(criterio, valor)
+            msg = "Sin coincidencias exactas. Resultados aproximados:\n"
         if not resultados:
             return False, f"No se encontraron libros con {criterio} = {valor}."
-        msg = "Resultados:\n"
-        for libro in resultados:
-            msg += f"ID: {libro.id}, Título: {libro.titulo}, Autor: {libro.autor}, " \
-                   f"Género: {libro.genero}, Año: {libro.anio}, Disponible: {libro.disponible}\n"
-        return True, msg
+        # join en vez de msg += por libro (concatenar en un bucle es cuadrático)
+        return True, msg + "".join(
+            f"ID: {libro.id}, Título: {libro.titulo}, Autor: {libro.autor}, "
+            f"Género: {libro.genero}, Año: {libro.anio}, Disponible: {libro.disponible}\n"
+            for libro in resultados)
 
 # Interfaz Gráfica con Tkinter
+# tkinter se importa solo al lanzar la interfaz: el núcleo (Biblioteca, Libro,
+# Usuario, estructuras) se puede importar en procesos sin Tk.
+tk = messagebox = simpledialog = None
+
+def _cargar_tkinter():
+    global tk, messagebox, simpledialog
+    if tk is None:
+        import tkinter
+        from tkinter import messagebox as _messagebox, simpledialog as _simpledialog
+        tk, messagebox, simpledialog = tkinter, _messagebox, _simpledialog
+    return tk
+
 class AppBiblioteca:
     def __init__(self, root):
+        _cargar_tkinter()
         self.root = root
         self.root.title("Sistema de Gestión de Biblioteca")
         self.biblioteca = Biblioteca()
@@ -278,6 +432,6 @@ class AppBiblioteca:
         self.mostrar_mensaje(exito, msg)
 
 if __name__ == "__main__":
-    root = tk.Tk()
+    root = _cargar_tkinter().Tk()
     app = AppBiblioteca(root)
     root.mainloop()
\ No newline at end of file
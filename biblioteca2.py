@@ -4,146 +4,39 @@ Versión actualizada: Sistema de gestión de biblioteca usando árboles (ABB)
 Autor: deiger garcia
 Descripción:
  - Reemplaza la implementación basada en estructuras lineales por árboles binarios de búsqueda (ABB)
+   auto-balanceados (AVL, ver estructuras.py): O(log n) sin importar el orden de inserción.
  - Árboles usados:
     * arbol_usuarios_por_id    : ABB key = usuario.id -> Usuario
     * arbol_libros_por_id      : ABB key = libro.id -> Libro
     * arbol_libros_por_titulo  : ABB key = titulo.lower() -> list de Libro (maneja títulos repetidos)
     * arbol_libros_por_autor   : ABB key = autor.lower() -> list de Libro (múltiples libros por autor)
- - Mantiene: pila de préstamos por usuario, cola de solicitudes para libros no disponibles.
- - Interfaz: Tkinter (similar al prototipo anterior).
+ - Índices de trigramas (indices.py) sobre las claves de título y autor para búsquedas por fragmento.
+ - Árboles BK (indices.py) sobre las mismas claves para búsquedas con errores de tipeo.
+ - Autocompletado de títulos y autores (trie de indices.py) ordenado por número de préstamos.
+ - Mantiene: pila de préstamos por usuario, cola de solicitudes por libro para libros no disponibles.
+ - Interfaz: Tkinter (similar al prototipo anterior), importado solo al lanzar AppBiblioteca.
+   Los listados y búsquedas se muestran en una tabla paginada (vistas.py).
 
 """
 
-from collections import deque
-import tkinter as tk
-from tkinter import messagebox, simpledialog
+from contextlib import nullcontext
 
-# ---------------------------
-# ESTRUCTURAS: Árbol Binario (mapa clave -> valor)
-# ---------------------------
-
-class NodoArbol:
-    def __init__(self, clave, valor):
-        self.clave = clave
-        self.valor = valor
-        self.izquierdo = None
-        self.derecho = None
-
-class ArbolMap:
-    """
-    Árbol binario de búsqueda simple que mapea clave -> valor.
-    Si el valor debe soportar múltiples elementos (p. ej. título con varios libros),
-    el 'valor' puede ser una lista y el método insertar lo agregará.
-    """
-    def __init__(self):
-        self.raiz = None
-
-    def insertar(self, clave, valor, append_if_exists=False):
-        """
-        Inserta clave->valor. Si append_if_exists True y la clave existe:
-        - si el nodo.valor es lista -> se hace append,
-        - si no es lista -> lo reemplaza.
-        """
-        clave_proc = clave
-        self.raiz = self._insertar_rec(self.raiz, clave_proc, valor, append_if_exists)
-
-    def _insertar_rec(self, nodo, clave, valor, append_if_exists):
-        if nodo is None:
-            # si se espera mantener varios valores por clave (valor ya puede ser lista)
-            return NodoArbol(clave, valor)
-        if clave < nodo.clave:
-            nodo.izquierdo = self._insertar_rec(nodo.izquierdo, clave, valor, append_if_exists)
-        elif clave > nodo.clave:
-            nodo.derecho = self._insertar_rec(nodo.derecho, clave, valor, append_if_exists)
-        else:
-            # clave ya existe
-            if append_if_exists:
-                if isinstance(nodo.valor, list):
-                    # si valor es lista, agregamos la(s) nuevas entradas
-                    if isinstance(valor, list):
-                        nodo.valor.extend(valor)
-                    else:
-                        nodo.valor.append(valor)
-                else:
-                    # reemplazamos si no es lista
-                    nodo.valor = valor
-            else:
-                # reemplazo por defecto
-                nodo.valor = valor
-        return nodo
-
-    def buscar(self, clave):
-        return self._buscar_rec(self.raiz, clave)
-
-    def _buscar_rec(self, nodo, clave):
-        if nodo is None:
-            return None
-        if clave == nodo.clave:
-            return nodo.valor
-        elif clave < nodo.clave:
-            return self._buscar_rec(nodo.izquierdo, clave)
-        else:
-            return self._buscar_rec(nodo.derecho, clave)
-
-    def eliminar(self, clave):
-        self.raiz, eliminado = self._eliminar_rec(self.raiz, clave)
-        return eliminado
-
-    def _eliminar_rec(self, nodo, clave):
-        if nodo is None:
-            return nodo, None
-        if clave < nodo.clave:
-            nodo.izquierdo, eliminado = self._eliminar_rec(nodo.izquierdo, clave)
-            return nodo, eliminado
-        elif clave > nodo.clave:
-            nodo.derecho, eliminado = self._eliminar_rec(nodo.derecho, clave)
-            return nodo, eliminado
-        else:
-            # encontramos
-            if nodo.izquierdo is None:
-                return nodo.derecho, nodo.valor
-            elif nodo.derecho is None:
-                return nodo.izquierdo, nodo.valor
-            else:
-                # nodo con dos hijos: sustituir por sucesor (mínimo en subárbol derecho)
-                sucesor = self._minimo(nodo.derecho)
-                nodo.clave, nodo.valor = sucesor.clave, sucesor.valor
-                nodo.derecho, _ = self._eliminar_rec(nodo.derecho, sucesor.clave)
-                return nodo, sucesor.valor
-
-    def _minimo(self, nodo):
-        actual = nodo
-        while actual.izquierdo is not None:
-            actual = actual.izquierdo
-        return actual
-
-    def inorder(self):
-        """Retorna lista de (clave, valor) en orden ascendente por clave."""
-        resultados = []
-        self._inorder_rec(self.raiz, resultados)
-        return resultados
-
-    def _inorder_rec(self, nodo, resultados):
-        if nodo is None:
-            return
-        self._inorder_rec(nodo.izquierdo, resultados)
-        resultados.append((nodo.clave, nodo.valor))
-        self._inorder_rec(nodo.derecho, resultados)
-
-    def valores(self):
-        """Retorna lista de valores (sin claves) en orden."""
-        return [v for _, v in self.inorder()]
+from estructuras import ArbolMap, ListasEspera, compartir
+from indices import IndiceDifuso, IndiceNgramas, TrieAutocompletado
+from vistas import VentanaResultados, paginar_iterador
 
 # ---------------------------
 # CLASES DEL DOMINIO (Libro, Usuario)
 # ---------------------------
 
 class Libro:
+    __slots__ = ("id", "titulo", "autor", "genero", "anio", "disponible")
+
     def __init__(self, id, titulo, autor, genero, anio):
         self.id = id
         self.titulo = titulo
-        self.autor = autor
-        self.genero = genero
+        self.autor = compartir(autor)
+        self.genero = compartir(genero)
         self.anio = anio
         self.disponible = True
 
@@ -164,11 +57,24 @@ class PilaPrestamos(list):
         return None
 
 class Usuario:
+    __slots__ = ("id", "nombre", "correo", "_prestamos")
+
     def __init__(self, id, nombre, correo):
         self.id = id
         self.nombre = nombre
         self.correo = correo
-        self.prestamos = PilaPrestamos()
+        self._prestamos = None
+
+    @property
+    def prestamos(self):
+        """Pila de préstamos; se crea con el primer acceso (la mayoría de usuarios no tiene ninguno)."""
+        if self._prestamos is None:
+            self._prestamos = PilaPrestamos()
+        return self._prestamos
+
+    def cantidad_prestamos(self):
+        """Préstamos activos sin materializar la pila vacía."""
+        return len(self._prestamos) if self._prestamos is not None else 0
 
     def __repr__(self):
         return f"<Usuario id={self.id} nombre='{self.nombre}'>"
@@ -178,6 +84,10 @@ class Usuario:
 # ---------------------------
 
 class Biblioteca:
+    # Los tries de autocompletado los actualiza cada préstamo, sea cual sea el
+    # libro; BibliotecaConcurrente (concurrencia.py) pone aquí un Lock.
+    exclusion_interacciones = nullcontext()
+
     def __init__(self):
         # Árboles principales
         self.arbol_usuarios_por_id = ArbolMap()    # clave = id_usuario -> Usuario
@@ -187,8 +97,21 @@ class Biblioteca:
         self.arbol_libros_por_titulo = ArbolMap()
         self.arbol_libros_por_autor = ArbolMap()
 
-        # Cola para solicitudes cuando libro no está disponible
-        self.solicitudes = deque()
+        # Índices de trigramas sobre las claves de los árboles de título/autor (búsqueda por fragmento)
+        self.ngramas_titulo = IndiceNgramas()
+        self.ngramas_autor = IndiceNgramas()
+        # Árboles BK sobre las mismas claves (búsqueda aproximada: "borjes" -> "borges")
+        self.difuso_titulo = IndiceDifuso()
+        self.difuso_autor = IndiceDifuso()
+        # Autocompletado por prefijo; la popularidad la suman los préstamos
+        self.autocompletado_titulo = TrieAutocompletado()
+        self.autocompletado_autor = TrieAutocompletado()
+
+        # Préstamos activos: id_libro -> Usuario que lo tiene (devolución en O(1))
+        self.prestamos_activos = {}
+
+        # Colas de solicitudes (una por libro) cuando el libro no está disponible
+        self.solicitudes = ListasEspera()
 
     # ---------- Registro ----------
     def registrar_usuario(self, id, nombre, correo):
@@ -209,6 +132,9 @@ class Biblioteca:
         existente_titulo = self.arbol_libros_por_titulo.buscar(clave_titulo)
         if existente_titulo is None:
             self.arbol_libros_por_titulo.insertar(clave_titulo, [nuevo_libro])
+            self.ngramas_titulo.agregar(clave_titulo, clave_titulo)
+            self.difuso_titulo.agregar(clave_titulo, clave_titulo)
+            self.autocompletado_titulo.agregar(titulo.strip())
         else:
             # append a la lista existente
             self.arbol_libros_por_titulo.insertar(clave_titulo, nuevo_libro, append_if_exists=True)
@@ -218,11 +144,68 @@ class Biblioteca:
         existente_autor = self.arbol_libros_por_autor.buscar(clave_autor)
         if existente_autor is None:
             self.arbol_libros_por_autor.insertar(clave_autor, [nuevo_libro])
+            self.ngramas_autor.agregar(clave_autor, clave_autor)
+            self.difuso_autor.agregar(clave_autor, clave_autor)
+            self.autocompletado_autor.agregar(autor.strip())
         else:
             self.arbol_libros_por_autor.insertar(clave_autor, nuevo_libro, append_if_exists=True)
 
         return True, f"Libro '{titulo}' registrado con éxito."
 
+    # ---------- Registro en bloque ----------
+    def registrar_usuarios_lote(self, registros):
+        """
+        Registra muchos usuarios (tuplas (id, nombre, correo)) de una vez.
+        Retorna (aceptados, rechazados) con rechazados = [(registro, motivo)].
+        """
+        nuevos, rechazados, vistos = [], [], set()
+        for registro in registros:
+            id = registro[0]
+            if id in vistos or id in self.arbol_usuarios_por_id:
+                rechazados.append((registro, f"ID de usuario {id} duplicado."))
+                continue
+            vistos.add(id)
+            nuevos.append(Usuario(*registro))
+        nuevos.sort(key=lambda u: u.id)
+        self.arbol_usuarios_por_id.cargar_ordenados((u.id, u) for u in nuevos)
+        return len(nuevos), rechazados
+
+    def registrar_libros_lote(self, registros):
+        """
+        Registra muchos libros (tuplas (id, titulo, autor, genero, anio)) de una vez.
+        En lugar de cuatro operaciones de árbol por libro, ordena el lote y fusiona
+        cada índice (id, título, autor) con cargar_ordenados en O(n + m).
+        Retorna (aceptados, rechazados) con rechazados = [(registro, motivo)].
+        """
+        nuevos, rechazados, vistos = [], [], set()
+        por_titulo, por_autor = {}, {}
+        for registro in registros:
+            id = registro[0]
+            if id in vistos or id in self.arbol_libros_por_id:
+                rechazados.append((registro, f"ID de libro {id} duplicado."))
+                continue
+            vistos.add(id)
+            libro = Libro(*registro)
+            nuevos.append(libro)
+            por_titulo.setdefault(libro.titulo.strip().lower(), []).append(libro)
+            por_autor.setdefault(libro.autor.strip().lower(), []).append(libro)
+            self.autocompletado_titulo.agregar(libro.titulo.strip())
+            self.autocompletado_autor.agregar(libro.autor.strip())
+
+        nuevos.sort(key=lambda l: l.id)
+        self.arbol_libros_por_id.cargar_ordenados((l.id, l) for l in nuevos)
+        for clave in por_titulo:
+            if clave not in self.arbol_libros_por_titulo:
+                self.ngramas_titulo.agregar(clave, clave)
+                self.difuso_titulo.agregar(clave, clave)
+        for clave in por_autor:
+            if clave not in self.arbol_libros_por_autor:
+                self.ngramas_autor.agregar(clave, clave)
+                self.difuso_autor.agregar(clave, clave)
+        self.arbol_libros_por_titulo.cargar_ordenados(sorted(por_titulo.items()), append_if_exists=True)
+        self.arbol_libros_por_autor.cargar_ordenados(sorted(por_autor.items()), append_if_exists=True)
+        return len(nuevos), rechazados
+
     # ---------- Búsquedas ----------
     def buscar_usuario_por_id(self, id):
         return self.arbol_usuarios_por_id.buscar(id)
@@ -233,84 +216,99 @@ class Biblioteca:
     def buscar_libros_por_titulo(self, titulo_fragmento):
         """
         Busca títulos que contengan el fragmento (case-insensitive).
-        Dado que el índice es por título exacto, hacemos:
-         - si hay coincidencia exacta -> devolvemos lista
-         - si no, hacemos recorrido inorder y filtramos por substring
+        El índice de trigramas da las claves de título candidatas; solo esas se
+        verifican y se resuelven en el árbol (coincidencia exacta primero).
         """
-        clave_exacta = titulo_fragmento.strip().lower()
-        exacto = self.arbol_libros_por_titulo.buscar(clave_exacta)
-        resultados = []
-        if exacto:
-            resultados.extend(exacto if isinstance(exacto, list) else [exacto])
-
-        # Además, filtrado por substring (parcial)
-        for clave, lista_libros in self.arbol_libros_por_titulo.inorder():
-            if clave_exacta in clave:
-                if isinstance(lista_libros, list):
-                    resultados.extend(lista_libros)
-                else:
-                    resultados.append(lista_libros)
-        # eliminar duplicados por id
-        unique = {}
-        for l in resultados:
-            unique[l.id] = l
-        return list(unique.values())
+        return self._buscar_por_fragmento(self.ngramas_titulo, self.arbol_libros_por_titulo, titulo_fragmento)
 
     def buscar_libros_por_autor(self, autor_fragmento):
-        clave_exacta = autor_fragmento.strip().lower()
-        exacto = self.arbol_libros_por_autor.buscar(clave_exacta)
+        return self._buscar_por_fragmento(self.ngramas_autor, self.arbol_libros_por_autor, autor_fragmento)
+
+    def _buscar_por_fragmento(self, indice, arbol, fragmento):
+        clave_exacta = fragmento.strip().lower()
+        claves = sorted(indice.buscar(clave_exacta))
+        if clave_exacta in claves:
+            claves.remove(clave_exacta)
+            claves.insert(0, clave_exacta)
+        resultados = []
+        for clave in claves:
+            resultados.extend(arbol.buscar(clave))
+        return resultados
+
+    def buscar_libros_por_titulo_aproximado(self, titulo, max_distancia=None, limite=None):
+        """
+        Libros cuyo título completo está a lo sumo a max_distancia errores de
+        tipeo (sin contar tildes ni mayúsculas), los más parecidos primero.
+        """
+        return self._buscar_aproximado(self.difuso_titulo, self.arbol_libros_por_titulo,
+                                       titulo, max_distancia, limite)
+
+    def buscar_libros_por_autor_aproximado(self, autor, max_distancia=None, limite=None):
+        return self._buscar_aproximado(self.difuso_autor, self.arbol_libros_por_autor,
+                                       autor, max_distancia, limite)
+
+    def _buscar_aproximado(self, indice, arbol, texto, max_distancia, limite):
         resultados = []
-        if exacto:
-            resultados.extend(exacto if isinstance(exacto, list) else [exacto])
-        for clave, lista_libros in self.arbol_libros_por_autor.inorder():
-            if clave_exacta in clave:
-                if isinstance(lista_libros, list):
-                    resultados.extend(lista_libros)
-                else:
-                    resultados.append(lista_libros)
-        unique = {}
-        for l in resultados:
-            unique[l.id] = l
-        return list(unique.values())
+        for clave, _ in indice.buscar(texto, max_distancia):
+            resultados.extend(arbol.buscar(clave))
+            if limite is not None and len(resultados) >= limite:
+                return resultados[:limite]
+        return resultados
+
+    def sugerir_titulos(self, prefijo, k=10):
+        """[(título, préstamos)] que empiezan con el prefijo, los más prestados primero."""
+        with self.exclusion_interacciones:
+            return self.autocompletado_titulo.sugerir(prefijo, k)
+
+    def sugerir_autores(self, prefijo, k=10):
+        with self.exclusion_interacciones:
+            return self.autocompletado_autor.sugerir(prefijo, k)
+
+    def _contar_prestamo(self, libro):
+        with self.exclusion_interacciones:
+            self.autocompletado_titulo.sumar(libro.titulo.strip())
+            self.autocompletado_autor.sumar(libro.autor.strip())
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado.pop("exclusion_interacciones", None)  # un Lock no se puede guardar
+        return estado
 
     # ---------- Préstamo y devolución ----------
     def prestar_libro(self, id_usuario, id_libro):
-        usuario = self.buscar_usuario_por_id(id_usuario)
+        return self._prestar(self.buscar_usuario_por_id(id_usuario), self.buscar_libro_por_id(id_libro),
+                             id_usuario, id_libro)
+
+    def _prestar(self, usuario, libro, id_usuario, id_libro):
         if usuario is None:
             return False, "Error: Usuario no encontrado."
-        libro = self.buscar_libro_por_id(id_libro)
         if libro is None:
             return False, "Error: Libro no encontrado."
         if not libro.disponible:
-            # encolar solicitud (id_usuario, id_libro)
-            self.solicitudes.append((id_usuario, id_libro))
-            return False, f"El libro '{libro.titulo}' no está disponible. Solicitud encolada."
+            # encolar solicitud (id_usuario, id_libro) en la cola del libro
+            if not self.solicitudes.encolar(id_usuario, id_libro):
+                posicion = self.solicitudes.posicion(id_usuario, id_libro)
+                return False, f"El libro '{libro.titulo}' no está disponible. Ya está en espera (posición {posicion})."
+            posicion = self.solicitudes.longitud(id_libro)
+            return False, f"El libro '{libro.titulo}' no está disponible. Solicitud encolada (posición {posicion})."
         # prestar
         libro.disponible = False
         usuario.prestamos.push(id_libro)
+        self.prestamos_activos[id_libro] = usuario
+        self._contar_prestamo(libro)
         return True, f"Libro '{libro.titulo}' prestado a {usuario.nombre} con éxito."
 
     def devolver_libro(self, id_libro):
-        libro = self.buscar_libro_por_id(id_libro)
+        return self._devolver(self.buscar_libro_por_id(id_libro), id_libro, self.buscar_usuario_por_id)
+
+    def _devolver(self, libro, id_libro, buscar_usuario):
         if libro is None:
             return False, "Error: Libro no encontrado."
         if libro.disponible:
             return False, f"Error: El libro '{libro.titulo}' ya está marcado como disponible."
 
-        # Buscar usuario que tenga este libro como último préstamo (LIFO)
-        usuario_encontrado = None
-        for usuario in self.arbol_usuarios_por_id.valores():
-            # usuarios pueden devolverse desde pila
-            if usuario.prestamos.peek_last() == id_libro:
-                usuario_encontrado = usuario
-                break
-
-        if usuario_encontrado is None:
-            # alternativa: si nadie lo tiene como último, intentar encontrar en cualquier pila (no LIFO estricto)
-            for usuario in self.arbol_usuarios_por_id.valores():
-                if id_libro in usuario.prestamos:
-                    usuario_encontrado = usuario
-                    break
+        # Usuario que tiene el libro, según el índice de préstamos activos
+        usuario_encontrado = self.prestamos_activos.get(id_libro)
 
         if usuario_encontrado is None:
             # Si no se encontró usuario con préstamo, devolvemos error
@@ -318,6 +316,7 @@ class Biblioteca:
 
         # realizar devolución
         libro.disponible = True
+        del self.prestamos_activos[id_libro]
         # Si está como último, pop; sino eliminar instancia en la pila (buscar desde arriba)
         if usuario_encontrado.prestamos.peek_last() == id_libro:
             usuario_encontrado.prestamos.pop_last()
@@ -329,48 +328,137 @@ class Biblioteca:
                     break
 
         # Procesar solicitudes en cola: si hay peticiones para este libro, asignarlo al primer solicitante
-        nueva_cola = deque()
         asignado = False
-        while self.solicitudes:
-            sol = self.solicitudes.popleft()
-            sol_usuario_id, sol_libro_id = sol
-            if not asignado and sol_libro_id == id_libro:
-                # intentar asignar
-                solicitante = self.buscar_usuario_por_id(sol_usuario_id)
-                if solicitante:
-                    # prestar al solicitante
-                    libro.disponible = False
-                    solicitante.prestamos.push(id_libro)
-                    asignado = True
-                    # notificar éxito en retorno del método (pero aquí solo procesamos la cola)
-                    # Si quieres, podrías retornar info de a quién se reasignó
-                    continue
-                else:
-                    # si usuario ya no existe, ignorar esta solicitud
-                    continue
-            else:
-                nueva_cola.append(sol)
-        self.solicitudes = nueva_cola
+        while not asignado:
+            sol_usuario_id = self.solicitudes.siguiente(id_libro)
+            if sol_usuario_id is None:
+                break
+            solicitante = buscar_usuario(sol_usuario_id)
+            if solicitante:
+                # prestar al solicitante
+                libro.disponible = False
+                solicitante.prestamos.push(id_libro)
+                self.prestamos_activos[id_libro] = solicitante
+                self._contar_prestamo(libro)
+                asignado = True
+            # si usuario ya no existe, ignorar esta solicitud y probar con el siguiente
 
         if asignado:
             return True, f"Libro '{libro.titulo}' devuelto y reasignado automáticamente al primer solicitante en cola."
         return True, f"Libro '{libro.titulo}' devuelto por {usuario_encontrado.nombre} con éxito."
 
+    def prestar_lote(self, transacciones):
+        """
+        Aplica préstamos (id_usuario, id_libro) en orden y retorna la lista de
+        resultados (bool, msg), idéntica a llamar prestar_libro uno por uno.
+        Cada usuario y libro distinto se busca en los árboles una sola vez.
+        """
+        transacciones = list(transacciones)
+        usuario = self.arbol_usuarios_por_id.buscador(t[0] for t in transacciones)
+        libro = self.arbol_libros_por_id.buscador(t[1] for t in transacciones)
+        return [self._prestar(usuario(id_usuario), libro(id_libro), id_usuario, id_libro)
+                for id_usuario, id_libro in transacciones]
+
+    def devolver_lote(self, ids_libros):
+        """Devuelve los libros en orden, con las mismas reasignaciones que devolver_libro repetido."""
+        ids_libros = list(ids_libros)
+        libro = self.arbol_libros_por_id.buscador(ids_libros)
+        usuario = self.arbol_usuarios_por_id.buscador()
+        return [self._devolver(libro(id_libro), id_libro, usuario) for id_libro in ids_libros]
+
+    def posicion_en_espera(self, id_usuario, id_libro):
+        """Posición (1 = siguiente) del usuario en la cola del libro, o None si no está en espera."""
+        return self.solicitudes.posicion(id_usuario, id_libro)
+
+    def cancelar_solicitud(self, id_usuario, id_libro):
+        """Retira la solicitud en espera del usuario por el libro."""
+        if not self.solicitudes.cancelar(id_usuario, id_libro):
+            return False, "No existe una solicitud en espera para ese usuario y libro."
+        return True, "Solicitud cancelada."
+
+    def solicitudes_en_espera(self, id_libro):
+        return self.solicitudes.longitud(id_libro)
+
     # ---------- Utilitarios para mostrar datos ----------
-    def listar_todos_los_libros(self):
-        """Retorna lista de todos los libros (orden por id)."""
-        pares = self.arbol_libros_por_id.inorder()
-        return [valor for _, valor in pares]
+    def listar_todos_los_libros(self, desde=None, hasta=None, limite=None):
+        """Retorna lista de libros (orden por id), opcionalmente solo el rango [desde, hasta]."""
+        return list(self.iterar_libros(desde, hasta, limite))
+
+    def listar_todos_los_usuarios(self, desde=None, hasta=None, limite=None):
+        return list(self.iterar_usuarios(desde, hasta, limite))
+
+    def iterar_libros(self, desde=None, hasta=None, limite=None):
+        """Generador perezoso de libros por id (p. ej. desde=10000, hasta=10100)."""
+        return self.arbol_libros_por_id.iterar_valores(desde, hasta, limite)
+
+    def iterar_usuarios(self, desde=None, hasta=None, limite=None):
+        """Generador perezoso de usuarios por id."""
+        return self.arbol_usuarios_por_id.iterar_valores(desde, hasta, limite)
+
+    def iterar_libros_por_prefijo_titulo(self, prefijo, limite=None):
+        """Generador de libros cuyo título empieza por 'prefijo' (case-insensitive), en orden de título."""
+        producidos = 0
+        for _, lista_libros in self.arbol_libros_por_titulo.iterar_prefijo(prefijo.strip().lower()):
+            for libro in lista_libros:
+                if limite is not None and producidos >= limite:
+                    return
+                yield libro
+                producidos += 1
+
+    def pagina_libros(self, orden="id", despues_de=None, n=50):
+        """
+        Hasta n pares (cursor, Libro) en el orden de un índice ('id', 'titulo' o
+        'autor'), estrictamente después de 'despues_de' (el cursor de la última
+        fila de la página anterior; None = desde el principio).
+        """
+        arbol = {"id": self.arbol_libros_por_id, "titulo": self.arbol_libros_por_titulo,
+                 "autor": self.arbol_libros_por_autor}[orden]
+        return _pagina(arbol, despues_de, n, listas=orden != "id")
+
+    def pagina_usuarios(self, despues_de=None, n=50):
+        """Como pagina_libros, para los usuarios en orden de id."""
+        return _pagina(self.arbol_usuarios_por_id, despues_de, n, listas=False)
+
+
+def _pagina(arbol, despues_de, n, listas):
+    """
+    Paginación por clave sobre un ArbolMap: el cursor es (clave, posición en la
+    lista de esa clave). Se retoma con iterar(desde=clave), sin recorrer lo ya
+    mostrado y sin depender de un generador abierto entre páginas.
+    """
+    resultado = []
+    if n <= 0:
+        return resultado
+    desde = None if despues_de is None else despues_de[0]
+    for clave, valor in arbol.iterar(desde):
+        for i, elemento in enumerate(valor if listas else (valor,)):
+            if despues_de is not None and (clave, i) <= despues_de:
+                continue
+            resultado.append(((clave, i), elemento))
+            if len(resultado) >= n:
+                return resultado
+    return resultado
 
-    def listar_todos_los_usuarios(self):
-        return [valor for _, valor in self.arbol_usuarios_por_id.inorder()]
 
 # ---------------------------
 # INTERFAZ GRÁFICA (Tkinter)
 # ---------------------------
 
+# tkinter se importa solo al lanzar la interfaz: el núcleo (Biblioteca, Libro,
+# Usuario, estructuras) se puede importar en procesos sin Tk.
+tk = messagebox = simpledialog = None
+
+def _cargar_tkinter():
+    global tk, messagebox, simpledialog
+    if tk is None:
+        import tkinter
+        from tkinter import messagebox as _messagebox, simpledialog as _simpledialog
+        tk, messagebox, simpledialog = tkinter, _messagebox, _simpledialog
+    return tk
+
 class AppBiblioteca:
     def __init__(self, root):
+        _cargar_tkinter()
         self.root = root
         self.root.title("Sistema de Gestión de Biblioteca - (Árboles)")
         self.biblioteca = Biblioteca()
@@ -446,6 +534,53 @@ class AppBiblioteca:
         exito, msg = self.biblioteca.devolver_libro(id_libro)
         self.mostrar_mensaje(exito, msg)
 
+    def pedir_con_sugerencias(self, prompt, sugerir):
+        """
+        Como simpledialog.askstring, pero con una lista de sugerencias que se
+        actualiza en cada tecla (sugerir(prefijo) -> [(texto, préstamos)]).
+        Retorna el texto escrito o elegido, o None si se cancela.
+        """
+        ventana = tk.Toplevel(self.root)
+        ventana.title("Búsqueda")
+        ventana.transient(self.root)
+        tk.Label(ventana, text=prompt).pack(padx=10, pady=(10, 2), anchor="w")
+        entrada = tk.Entry(ventana, width=50)
+        entrada.pack(padx=10, fill="x")
+        lista = tk.Listbox(ventana, height=8)
+        lista.pack(padx=10, pady=5, fill="both", expand=True)
+        resultado = {"valor": None}
+        textos = []
+
+        def actualizar(_evento=None):
+            sugerencias = sugerir(entrada.get())
+            textos[:] = [texto for texto, _ in sugerencias]
+            lista.delete(0, tk.END)
+            for texto, prestamos in sugerencias:
+                lista.insert(tk.END, f"{texto}  ({prestamos} préstamos)")
+
+        def aceptar(_evento=None):
+            seleccion = lista.curselection()
+            valor = textos[seleccion[0]] if seleccion else entrada.get()
+            resultado["valor"] = valor.strip() or None
+            ventana.destroy()
+
+        entrada.bind("<KeyRelease>", actualizar)
+        entrada.bind("<Return>", aceptar)
+        entrada.bind("<Down>", lambda _e: (lista.focus_set(), lista.selection_set(0)) if textos else None)
+        lista.bind("<Double-Button-1>", aceptar)
+        lista.bind("<Return>", aceptar)
+        ventana.bind("<Escape>", lambda _e: ventana.destroy())
+        botones = tk.Frame(ventana)
+        botones.pack(pady=(0, 10))
+        tk.Button(botones, text="Buscar", width=12, command=aceptar).pack(side="left", padx=5)
+        tk.Button(botones, text="Cancelar", width=12, command=ventana.destroy).pack(side="left", padx=5)
+
+        actualizar()
+        entrada.focus_set()
+        ventana.grab_set()
+        self.root.wait_window(ventana)
+        return resultado["valor"]
+
     def buscar_libro(self):
         opcion = simpledialog.askstring("Búsqueda", "Buscar por (id/titulo/autor):")
         if not opcion:
@@ -461,51 +596,73 @@ class AppBiblioteca:
             else:
                 self.mostrar_mensaje(False, "No se encontró el libro con ese ID.")
         elif opcion == "titulo":
-            valor = simpledialog.askstring("Búsqueda", "Título o fragmento a buscar:")
+            valor = self.pedir_con_sugerencias("Título o fragmento a buscar:", self.biblioteca.sugerir_titulos)
             if not valor: return
             resultados = self.biblioteca.buscar_libros_por_titulo(valor)
+            titulo = f"Títulos que contienen '{valor}'"
+            if not resultados:
+                resultados = self.biblioteca.buscar_libros_por_titulo_aproximado(valor)
+                titulo = f"Sin coincidencias exactas: títulos parecidos a '{valor}'"
             if not resultados:
                 self.mostrar_mensaje(False, f"No se encontraron títulos que contengan '{valor}'.")
                 return
-            msg = "Resultados:\n"
-            for l in resultados:
-                msg += f"ID: {l.id} | Título: {l.titulo} | Autor: {l.autor} | Disponible: {l.disponible}\n"
-            self.mostrar_mensaje(True, msg)
+            self.mostrar_libros(titulo, resultados)
         elif opcion == "autor":
-            valor = simpledialog.askstring("Búsqueda", "Autor o fragmento a buscar:")
+            valor = self.pedir_con_sugerencias("Autor o fragmento a buscar:", self.biblioteca.sugerir_autores)
             if not valor: return
             resultados = self.biblioteca.buscar_libros_por_autor(valor)
+            titulo = f"Libros de autores que contienen '{valor}'"
+            if not resultados:
+                resultados = self.biblioteca.buscar_libros_por_autor_aproximado(valor)
+                titulo = f"Sin coincidencias exactas: autores parecidos a '{valor}'"
             if not resultados:
                 self.mostrar_mensaje(False, f"No se encontraron libros del autor que contenga '{valor}'.")
                 return
-            msg = "Resultados:\n"
-            for l in resultados:
-                msg += f"ID: {l.id} | Título: {l.titulo} | Autor: {l.autor} | Disponible: {l.disponible}\n"
-            self.mostrar_mensaje(True, msg)
+            self.mostrar_libros(titulo, resultados)
         else:
             self.mostrar_mensaje(False, "Opción de búsqueda inválida. Use 'id', 'titulo' o 'autor'.")
 
+    # ---------- Tablas de resultados ----------
+    COLUMNAS_LIBROS = [("ID", 70), ("Título", 260), ("Autor", 180), ("Género", 110), ("Año", 60), ("Estado", 90)]
+    ORDENES_LIBROS = {"ID": "id", "Título": "titulo", "Autor": "autor"}
+
+    @staticmethod
+    def fila_libro(l):
+        return (l.id, l.titulo, l.autor, l.genero, l.anio, "Disponible" if l.disponible else "Prestado")
+
+    def mostrar_libros(self, titulo, libros):
+        """Tabla paginada sobre una lista o un iterador de libros (p. ej. resultados de búsqueda)."""
+        VentanaResultados(self.root, titulo, self.COLUMNAS_LIBROS,
+                          paginar_iterador(map(self.fila_libro, libros)))
+
     def listar_libros(self):
-        libros = self.biblioteca.listar_todos_los_libros()
-        if not libros:
+        bib = self.biblioteca
+        if not len(bib.arbol_libros_por_id):
             self.mostrar_mensaje(False, "No hay libros registrados.")
             return
-        msg = "Libros (orden por ID):\n"
-        for l in libros:
-            msg += f"ID: {l.id} | Título: {l.titulo} | Autor: {l.autor} | Disponible: {l.disponible}\n"
-        self.mostrar_mensaje(True, msg)
+        fila = self.fila_libro
+
+        def pagina(orden, despues_de, n):
+            return [(cursor, fila(l)) for cursor, l in bib.pagina_libros(orden, despues_de, n)]
+
+        VentanaResultados(self.root, "Libros", self.COLUMNAS_LIBROS, pagina, ordenes=self.ORDENES_LIBROS,
+                          orden="id", total=len(bib.arbol_libros_por_id))
 
     def listar_usuarios(self):
-        usuarios = self.biblioteca.listar_todos_los_usuarios()
-        if not usuarios:
+        bib = self.biblioteca
+        if not len(bib.arbol_usuarios_por_id):
             self.mostrar_mensaje(False, "No hay usuarios registrados.")
             return
-        msg = "Usuarios (orden por ID):\n"
-        for u in usuarios:
-            msg += f"ID: {u.id} | Nombre: {u.nombre} | Correo: {u.correo} | Prestamos activos: {len(u.prestamos)}\n"
-        self.mostrar_mensaje(True, msg)
+
+        def pagina(orden, despues_de, n):
+            return [(cursor, (u.id, u.nombre, u.correo, u.cantidad_prestamos()))
+                    for cursor, u in bib.pagina_usuarios(despues_de, n)]
+
+        VentanaResultados(self.root, "Usuarios",
+                          [("ID", 70), ("Nombre", 200), ("Correo", 220), ("Préstamos activos", 120)],
+                          pagina, total=len(bib.arbol_usuarios_por_id))
 
 if __name__ == "__main__":
-    root = tk.Tk()
+    root = _cargar_tkinter().Tk()
     app = AppBiblioteca(root)
     root.mainloop()
@@ -1,126 +1,44 @@
 """
 biblioteca.py
 Versión actual: Sistema de gestión de biblioteca usando:
- - Árboles Binarios de Búsqueda (ABB)
+ - Árboles Binarios de Búsqueda auto-balanceados (AVL, ver estructuras.py)
  - Pila de préstamos
- - Cola de solicitudes
- - Grafo de interacciones usuario–libro
+ - Cola de solicitudes por libro
+ - Grafo de interacciones usuario–libro (ver grafo.py)
+ - Recomendaciones por co-préstamo (ver recomendaciones.py)
+ - Comunidades, vecindarios y rankings del grafo (ver analitica.py)
+ - Búsqueda por palabras con ranking BM25 en título, autor y género (ver indices.py)
+ - Consultas por género, rango de años y disponibilidad con índices secundarios (ver consultas.py)
+ - Interfaz Tkinter importada solo al lanzar AppBiblioteca (el núcleo no depende de Tk),
+   con listados y búsquedas en tablas paginadas (ver vistas.py)
 
 Autor: Deiger García
 """
 
-from collections import deque
-import tkinter as tk
-from tkinter import messagebox, simpledialog
-
-# ============================
-# ESTRUCTURA DE GRAFO
-# ============================
-
-class Grafo:
-    def __init__(self):
-        self.ady = {}   # nodo -> [nodos conectados]
-
-    def agregar_nodo(self, nodo):
-        nodo = str(nodo)
-        if nodo not in self.ady:
-            self.ady[nodo] = []
-
-    def agregar_arista(self, a, b):
-        a, b = str(a), str(b)
-        self.agregar_nodo(a)
-        self.agregar_nodo(b)
-
-        if b not in self.ady[a]:
-            self.ady[a].append(b)
-        if a not in self.ady[b]:
-            self.ady[b].append(a)
-
-    def vecinos(self, nodo):
-        nodo = str(nodo)
-        return self.ady.get(nodo, [])
-
-    def __repr__(self):
-        return f"Grafo({self.ady})"
-
-
-# ============================
-# ÁRBOL BINARIO (MAPA CLAVE -> VALOR)
-# ============================
-
-class NodoArbol:
-    def __init__(self, clave, valor):
-        self.clave = clave
-        self.valor = valor
-        self.izquierdo = None
-        self.derecho = None
-
-class ArbolMap:
-    def __init__(self):
-        self.raiz = None
-
-    def insertar(self, clave, valor, append_if_exists=False):
-        self.raiz = self._insertar_rec(self.raiz, clave, valor, append_if_exists)
-
-    def _insertar_rec(self, nodo, clave, valor, append_if_exists):
-        if nodo is None:
-            return NodoArbol(clave, valor)
-        if clave < nodo.clave:
-            nodo.izquierdo = self._insertar_rec(nodo.izquierdo, clave, valor, append_if_exists)
-        elif clave > nodo.clave:
-            nodo.derecho = self._insertar_rec(nodo.derecho, clave, valor, append_if_exists)
-        else:
-            if append_if_exists:
-                if isinstance(nodo.valor, list):
-                    if isinstance(valor, list):
-                        nodo.valor.extend(valor)
-                    else:
-                        nodo.valor.append(valor)
-                else:
-                    nodo.valor = valor
-            else:
-                nodo.valor = valor
-        return nodo
-
-    def buscar(self, clave):
-        return self._buscar_rec(self.raiz, clave)
-
-    def _buscar_rec(self, nodo, clave):
-        if nodo is None:
-            return None
-        if clave == nodo.clave:
-            return nodo.valor
-        elif clave < nodo.clave:
-            return self._buscar_rec(nodo.izquierdo, clave)
-        else:
-            return self._buscar_rec(nodo.derecho, clave)
-
-    def inorder(self):
-        resultados = []
-        self._inorder_rec(self.raiz, resultados)
-        return resultados
-
-    def _inorder_rec(self, nodo, resultados):
-        if not nodo:
-            return
-        self._inorder_rec(nodo.izquierdo, resultados)
-        resultados.append((nodo.clave, nodo.valor))
-        self._inorder_rec(nodo.derecho, resultados)
-
-    def valores(self):
-        return [v for _, v in self.inorder()]
+from contextlib import nullcontext
 
+from analitica import AnaliticaGrafo
+from consultas import IndicesSecundarios
+from estructuras import ArbolMap, ListasEspera, compartir
+from grafo import LIBRO, USUARIO, Grafo
+from indices import IndiceBM25
+import carga_masiva
+from recomendaciones import Recomendador
+from tareas import Antirrebote, EjecutorTareas
+from vistas import VentanaResultados, paginar_iterador
 
 # ============================
 # CLASES PRINCIPALES
 # ============================
 
 class Libro:
+    __slots__ = ("id", "titulo", "autor", "genero", "anio", "disponible")
+
     def __init__(self, id, titulo, autor, genero, anio):
         self.id = id
         self.titulo = titulo
-        self.autor = autor
-        self.genero = genero
+        self.autor = compartir(autor)
+        self.genero = compartir(genero)
         self.anio = anio
         self.disponible = True
 
@@ -142,11 +60,24 @@ class PilaPrestamos(list):
         return None
 
 class Usuario:
+    __slots__ = ("id", "nombre", "correo", "_prestamos")
+
     def __init__(self, id, nombre, correo):
         self.id = id
         self.nombre = nombre
         self.correo = correo
-        self.prestamos = PilaPrestamos()
+        self._prestamos = None
+
+    @property
+    def prestamos(self):
+        """Pila de préstamos; se crea con el primer acceso (la mayoría de usuarios no tiene ninguno)."""
+        if self._prestamos is None:
+            self._prestamos = PilaPrestamos()
+        return self._prestamos
+
+    def cantidad_prestamos(self):
+        """Préstamos activos sin materializar la pila vacía."""
+        return len(self._prestamos) if self._prestamos is not None else 0
 
     def __repr__(self):
         return f"<Usuario id={self.id} nombre='{self.nombre}'>"
@@ -157,6 +88,10 @@ class Usuario:
 # ============================
 
 class Biblioteca:
+    # El grafo, las recomendaciones y la analítica son compartidos por todos los
+    # préstamos; BibliotecaConcurrente (concurrencia.py) pone aquí un Lock.
+    exclusion_interacciones = nullcontext()
+
     def __init__(self):
         # Árboles
         self.arbol_usuarios_por_id = ArbolMap()
@@ -165,11 +100,22 @@ class Biblioteca:
         self.arbol_libros_por_titulo = ArbolMap()
         self.arbol_libros_por_autor = ArbolMap()
 
-        # Cola solicitudes
-        self.solicitudes = deque()
+        # Búsqueda por relevancia
+        self.indice_texto = IndiceBM25()
+
+        # Índices secundarios: género, año y disponibilidad
+        self.indices_libros = IndicesSecundarios()
+
+        # Préstamos activos: id_libro -> Usuario
+        self.prestamos_activos = {}
+
+        # Colas de solicitudes (una por libro)
+        self.solicitudes = ListasEspera()
 
         # Grafo de interacciones
         self.grafo_interacciones = Grafo()
+        self.recomendador = Recomendador(self.grafo_interacciones)
+        self.analitica = AnaliticaGrafo(self.grafo_interacciones)
 
     # ---------- REGISTRO ----------
     def registrar_usuario(self, id, nombre, correo):
@@ -180,7 +126,7 @@ class Biblioteca:
         self.arbol_usuarios_por_id.insertar(id, nuevo)
 
         # grafo
-        self.grafo_interacciones.agregar_nodo(id)
+        self.grafo_interacciones.agregar_nodo((USUARIO, id))
 
         return True, f"Usuario '{nombre}' registrado."
 
@@ -206,36 +152,113 @@ class Biblioteca:
         else:
             self.arbol_libros_por_autor.insertar(autor_key, nuevo, append_if_exists=True)
 
+        self._indexar_texto(nuevo)
+        self.indices_libros.agregar(nuevo)
+
         # grafo
-        self.grafo_interacciones.agregar_nodo(id)
+        self.grafo_interacciones.agregar_nodo((LIBRO, id))
 
         return True, f"Libro '{titulo}' registrado."
 
+    # ---------- REGISTRO EN BLOQUE ----------
+    def registrar_usuarios_lote(self, registros):
+        """Registra tuplas (id, nombre, correo) de una vez. Retorna (aceptados, rechazados)."""
+        nuevos, rechazados, vistos = [], [], set()
+        for registro in registros:
+            id = registro[0]
+            if id in vistos or id in self.arbol_usuarios_por_id:
+                rechazados.append((registro, f"El ID de usuario {id} ya existe."))
+                continue
+            vistos.add(id)
+            nuevos.append(Usuario(*registro))
+            self.grafo_interacciones.agregar_nodo((USUARIO, id))
+        nuevos.sort(key=lambda u: u.id)
+        self.arbol_usuarios_por_id.cargar_ordenados((u.id, u) for u in nuevos)
+        return len(nuevos), rechazados
+
+    def registrar_libros_lote(self, registros):
+        """
+        Registra tuplas (id, titulo, autor, genero, anio) de una vez: los índices
+        se fusionan en bloque (cargar_ordenados) en vez de insertar libro por libro.
+        Retorna (aceptados, rechazados) con rechazados = [(registro, motivo)].
+        """
+        nuevos, rechazados, vistos = [], [], set()
+        por_titulo, por_autor = {}, {}
+        for registro in registros:
+            id = registro[0]
+            if id in vistos or id in self.arbol_libros_por_id:
+                rechazados.append((registro, f"El ID {id} ya pertenece a otro libro."))
+                continue
+            vistos.add(id)
+            nuevo = Libro(*registro)
+            nuevos.append(nuevo)
+            por_titulo.setdefault(nuevo.titulo.strip().lower(), []).append(nuevo)
+            por_autor.setdefault(nuevo.autor.strip().lower(), []).append(nuevo)
+            self._indexar_texto(nuevo)
+            self.indices_libros.agregar(nuevo)
+            self.grafo_interacciones.agregar_nodo((LIBRO, id))
+
+        nuevos.sort(key=lambda l: l.id)
+        self.arbol_libros_por_id.cargar_ordenados((l.id, l) for l in nuevos)
+        self.arbol_libros_por_titulo.cargar_ordenados(sorted(por_titulo.items()), append_if_exists=True)
+        self.arbol_libros_por_autor.cargar_ordenados(sorted(por_autor.items()), append_if_exists=True)
+        return len(nuevos), rechazados
+
+    def _indexar_texto(self, libro):
+        self.indice_texto.agregar(libro.id, {"titulo": libro.titulo, "autor": libro.autor,
+                                             "genero": libro.genero})
+
     # ---------- PRÉSTAMO ----------
     def prestar_libro(self, id_usuario, id_libro):
-        usuario = self.arbol_usuarios_por_id.buscar(id_usuario)
+        return self._prestar(self.arbol_usuarios_por_id.buscar(id_usuario),
+                             self.arbol_libros_por_id.buscar(id_libro), id_usuario, id_libro)
+
+    def _prestar(self, usuario, libro, id_usuario, id_libro):
         if not usuario:
             return False, "Usuario no encontrado."
 
-        libro = self.arbol_libros_por_id.buscar(id_libro)
         if not libro:
             return False, "Libro no encontrado."
 
         if not libro.disponible:
-            self.solicitudes.append((id_usuario, id_libro))
+            if not self.solicitudes.encolar(id_usuario, id_libro):
+                return False, "Libro no disponible. Ya tiene una solicitud en espera."
             return False, f"Libro no disponible. Solicitud agregada."
 
         libro.disponible = False
         usuario.prestamos.push(id_libro)
+        self.prestamos_activos[id_libro] = usuario
+        self._actualizar_disponible(libro)
 
         # grafo: conectar usuario <-> libro
-        self.grafo_interacciones.agregar_arista(id_usuario, id_libro)
+        self._registrar_interaccion(id_usuario, id_libro)
 
         return True, f"Libro '{libro.titulo}' prestado a {usuario.nombre}."
 
+    def _registrar_interaccion(self, id_usuario, id_libro):
+        """Arista usuario–libro en el grafo; la primera vez también alimenta recomendaciones y analítica."""
+        usuario, libro = (USUARIO, id_usuario), (LIBRO, id_libro)
+        with self.exclusion_interacciones:
+            if self.grafo_interacciones.agregar_arista(usuario, libro) == 1:
+                self.recomendador.nueva_interaccion(id_usuario, id_libro)
+                self.analitica.nueva_arista(usuario, libro)
+
+    def _actualizar_disponible(self, libro):
+        # los bits de varios libros comparten byte: dos préstamos en paralelo no deben pisarse
+        with self.exclusion_interacciones:
+            self.indices_libros.actualizar_disponible(libro)
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado.pop("exclusion_interacciones", None)  # un Lock no se puede guardar
+        return estado
+
     # ---------- DEVOLUCIÓN ----------
     def devolver_libro(self, id_libro):
-        libro = self.arbol_libros_por_id.buscar(id_libro)
+        return self._devolver(self.arbol_libros_por_id.buscar(id_libro), id_libro,
+                              self.arbol_usuarios_por_id.buscar)
+
+    def _devolver(self, libro, id_libro, buscar_usuario):
         if not libro:
             return False, "Libro no encontrado."
 
@@ -243,18 +266,7 @@ class Biblioteca:
             return False, "El libro ya está disponible."
 
         # identificar quién lo tiene
-        usuario_encontrado = None
-        for u in self.arbol_usuarios_por_id.valores():
-            if u.prestamos.peek_last() == id_libro:
-                usuario_encontrado = u
-                break
-
-        if not usuario_encontrado:
-            for u in self.arbol_usuarios_por_id.valores():
-                if id_libro in u.prestamos:
-                    usuario_encontrado = u
-                    break
-
+        usuario_encontrado = self.prestamos_activos.pop(id_libro, None)
         if not usuario_encontrado:
             return False, "No se encontró préstamo activo."
 
@@ -268,30 +280,50 @@ class Biblioteca:
                     usuario_encontrado.prestamos.pop(i)
                     break
 
-        # cola de solicitudes
-        nueva = deque()
+        # cola de solicitudes del libro
         asignado = False
-        while self.solicitudes:
-            usr, lib = self.solicitudes.popleft()
-            if not asignado and lib == id_libro:
-                solicitante = self.arbol_usuarios_por_id.buscar(usr)
-                if solicitante:
-                    libro.disponible = False
-                    solicitante.prestamos.push(id_libro)
-
-                    # grafo
-                    self.grafo_interacciones.agregar_arista(usr, id_libro)
-
-                    asignado = True
-                    continue
-            nueva.append((usr, lib))
-        self.solicitudes = nueva
+        while not asignado:
+            usr = self.solicitudes.siguiente(id_libro)
+            if usr is None:
+                break
+            solicitante = buscar_usuario(usr)
+            if solicitante:
+                libro.disponible = False
+                solicitante.prestamos.push(id_libro)
+                self.prestamos_activos[id_libro] = solicitante
+
+                # grafo
+                self._registrar_interaccion(usr, id_libro)
+
+                asignado = True
+
+        self._actualizar_disponible(libro)
 
         if asignado:
             return True, f"Libro devuelto y asignado al usuario en espera."
 
         return True, f"Libro devuelto correctamente."
 
+    # ---------- PRÉSTAMO / DEVOLUCIÓN EN LOTE ----------
+    def prestar_lote(self, transacciones):
+        """
+        Aplica préstamos (id_usuario, id_libro) en orden. Retorna la lista de
+        resultados (bool, msg), idéntica a llamar prestar_libro uno por uno,
+        pero cada usuario y libro se busca en los árboles una sola vez.
+        """
+        transacciones = list(transacciones)
+        usuario = self.arbol_usuarios_por_id.buscador(t[0] for t in transacciones)
+        libro = self.arbol_libros_por_id.buscador(t[1] for t in transacciones)
+        return [self._prestar(usuario(id_usuario), libro(id_libro), id_usuario, id_libro)
+                for id_usuario, id_libro in transacciones]
+
+    def devolver_lote(self, ids_libros):
+        """Devuelve los libros en orden (con reasignación a la cola de espera); como devolver_libro repetido."""
+        ids_libros = list(ids_libros)
+        libro = self.arbol_libros_por_id.buscador(ids_libros)
+        usuario = self.arbol_usuarios_por_id.buscador()
+        return [self._devolver(libro(id_libro), id_libro, usuario) for id_libro in ids_libros]
+
     # ---------- CONSULTAS ----------
     def buscar_usuario_por_id(self, id):
         return self.arbol_usuarios_por_id.buscar(id)
@@ -299,27 +331,209 @@ class Biblioteca:
     def buscar_libro_por_id(self, id):
         return self.arbol_libros_por_id.buscar(id)
 
-    def listar_todos_los_libros(self):
-        return [v for _, v in self.arbol_libros_por_id.inorder()]
-
-    def listar_todos_los_usuarios(self):
-        return [v for _, v in self.arbol_usuarios_por_id.inorder()]
+    def posicion_en_espera(self, id_usuario, id_libro):
+        return self.solicitudes.posicion(id_usuario, id_libro)
+
+    def cancelar_solicitud(self, id_usuario, id_libro):
+        if not self.solicitudes.cancelar(id_usuario, id_libro):
+            return False, "No existe una solicitud en espera para ese usuario y libro."
+        return True, "Solicitud cancelada."
+
+    def solicitudes_en_espera(self, id_libro):
+        return self.solicitudes.longitud(id_libro)
+
+    def listar_todos_los_libros(self, desde=None, hasta=None, limite=None):
+        return list(self.iterar_libros(desde, hasta, limite))
+
+    def listar_todos_los_usuarios(self, desde=None, hasta=None, limite=None):
+        return list(self.iterar_usuarios(desde, hasta, limite))
+
+    def iterar_libros(self, desde=None, hasta=None, limite=None):
+        return self.arbol_libros_por_id.iterar_valores(desde, hasta, limite)
+
+    def iterar_usuarios(self, desde=None, hasta=None, limite=None):
+        return self.arbol_usuarios_por_id.iterar_valores(desde, hasta, limite)
+
+    def iterar_libros_por_prefijo_titulo(self, prefijo, limite=None):
+        return self._iterar_por_prefijo(self.arbol_libros_por_titulo, prefijo, limite)
+
+    def iterar_libros_por_prefijo_autor(self, prefijo, limite=None):
+        return self._iterar_por_prefijo(self.arbol_libros_por_autor, prefijo, limite)
+
+    def _iterar_por_prefijo(self, arbol, prefijo, limite):
+        producidos = 0
+        for _, lista in arbol.iterar_prefijo(prefijo.strip().lower()):
+            for libro in lista:
+                if limite is not None and producidos >= limite:
+                    return
+                yield libro
+                producidos += 1
+
+    def pagina_libros(self, orden="id", despues_de=None, n=50):
+        """
+        Hasta n pares (cursor, Libro) en el orden de un índice ('id', 'titulo' o
+        'autor'), estrictamente después de 'despues_de' (el cursor de la última
+        fila de la página anterior; None = desde el principio).
+        """
+        arbol = {"id": self.arbol_libros_por_id, "titulo": self.arbol_libros_por_titulo,
+                 "autor": self.arbol_libros_por_autor}[orden]
+        return _pagina(arbol, despues_de, n, listas=orden != "id")
+
+    def pagina_usuarios(self, despues_de=None, n=50):
+        """Como pagina_libros, para los usuarios en orden de id."""
+        return _pagina(self.arbol_usuarios_por_id, despues_de, n, listas=False)
+
+    def buscar_libros(self, consulta, pagina=1, por_pagina=20):
+        """
+        [(Libro, puntaje)] de la página pedida (desde 1), del más relevante al
+        menos. Busca palabras sin importar tildes ni mayúsculas en título,
+        autor y género; basta con que el libro tenga una de ellas.
+        """
+        if pagina < 1 or por_pagina < 1:
+            return []
+        inicio = (pagina - 1) * por_pagina
+        pares = self.indice_texto.buscar(consulta, inicio + por_pagina)[inicio:]
+        return self._con_libros(pares)
+
+    def consultar_libros(self, genero=None, anio_desde=None, anio_hasta=None, disponible=None, limite=None):
+        """
+        Libros que cumplen todas las condiciones dadas (las que quedan en None
+        no filtran), en orden de registro. Ej.: novelas disponibles de 1990 a 2000:
+        consultar_libros(genero="novela", anio_desde=1990, anio_hasta=2000, disponible=True)
+        """
+        # el bitmap de disponibilidad cambia con cada préstamo (ver _actualizar_disponible)
+        with self.exclusion_interacciones:
+            return self.indices_libros.consultar(genero, anio_desde, anio_hasta, disponible, limite)
+
+    def planificar_consulta(self, genero=None, anio_desde=None, anio_hasta=None, disponible=None):
+        """(estrategia, [(condición, libros estimados)]) que usaría consultar_libros."""
+        with self.exclusion_interacciones:
+            return self.indices_libros.planificar(genero, anio_desde, anio_hasta, disponible)
 
     # ---------- GRAFO ----------
-    def conexiones_de(self, nodo):
-        return self.grafo_interacciones.vecinos(nodo)
+    # Los préstamos agregan aristas bajo exclusion_interacciones: las lecturas
+    # del grafo y de la analítica también la toman (recorrer un diccionario de
+    # adyacencia mientras crece falla, y el ranking y el union-find se
+    # reorganizan al consultarlos).
+    def conexiones_de(self, id, tipo=None):
+        """
+        Vecinos como tuplas (tipo, id). 'tipo' es USUARIO o LIBRO; si se omite
+        se consultan ambos nodos con ese id (el usuario y el libro).
+        """
+        tipos = (tipo,) if tipo is not None else (USUARIO, LIBRO)
+        conexiones = []
+        with self.exclusion_interacciones:
+            for t in tipos:
+                conexiones.extend(self.grafo_interacciones.vecinos((t, id)))
+        return conexiones
+
+    def usuarios_cercanos(self, id_libro, saltos=3, limite=None):
+        """[(id_usuario, saltos)] a lo sumo a 'saltos' del libro (1 = lo pidieron, 3 = pidieron algo en común...)."""
+        with self.exclusion_interacciones:
+            cercanos = self.analitica.bfs_acotado((LIBRO, id_libro), saltos, USUARIO, limite)
+        return [(id, d) for (_, id), d in cercanos]
+
+    def mas_conectados(self, tipo=LIBRO, k=10):
+        """[(id, grado)]: libros (o usuarios) con más interacciones distintas."""
+        with self.exclusion_interacciones:
+            top = self.analitica.mas_conectados(tipo, k)
+        return [(id, grado) for (_, id), grado in top]
+
+    def tamanio_comunidad(self, id, tipo=USUARIO):
+        """Nodos en la misma componente conexa (comunidad de lectura) que (tipo, id)."""
+        with self.exclusion_interacciones:
+            return self.analitica.tamanio_componente((tipo, id))
+
+    def num_comunidades(self):
+        with self.exclusion_interacciones:
+            return self.analitica.num_componentes()
+
+    # ---------- RECOMENDACIONES ----------
+    def _con_libros(self, pares):
+        resultado = []
+        for id_libro, puntaje in pares:
+            libro = self.arbol_libros_por_id.buscar(id_libro)
+            if libro is not None:
+                resultado.append((libro, puntaje))
+        return resultado
+
+    # Consultar también escribe (la caché top-k del recomendador) y recorre
+    # contadores que los préstamos modifican: va bajo la misma exclusión.
+    def libros_similares(self, id_libro, k=10):
+        """[(Libro, co-préstamos)]: lo que más pidieron quienes pidieron este libro."""
+        with self.exclusion_interacciones:
+            pares = self.recomendador.similares(id_libro, k)
+        return self._con_libros(pares)
+
+    def recomendar_para_usuario(self, id_usuario, k=10):
+        """[(Libro, puntaje)] a partir de todos los libros que pidió el usuario."""
+        with self.exclusion_interacciones:
+            pares = self.recomendador.para_usuario(id_usuario, k)
+        return self._con_libros(pares)
+
+
+def _pagina(arbol, despues_de, n, listas):
+    """
+    Paginación por clave sobre un ArbolMap: el cursor es (clave, posición en la
+    lista de esa clave). Se retoma con iterar(desde=clave), sin recorrer lo ya
+    mostrado y sin depender de un generador abierto entre páginas.
+    """
+    resultado = []
+    if n <= 0:
+        return resultado
+    desde = None if despues_de is None else despues_de[0]
+    for clave, valor in arbol.iterar(desde):
+        for i, elemento in enumerate(valor if listas else (valor,)):
+            if despues_de is not None and (clave, i) <= despues_de:
+                continue
+            resultado.append(((clave, i), elemento))
+            if len(resultado) >= n:
+                return resultado
+    return resultado
 
 
 # ============================
 # INTERFAZ GRÁFICA
 # ============================
 
+# tkinter se importa solo al lanzar la interfaz: el núcleo (Biblioteca, Libro,
+# Usuario, estructuras) se puede importar en procesos sin Tk.
+tk = messagebox = simpledialog = filedialog = None
+
+def _cargar_tkinter():
+    global tk, messagebox, simpledialog, filedialog
+    if tk is None:
+        import tkinter
+        from tkinter import filedialog as _filedialog, messagebox as _messagebox, simpledialog as _simpledialog
+        tk, messagebox, simpledialog, filedialog = tkinter, _messagebox, _simpledialog, _filedialog
+    return tk
+
 class AppBiblioteca:
-    def __init__(self, root):
+    """
+    Las operaciones sobre la biblioteca no corren en el hilo de Tk: se envían
+    a un EjecutorTareas y su resultado vuelve a la ventana por root.after, así
+    una búsqueda o una importación larga no congelan la interfaz.
+    """
+    def __init__(self, root, biblioteca=None):
+        _cargar_tkinter()
         self.root = root
         self.root.title("Sistema de Biblioteca (Árboles + Grafo)")
-        self.biblioteca = Biblioteca()
+        # cualquier motor con la misma API (p. ej. biblioteca_sqlite.Biblioteca)
+        biblioteca = biblioteca if biblioteca is not None else Biblioteca()
+        self.motor = biblioteca     # sin envoltorio: solo para leer tamaños
+        if isinstance(biblioteca, Biblioteca):
+            # varias tareas a la vez: el motor de árboles se usa con sus locks
+            from concurrencia import BibliotecaConcurrente  # concurrencia importa este módulo
+            self.biblioteca = BibliotecaConcurrente(biblioteca)
+            hilos = 4
+        else:
+            # otro motor: sin garantías entre hilos, sus tareas van de a una
+            self.biblioteca = biblioteca
+            hilos = 1
+        self.ejecutor = EjecutorTareas(root, hilos=hilos, al_cambiar=self.actualizar_estado,
+                                       al_fallar=lambda e: self.mostrar(False, f"Error: {e}"))
         self.crear_interfaz()
+        self.root.protocol("WM_DELETE_WINDOW", self.salir)
 
     def crear_interfaz(self):
         tk.Button(self.root, text="Registrar Libro", width=30, command=self.registrar_libro).pack(pady=5)
@@ -328,8 +542,56 @@ class AppBiblioteca:
         tk.Button(self.root, text="Devolver Libro", width=30, command=self.devolver_libro).pack(pady=5)
         tk.Button(self.root, text="Listar Libros", width=30, command=self.listar_libros).pack(pady=5)
         tk.Button(self.root, text="Listar Usuarios", width=30, command=self.listar_usuarios).pack(pady=5)
+        # los motores sin búsqueda ni filtros (ver puede_buscar) no muestran esos controles
+        bib = self.biblioteca
+        puede_buscar = hasattr(bib, "buscar_libros") or hasattr(bib, "buscar_libros_por_titulo")
+        if puede_buscar:
+            tk.Button(self.root, text="Buscar Libros", width=30, command=self.buscar_libros).pack(pady=5)
+        if hasattr(bib, "consultar_libros"):
+            tk.Button(self.root, text="Filtrar Libros", width=30, command=self.filtrar_libros).pack(pady=5)
         tk.Button(self.root, text="Ver Conexiones (Grafo)", width=30, command=self.ver_conexiones).pack(pady=5)
-        tk.Button(self.root, text="Salir", width=30, command=self.root.quit).pack(pady=5)
+        tk.Button(self.root, text="Importar Catálogo", width=30, command=self.importar_catalogo).pack(pady=5)
+
+        # búsqueda mientras se escribe: solo se consulta tras una pausa y solo
+        # se muestra el resultado de lo último escrito
+        self.busqueda = Antirrebote(self.ejecutor, self.buscar_en_motor, self.mostrar_sugerencias)
+        if puede_buscar:
+            tk.Label(self.root, text="Búsqueda rápida:").pack()
+            self.texto_busqueda = tk.Entry(self.root, width=40)
+            self.texto_busqueda.pack()
+            self.sugerencias = tk.Listbox(self.root, width=60, height=6)
+            self.sugerencias.pack(pady=(0, 5))
+            self.texto_busqueda.bind("<KeyRelease>", self.busqueda_rapida)
+
+        tk.Button(self.root, text="Salir", width=30, command=self.salir).pack(pady=5)
+        barra = tk.Frame(self.root)
+        barra.pack(fill="x", side="bottom", padx=5, pady=5)
+        self.estado = tk.Label(barra, text="Listo", anchor="w")
+        self.estado.pack(side="left", fill="x", expand=True)
+        self.boton_cancelar = tk.Button(barra, text="Cancelar", state="disabled",
+                                        command=self.ejecutor.cancelar_todas)
+        self.boton_cancelar.pack(side="right")
+
+    # ---------- ejecución en segundo plano ----------
+    def ejecutar(self, descripcion, funcion, *args, al_terminar=None, **opciones):
+        """Envía funcion(*args) al ejecutor; por defecto muestra su (éxito, mensaje)."""
+        if al_terminar is None:
+            al_terminar = lambda r: self.mostrar(*r)
+        return self.ejecutor.enviar(funcion, *args, al_terminar=al_terminar,
+                                    descripcion=descripcion, **opciones)
+
+    def actualizar_estado(self, tareas):
+        if tareas:
+            self.estado.config(text="Trabajando: " + ", ".join(t.descripcion for t in tareas))
+            self.boton_cancelar.config(state="normal")
+        else:
+            self.estado.config(text="Listo")
+            self.boton_cancelar.config(state="disabled")
+
+    def salir(self):
+        self.busqueda.cancelar()
+        self.ejecutor.cerrar()
+        self.root.quit()
 
     def mostrar(self, exito, msg):
         if exito:
@@ -360,8 +622,7 @@ class AppBiblioteca:
         y = self.input("Año:")
         if y is None: return
 
-        ex, msg = self.biblioteca.registrar_libro(id, t, a, g, y)
-        self.mostrar(ex, msg)
+        self.ejecutar("registrar libro", self.biblioteca.registrar_libro, id, t, a, g, y)
 
     def registrar_usuario(self):
         id = self.input("ID del usuario:", es_id=True)
@@ -371,8 +632,7 @@ class AppBiblioteca:
         c = self.input("Correo:")
         if c is None: return
 
-        ex, msg = self.biblioteca.registrar_usuario(id, n, c)
-        self.mostrar(ex, msg)
+        self.ejecutar("registrar usuario", self.biblioteca.registrar_usuario, id, n, c)
 
     def prestar_libro(self):
         u = self.input("ID Usuario:", es_id=True)
@@ -380,45 +640,172 @@ class AppBiblioteca:
         l = self.input("ID Libro:", es_id=True)
         if l is None: return
 
-        ex, msg = self.biblioteca.prestar_libro(u, l)
-        self.mostrar(ex, msg)
+        self.ejecutar("préstamo", self.biblioteca.prestar_libro, u, l)
 
     def devolver_libro(self):
         l = self.input("ID Libro:", es_id=True)
         if l is None: return
 
-        ex, msg = self.biblioteca.devolver_libro(l)
-        self.mostrar(ex, msg)
+        self.ejecutar("devolución", self.biblioteca.devolver_libro, l)
+
+    COLUMNAS_LIBROS = [("ID", 70), ("Título", 260), ("Autor", 180), ("Género", 110), ("Año", 60), ("Estado", 90)]
+
+    @staticmethod
+    def fila_libro(l):
+        return (l.id, l.titulo, l.autor, l.genero, l.anio, "Disponible" if l.disponible else "Prestado")
 
     def listar_libros(self):
-        libros = self.biblioteca.listar_todos_los_libros()
-        if not libros:
+        bib = self.biblioteca
+        arbol = getattr(self.motor, "arbol_libros_por_id", None)
+        if arbol is not None and not len(arbol):
             self.mostrar(False, "No hay libros.")
             return
-        msg = "\n".join([f"{l.id} | {l.titulo} | {l.autor} | {'Disponible' if l.disponible else 'Prestado'}"
-                         for l in libros])
-        self.mostrar(True, msg)
+        fila = self.fila_libro
+        if not hasattr(bib, "pagina_libros"):
+            # motores sin paginación por clave: se recorre iterar_libros de a poco
+            VentanaResultados(self.root, "Libros", self.COLUMNAS_LIBROS,
+                              paginar_iterador(map(fila, bib.iterar_libros())), ejecutor=self.ejecutor)
+            return
+
+        def pagina(orden, despues_de, n):
+            return [(cursor, fila(l)) for cursor, l in bib.pagina_libros(orden, despues_de, n)]
+
+        VentanaResultados(self.root, "Libros", self.COLUMNAS_LIBROS, pagina,
+                          ordenes={"ID": "id", "Título": "titulo", "Autor": "autor"},
+                          orden="id", total=len(arbol), ejecutor=self.ejecutor)
 
     def listar_usuarios(self):
-        usuarios = self.biblioteca.listar_todos_los_usuarios()
-        if not usuarios:
+        bib = self.biblioteca
+        arbol = getattr(self.motor, "arbol_usuarios_por_id", None)
+        if arbol is not None and not len(arbol):
             self.mostrar(False, "No hay usuarios.")
             return
-        msg = "\n".join([f"{u.id} | {u.nombre} | Prestamos: {len(u.prestamos)}" for u in usuarios])
-        self.mostrar(True, msg)
+        columnas = [("ID", 70), ("Nombre", 220), ("Préstamos", 90)]
+        fila = lambda u: (u.id, u.nombre, u.cantidad_prestamos())
+        if not hasattr(bib, "pagina_usuarios"):
+            VentanaResultados(self.root, "Usuarios", columnas,
+                              paginar_iterador(map(fila, bib.iterar_usuarios())), ejecutor=self.ejecutor)
+            return
+
+        def pagina(orden, despues_de, n):
+            return [(cursor, fila(u)) for cursor, u in bib.pagina_usuarios(despues_de, n)]
+
+        VentanaResultados(self.root, "Usuarios", columnas, pagina, total=len(arbol), ejecutor=self.ejecutor)
+
+    def buscar_en_motor(self, consulta, pagina=1, por_pagina=20):
+        """
+        [(Libro, puntaje)] con la búsqueda rankeada del motor; en motores que solo
+        buscan por fragmento de título, sus resultados con puntaje None.
+        """
+        bib = self.biblioteca
+        if hasattr(bib, "buscar_libros"):
+            return bib.buscar_libros(consulta, pagina, por_pagina)
+        inicio = (pagina - 1) * por_pagina
+        return [(l, None) for l in bib.buscar_libros_por_titulo(consulta)[inicio:inicio + por_pagina]]
+
+    @staticmethod
+    def texto_puntaje(puntaje):
+        return "—" if puntaje is None else f"{puntaje:.2f}"
+
+    def buscar_libros(self):
+        q = self.input("Palabras a buscar (título, autor o género):")
+        if not q: return
+
+        def resultados(primera):
+            # Más allá de lo ya pedido se pide el top del ranking al doble de largo
+            # (no la página N, que vuelve a rankear las N anteriores cada vez); el
+            # orden es estable, así que el top más largo extiende al anterior.
+            tope, actual, entregados = 100, primera, 0
+            while True:
+                for l, p in actual[entregados:]:
+                    yield (self.texto_puntaje(p),) + self.fila_libro(l)
+                entregados = len(actual)
+                if len(actual) < tope:
+                    return
+                tope *= 2
+                actual = self.buscar_en_motor(q, 1, tope)
+
+        def mostrar(primera):
+            if not primera:
+                self.mostrar(False, f"Sin resultados para '{q}'.")
+                return
+            VentanaResultados(self.root, f"Resultados para '{q}'", [("Relevancia", 80)] + self.COLUMNAS_LIBROS,
+                              paginar_iterador(resultados(primera)), ejecutor=self.ejecutor)
+
+        self.ejecutar(f"buscar '{q}'", self.buscar_en_motor, q, 1, 100, al_terminar=mostrar)
+
+    def busqueda_rapida(self, evento=None):
+        q = self.texto_busqueda.get().strip()
+        if q:
+            self.busqueda.pedir(q, 1, 10)
+        else:
+            self.busqueda.cancelar()
+            self.sugerencias.delete(0, "end")
+
+    def mostrar_sugerencias(self, resultados):
+        self.sugerencias.delete(0, "end")
+        for l, p in resultados:
+            self.sugerencias.insert("end", f"{l.id} · {l.titulo} — {l.autor} ({self.texto_puntaje(p)})")
+
+    def filtrar_libros(self):
+        g = self.input("Género (vacío = cualquiera):")
+        if g is None: return
+        desde = self.input("Desde el año (vacío = sin límite):")
+        if desde is None: return
+        hasta = self.input("Hasta el año (vacío = sin límite):")
+        if hasta is None: return
+        try:
+            desde = int(desde) if desde else None
+            hasta = int(hasta) if hasta else None
+        except ValueError:
+            self.mostrar(False, "Los años deben ser números.")
+            return
+        solo_disponibles = messagebox.askyesno("Filtrar", "¿Solo libros disponibles?")
+
+        def mostrar(libros):
+            if not libros:
+                self.mostrar(False, "Ningún libro cumple el filtro.")
+                return
+            VentanaResultados(self.root, f"Filtro: {len(libros)} libros", self.COLUMNAS_LIBROS,
+                              paginar_iterador(map(self.fila_libro, libros)), total=len(libros))
+
+        self.ejecutar("filtrar libros", self.biblioteca.consultar_libros, g or None, desde, hasta,
+                      True if solo_disponibles else None, al_terminar=mostrar)
 
     def ver_conexiones(self):
         n = self.input("ID de usuario o libro:", es_id=True)
         if n is None: return
-        con = self.biblioteca.conexiones_de(n)
-        if not con:
-            self.mostrar(True, f"No hay conexiones para {n}.")
-        else:
-            msg = f"Conexiones de {n}:\n" + ", ".join(con)
-            self.mostrar(True, msg)
+
+        def mostrar(con):
+            if not con:
+                self.mostrar(True, f"No hay conexiones para {n}.")
+            else:
+                msg = f"Conexiones de {n}:\n" + ", ".join(f"{tipo} {id}" for tipo, id in con)
+                self.mostrar(True, msg)
+
+        self.ejecutar("conexiones", self.biblioteca.conexiones_de, n, al_terminar=mostrar)
+
+    def importar_catalogo(self):
+        ruta = filedialog.askopenfilename(title="Catálogo de libros",
+                                          filetypes=[("CSV o JSONL", "*.csv *.jsonl"), ("Todos", "*.*")])
+        if not ruta: return
+
+        def importar(tarea):
+            # el progreso también es el punto donde una cancelación corta la carga
+            return carga_masiva.importar(self.biblioteca, ruta, "libros", cada=10_000,
+                                         progreso=lambda r: tarea.progreso(r.leidas))
+
+        def avance(leidas, total):
+            self.estado.config(text=f"Importando catálogo: {leidas} filas leídas…")
+
+        def mostrar(r):
+            self.mostrar(True, f"{r.aceptadas} libros importados, {len(r.rechazadas)} filas rechazadas "
+                               f"({r.segundos:.1f} s).")
+
+        self.ejecutar("importar catálogo", importar, al_terminar=mostrar, al_progresar=avance, con_tarea=True)
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
+    root = _cargar_tkinter().Tk()
     AppBiblioteca(root)
     root.mainloop()
@@ -0,0 +1,527 @@
+"""
+biblioteca_sqlite.py
+Motor de almacenamiento SQLite para Biblioteca.
+
+Misma API pública que biblioteca3.Biblioteca (registrar_libro, prestar_libro,
+devolver_libro, buscar_libros_por_titulo, listar_todos_los_libros, ...), pero los
+datos viven en un archivo SQLite en lugar de en memoria:
+ - libros / usuarios con clave primaria por id e índices por título y autor
+   (claves normalizadas con strip().lower(), igual que los árboles).
+ - Filtros de consultar_libros: género plegado (sin tildes ni mayúsculas) y año
+   como entero en columnas propias, con índices por género, año y libros
+   prestados; el planificador de SQLite elige cuál usar (cerrar() corre
+   PRAGMA optimize para que tenga estadísticas).
+ - prestamos: préstamos activos (único por libro, índice por usuario) -> devolución indexada.
+ - solicitudes: cola de espera por libro (índice (id_libro, seq), sin duplicados).
+ - interacciones: aristas usuario–libro (equivalente a grafo_interacciones).
+ - libros_fts: tabla FTS5 con tokenizador de trigramas para búsquedas por
+   fragmento (si la versión de SQLite no la soporta, se usa LIKE).
+ - libros_texto: tabla FTS5 sin contenido (solo el índice) con las palabras
+   plegadas de título, autor y género, para buscar_libros rankeado con bm25()
+   y los mismos pesos por campo que biblioteca3. Sin FTS5 se usa el IndiceBM25
+   en memoria de indices.py.
+
+Las sentencias son constantes del módulo: el módulo sqlite3 las compila una
+vez y las reutiliza (caché de sentencias preparadas). Cada operación corre en
+una transacción; transaccion() permite agrupar muchas en una sola, y las
+cargas en lote usan una única transacción.
+
+Uso:
+    bib = Biblioteca("biblioteca.db")
+    python biblioteca_sqlite.py biblioteca.db     # interfaz Tkinter sobre SQLite
+"""
+
+import sqlite3
+import sys
+from contextlib import contextmanager
+
+from biblioteca3 import Libro, Usuario
+from consultas import anio_como_entero
+from grafo import LIBRO, USUARIO
+from indices import PESOS_CAMPOS, IndiceBM25, plegar, tokenizar
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS libros (
+    id PRIMARY KEY,
+    titulo TEXT NOT NULL,
+    autor TEXT NOT NULL,
+    genero TEXT,
+    anio,
+    disponible INTEGER NOT NULL DEFAULT 1,
+    titulo_clave TEXT NOT NULL,
+    autor_clave TEXT NOT NULL,
+    genero_clave TEXT,
+    anio_num INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_libros_titulo ON libros(titulo_clave);
+CREATE INDEX IF NOT EXISTS idx_libros_autor ON libros(autor_clave);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    correo TEXT
+);
+
+CREATE TABLE IF NOT EXISTS prestamos (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_libro NOT NULL UNIQUE,
+    id_usuario NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_prestamos_usuario ON prestamos(id_usuario, seq);
+
+CREATE TABLE IF NOT EXISTS solicitudes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_usuario NOT NULL,
+    id_libro NOT NULL,
+    UNIQUE (id_usuario, id_libro)
+);
+CREATE INDEX IF NOT EXISTS idx_solicitudes_libro ON solicitudes(id_libro, seq);
+
+CREATE TABLE IF NOT EXISTS interacciones (
+    id_usuario NOT NULL,
+    id_libro NOT NULL,
+    PRIMARY KEY (id_usuario, id_libro)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_interacciones_libro ON interacciones(id_libro);
+"""
+
+# después de migrar las bases creadas antes de genero_clave / anio_num
+ESQUEMA_FILTROS = """
+CREATE INDEX IF NOT EXISTS idx_libros_genero ON libros(genero_clave, anio_num);
+CREATE INDEX IF NOT EXISTS idx_libros_anio ON libros(anio_num);
+-- solo los prestados: suelen ser pocos; "disponible" deja pasar casi todo el catálogo
+CREATE INDEX IF NOT EXISTS idx_libros_prestados ON libros(anio_num) WHERE disponible = 0;
+"""
+
+ESQUEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS libros_fts USING fts5(titulo_clave, autor_clave, tokenize='trigram');
+"""
+
+ESQUEMA_TEXTO = """
+CREATE VIRTUAL TABLE IF NOT EXISTS libros_texto USING fts5(titulo, autor, genero, content='');
+"""
+
+CAMPOS_TEXTO = ("titulo", "autor", "genero")
+
+COLUMNAS_LIBRO = "id, titulo, autor, genero, anio, disponible"
+
+SQL_LIBRO_POR_ID = f"SELECT {COLUMNAS_LIBRO} FROM libros WHERE id = ?"
+SQL_USUARIO_POR_ID = "SELECT id, nombre, correo FROM usuarios WHERE id = ?"
+SQL_PRESTAMOS_USUARIO = "SELECT id_libro FROM prestamos WHERE id_usuario = ? ORDER BY seq"
+SQL_INSERTAR_LIBRO = ("INSERT OR IGNORE INTO libros (id, titulo, autor, genero, anio, titulo_clave, autor_clave, "
+                      "genero_clave, anio_num) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+SQL_INSERTAR_FTS = "INSERT INTO libros_fts (rowid, titulo_clave, autor_clave) VALUES (?, ?, ?)"
+SQL_INSERTAR_USUARIO = "INSERT OR IGNORE INTO usuarios (id, nombre, correo) VALUES (?, ?, ?)"
+SQL_DISPONIBLE = "UPDATE libros SET disponible = ? WHERE id = ?"
+SQL_PRESTAR = "INSERT INTO prestamos (id_libro, id_usuario) VALUES (?, ?)"
+SQL_TITULAR = "SELECT id_usuario FROM prestamos WHERE id_libro = ?"
+SQL_DEVOLVER = "DELETE FROM prestamos WHERE id_libro = ?"
+SQL_INTERACCION = "INSERT OR IGNORE INTO interacciones (id_usuario, id_libro) VALUES (?, ?)"
+SQL_ENCOLAR = "INSERT OR IGNORE INTO solicitudes (id_usuario, id_libro) VALUES (?, ?)"
+SQL_SIGUIENTE = "SELECT seq, id_usuario FROM solicitudes WHERE id_libro = ? ORDER BY seq LIMIT 1"
+SQL_QUITAR_SOLICITUD = "DELETE FROM solicitudes WHERE seq = ?"
+SQL_CANCELAR = "DELETE FROM solicitudes WHERE id_usuario = ? AND id_libro = ?"
+SQL_LONGITUD_COLA = "SELECT COUNT(*) FROM solicitudes WHERE id_libro = ?"
+SQL_POSICION = ("SELECT COUNT(*) FROM solicitudes WHERE id_libro = ? AND seq <= "
+                "(SELECT seq FROM solicitudes WHERE id_usuario = ? AND id_libro = ?)")
+SQL_EN_COLA = "SELECT 1 FROM solicitudes WHERE id_usuario = ? AND id_libro = ?"
+SQL_LIBROS_DE_USUARIO = "SELECT id_libro FROM interacciones WHERE id_usuario = ?"
+SQL_USUARIOS_DE_LIBRO = "SELECT id_usuario FROM interacciones WHERE id_libro = ?"
+SQL_INSERTAR_TEXTO = "INSERT INTO libros_texto (rowid, titulo, autor, genero) VALUES (?, ?, ?, ?)"
+# bm25() es menor cuanto más relevante; empates por id para que las páginas sean estables
+SQL_BUSCAR_TEXTO = (
+    "SELECT l.id, l.titulo, l.autor, l.genero, l.anio, l.disponible, "
+    f"-bm25(libros_texto, {', '.join(str(PESOS_CAMPOS[c]) for c in CAMPOS_TEXTO)}) AS puntaje "
+    "FROM libros_texto t JOIN libros l ON l.rowid = t.rowid WHERE libros_texto MATCH ? "
+    "ORDER BY puntaje DESC, l.id LIMIT ? OFFSET ?")
+
+
+def _clave(texto):
+    return texto.strip().lower()
+
+
+def _siguiente_prefijo(prefijo):
+    """Menor cadena mayor que todas las que empiezan por 'prefijo' (límite superior del rango)."""
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+class Biblioteca:
+    def __init__(self, ruta=":memory:", sincronizacion="NORMAL"):
+        self.ruta = ruta
+        # isolation_level=None: las transacciones se controlan explícitamente (transaccion())
+        self.conexion = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute(f"PRAGMA synchronous={sincronizacion}")
+        self._profundidad = 0
+        self.conexion.executescript(ESQUEMA)
+        self._migrar_filtros()
+        self.conexion.executescript(ESQUEMA_FILTROS)
+        try:
+            self.conexion.executescript(ESQUEMA_FTS)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+        existia = self.conexion.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'libros_texto'").fetchone() is not None
+        try:
+            self.conexion.executescript(ESQUEMA_TEXTO)
+            self.indice_texto = None
+        except sqlite3.OperationalError:
+            self.indice_texto = IndiceBM25()
+        if self.indice_texto is not None or not existia:
+            # índice en memoria, o base creada antes de existir libros_texto
+            for fila in self.conexion.execute("SELECT rowid, id, titulo, autor, genero FROM libros"):
+                self._indexar_texto(*fila)
+
+    def _migrar_filtros(self):
+        columnas = {fila[1] for fila in self.conexion.execute("PRAGMA table_info(libros)")}
+        if "genero_clave" in columnas:
+            return
+        self.conexion.create_function("plegar", 1, lambda g: None if g is None else plegar(g), deterministic=True)
+        self.conexion.create_function("anio_como_entero", 1, anio_como_entero, deterministic=True)
+        with self.transaccion():
+            self.conexion.execute("ALTER TABLE libros ADD COLUMN genero_clave TEXT")
+            self.conexion.execute("ALTER TABLE libros ADD COLUMN anio_num INTEGER")
+            self.conexion.execute("UPDATE libros SET genero_clave = plegar(genero), anio_num = anio_como_entero(anio)")
+
+    def cerrar(self):
+        self.conexion.execute("PRAGMA optimize")
+        self.conexion.close()
+
+    @contextmanager
+    def transaccion(self):
+        """Agrupa operaciones en una sola transacción (anidable: solo la externa confirma)."""
+        if self._profundidad == 0:
+            self.conexion.execute("BEGIN")
+        self._profundidad += 1
+        try:
+            yield
+        except BaseException:
+            self._profundidad -= 1
+            if self._profundidad == 0:
+                self.conexion.execute("ROLLBACK")
+            raise
+        self._profundidad -= 1
+        if self._profundidad == 0:
+            self.conexion.execute("COMMIT")
+
+    # ---------- CONVERSIÓN A OBJETOS DEL DOMINIO ----------
+    def _libro(self, fila):
+        libro = Libro(*fila[:5])
+        libro.disponible = bool(fila[5])
+        return libro
+
+    def _usuario(self, fila, prestamos=None):
+        usuario = Usuario(*fila)
+        if prestamos is None:
+            prestamos = [r[0] for r in self.conexion.execute(SQL_PRESTAMOS_USUARIO, (fila[0],))]
+        usuario.prestamos.extend(prestamos)
+        return usuario
+
+    # ---------- REGISTRO ----------
+    def registrar_usuario(self, id, nombre, correo):
+        with self.transaccion():
+            if self.conexion.execute(SQL_INSERTAR_USUARIO, (id, nombre, correo)).rowcount == 0:
+                return False, f"El ID de usuario {id} ya existe."
+        return True, f"Usuario '{nombre}' registrado."
+
+    def _insertar_libro(self, id, titulo, autor, genero, anio):
+        titulo_key, autor_key = _clave(titulo), _clave(autor)
+        genero_key = None if genero is None else plegar(genero)
+        cursor = self.conexion.execute(SQL_INSERTAR_LIBRO, (id, titulo, autor, genero, anio, titulo_key, autor_key,
+                                                            genero_key, anio_como_entero(anio)))
+        if cursor.rowcount == 0:
+            return False
+        if self.fts:
+            self.conexion.execute(SQL_INSERTAR_FTS, (cursor.lastrowid, titulo_key, autor_key))
+        self._indexar_texto(cursor.lastrowid, id, titulo, autor, genero)
+        return True
+
+    def _indexar_texto(self, rowid, id, titulo, autor, genero):
+        if self.indice_texto is not None:
+            self.indice_texto.agregar(id, {"titulo": titulo, "autor": autor, "genero": genero})
+        else:
+            # se guardan las palabras ya plegadas: la consulta se tokeniza igual
+            self.conexion.execute(SQL_INSERTAR_TEXTO, (rowid,) + tuple(
+                " ".join(tokenizar(texto)) if texto is not None else None for texto in (titulo, autor, genero)))
+
+    def registrar_libro(self, id, titulo, autor, genero, anio):
+        with self.transaccion():
+            if not self._insertar_libro(id, titulo, autor, genero, anio):
+                return False, f"El ID {id} ya pertenece a otro libro."
+        return True, f"Libro '{titulo}' registrado."
+
+    def registrar_usuarios_lote(self, registros):
+        """Registra tuplas (id, nombre, correo) en una sola transacción. Retorna (aceptados, rechazados)."""
+        aceptados, rechazados = 0, []
+        with self.transaccion():
+            for registro in registros:
+                if self.conexion.execute(SQL_INSERTAR_USUARIO, tuple(registro)).rowcount:
+                    aceptados += 1
+                else:
+                    rechazados.append((registro, f"El ID de usuario {registro[0]} ya existe."))
+        return aceptados, rechazados
+
+    def registrar_libros_lote(self, registros):
+        """Registra tuplas (id, titulo, autor, genero, anio) en una sola transacción."""
+        aceptados, rechazados = 0, []
+        with self.transaccion():
+            for registro in registros:
+                if self._insertar_libro(*registro):
+                    aceptados += 1
+                else:
+                    rechazados.append((registro, f"El ID {registro[0]} ya pertenece a otro libro."))
+        return aceptados, rechazados
+
+    # ---------- PRÉSTAMO ----------
+    def prestar_libro(self, id_usuario, id_libro):
+        with self.transaccion():
+            usuario = self.conexion.execute(SQL_USUARIO_POR_ID, (id_usuario,)).fetchone()
+            if not usuario:
+                return False, "Usuario no encontrado."
+
+            libro = self.conexion.execute(SQL_LIBRO_POR_ID, (id_libro,)).fetchone()
+            if not libro:
+                return False, "Libro no encontrado."
+
+            if not libro[5]:
+                if self.conexion.execute(SQL_ENCOLAR, (id_usuario, id_libro)).rowcount == 0:
+                    return False, "Libro no disponible. Ya tiene una solicitud en espera."
+                return False, f"Libro no disponible. Solicitud agregada."
+
+            self._asignar(id_usuario, id_libro)
+        return True, f"Libro '{libro[1]}' prestado a {usuario[1]}."
+
+    def _asignar(self, id_usuario, id_libro):
+        self.conexion.execute(SQL_DISPONIBLE, (0, id_libro))
+        self.conexion.execute(SQL_PRESTAR, (id_libro, id_usuario))
+        self.conexion.execute(SQL_INTERACCION, (id_usuario, id_libro))
+
+    # ---------- DEVOLUCIÓN ----------
+    def devolver_libro(self, id_libro):
+        with self.transaccion():
+            libro = self.conexion.execute(SQL_LIBRO_POR_ID, (id_libro,)).fetchone()
+            if not libro:
+                return False, "Libro no encontrado."
+
+            if libro[5]:
+                return False, "El libro ya está disponible."
+
+            if self.conexion.execute(SQL_DEVOLVER, (id_libro,)).rowcount == 0:
+                return False, "No se encontró préstamo activo."
+            self.conexion.execute(SQL_DISPONIBLE, (1, id_libro))
+
+            # cola de solicitudes del libro
+            while True:
+                siguiente = self.conexion.execute(SQL_SIGUIENTE, (id_libro,)).fetchone()
+                if siguiente is None:
+                    break
+                seq, id_usuario = siguiente
+                self.conexion.execute(SQL_QUITAR_SOLICITUD, (seq,))
+                if self.conexion.execute(SQL_USUARIO_POR_ID, (id_usuario,)).fetchone():
+                    self._asignar(id_usuario, id_libro)
+                    return True, f"Libro devuelto y asignado al usuario en espera."
+        return True, f"Libro devuelto correctamente."
+
+    # ---------- EN LOTE ----------
+    def prestar_lote(self, transacciones):
+        """Préstamos (id_usuario, id_libro) en orden, en una sola transacción."""
+        with self.transaccion():
+            return [self.prestar_libro(id_usuario, id_libro) for id_usuario, id_libro in transacciones]
+
+    def devolver_lote(self, ids_libros):
+        """Devoluciones en orden (con reasignación), en una sola transacción."""
+        with self.transaccion():
+            return [self.devolver_libro(id_libro) for id_libro in ids_libros]
+
+    def cancelar_solicitud(self, id_usuario, id_libro):
+        with self.transaccion():
+            if self.conexion.execute(SQL_CANCELAR, (id_usuario, id_libro)).rowcount == 0:
+                return False, "No existe una solicitud en espera para ese usuario y libro."
+        return True, "Solicitud cancelada."
+
+    # ---------- CONSULTAS ----------
+    def buscar_usuario_por_id(self, id):
+        fila = self.conexion.execute(SQL_USUARIO_POR_ID, (id,)).fetchone()
+        return self._usuario(fila) if fila else None
+
+    def buscar_libro_por_id(self, id):
+        fila = self.conexion.execute(SQL_LIBRO_POR_ID, (id,)).fetchone()
+        return self._libro(fila) if fila else None
+
+    def titular_de(self, id_libro):
+        """id del usuario que tiene el libro prestado (None si está disponible)."""
+        fila = self.conexion.execute(SQL_TITULAR, (id_libro,)).fetchone()
+        return fila[0] if fila else None
+
+    def posicion_en_espera(self, id_usuario, id_libro):
+        if not self.conexion.execute(SQL_EN_COLA, (id_usuario, id_libro)).fetchone():
+            return None
+        return self.conexion.execute(SQL_POSICION, (id_libro, id_usuario, id_libro)).fetchone()[0]
+
+    def solicitudes_en_espera(self, id_libro):
+        return self.conexion.execute(SQL_LONGITUD_COLA, (id_libro,)).fetchone()[0]
+
+    def _buscar_por_fragmento(self, columna, fragmento):
+        clave = _clave(fragmento)
+        if self.fts:
+            sql = (f"SELECT l.id, l.titulo, l.autor, l.genero, l.anio, l.disponible "
+                   f"FROM libros_fts f JOIN libros l ON l.rowid = f.rowid WHERE f.{columna} LIKE ? "
+                   f"ORDER BY l.{columna} <> ?, l.{columna}, l.rowid")
+        else:
+            sql = (f"SELECT {COLUMNAS_LIBRO} FROM libros WHERE {columna} LIKE ? "
+                   f"ORDER BY {columna} <> ?, {columna}, rowid")
+        # '%' o '_' dentro del fragmento actúan como comodines (resultado más amplio) y
+        # LIKE solo ignora mayúsculas en ASCII: se verifica cada candidato con 'in'
+        indice = 1 if columna == "titulo_clave" else 2
+        filas = self.conexion.execute(sql, (f"%{clave}%", clave))
+        return [self._libro(f) for f in filas if clave in _clave(f[indice])]
+
+    def buscar_libros_por_titulo(self, titulo_fragmento):
+        return self._buscar_por_fragmento("titulo_clave", titulo_fragmento)
+
+    def buscar_libros_por_autor(self, autor_fragmento):
+        return self._buscar_por_fragmento("autor_clave", autor_fragmento)
+
+    def buscar_libros(self, consulta, pagina=1, por_pagina=20):
+        """
+        [(Libro, puntaje)] de la página pedida (desde 1), del más relevante al
+        menos, como biblioteca3.Biblioteca.buscar_libros (los puntajes de bm25()
+        de FTS5 no son comparables con los de IndiceBM25, el orden sí).
+        """
+        if pagina < 1 or por_pagina < 1:
+            return []
+        inicio = (pagina - 1) * por_pagina
+        if self.indice_texto is not None:
+            pares = self.indice_texto.buscar(consulta, inicio + por_pagina)[inicio:]
+            return [(self.buscar_libro_por_id(id), puntaje) for id, puntaje in pares]
+        terminos = sorted(set(tokenizar(consulta)))
+        if not terminos:
+            return []
+        # cada término entre comillas (son palabras \w+): basta con que el libro tenga uno
+        expresion = " OR ".join(f'"{t}"' for t in terminos)
+        filas = self.conexion.execute(SQL_BUSCAR_TEXTO, (expresion, por_pagina, inicio))
+        return [(self._libro(fila[:6]), fila[6]) for fila in filas]
+
+    def _filtros(self, genero, anio_desde, anio_hasta, disponible):
+        """[(nombre, condición SQL, parámetros)] con los mismos nombres que consultas.py."""
+        filtros = []
+        if genero is not None:
+            filtros.append((f"genero={genero}", "genero_clave = ?", [plegar(genero)]))
+        if anio_desde is not None or anio_hasta is not None:
+            partes, parametros = [], []
+            if anio_desde is not None:
+                partes.append("anio_num >= ?")
+                parametros.append(anio_desde)
+            if anio_hasta is not None:
+                partes.append("anio_num <= ?")
+                parametros.append(anio_hasta)
+            filtros.append((f"anio={anio_desde}..{anio_hasta}", " AND ".join(partes), parametros))
+        if disponible is not None:
+            filtros.append(("disponible" if disponible else "prestado", "disponible = ?", [1 if disponible else 0]))
+        return filtros
+
+    def _sql_consulta(self, filtros):
+        where = " AND ".join(f"({sql})" for _, sql, _ in filtros) or "1"
+        sql = f"SELECT {COLUMNAS_LIBRO} FROM libros WHERE {where} ORDER BY rowid LIMIT ?"
+        return sql, [p for _, _, parametros in filtros for p in parametros]
+
+    def consultar_libros(self, genero=None, anio_desde=None, anio_hasta=None, disponible=None, limite=None):
+        """Como biblioteca3.Biblioteca.consultar_libros: libros que cumplen todo, en orden de registro."""
+        if limite is not None and limite <= 0:
+            return []
+        sql, parametros = self._sql_consulta(self._filtros(genero, anio_desde, anio_hasta, disponible))
+        filas = self.conexion.execute(sql, parametros + [-1 if limite is None else limite])
+        return [self._libro(fila) for fila in filas]
+
+    def planificar_consulta(self, genero=None, anio_desde=None, anio_hasta=None, disponible=None):
+        """
+        (plan, [(condición, libros estimados)]): el plan es el de EXPLAIN QUERY
+        PLAN (qué índice elige SQLite) y los estimados se cuentan con los índices.
+        """
+        filtros = self._filtros(genero, anio_desde, anio_hasta, disponible)
+        estimados = sorted(((nombre, self.conexion.execute(f"SELECT COUNT(*) FROM libros WHERE {sql}",
+                                                             parametros).fetchone()[0])
+                            for nombre, sql, parametros in filtros), key=lambda c: c[1])
+        sql, parametros = self._sql_consulta(filtros)
+        plan = "; ".join(fila[3] for fila in self.conexion.execute("EXPLAIN QUERY PLAN " + sql, parametros + [-1]))
+        return plan, estimados
+
+    def iterar_libros(self, desde=None, hasta=None, limite=None):
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append("id >= ?")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append("id <= ?")
+            parametros.append(hasta)
+        sql = f"SELECT {COLUMNAS_LIBRO} FROM libros"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY id LIMIT ?"
+        parametros.append(-1 if limite is None else limite)
+        for fila in self.conexion.execute(sql, parametros):
+            yield self._libro(fila)
+
+    def iterar_usuarios(self, desde=None, hasta=None, limite=None):
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append("id >= ?")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append("id <= ?")
+            parametros.append(hasta)
+        sql = "SELECT id, nombre, correo FROM usuarios"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY id LIMIT ?"
+        parametros.append(-1 if limite is None else limite)
+        # préstamos de todos los usuarios del rango en una sola consulta (mismo orden por id)
+        sql = (f"SELECT u.id, u.nombre, u.correo, p.id_libro FROM ({sql}) u "
+               f"LEFT JOIN prestamos p ON p.id_usuario = u.id ORDER BY u.id, p.seq")
+        actual, prestamos = None, []
+        for id, nombre, correo, id_libro in self.conexion.execute(sql, parametros):
+            if actual is not None and actual[0] != id:
+                yield self._usuario(actual, prestamos)
+                prestamos = []
+            actual = (id, nombre, correo)
+            if id_libro is not None:
+                prestamos.append(id_libro)
+        if actual is not None:
+            yield self._usuario(actual, prestamos)
+
+    def iterar_libros_por_prefijo_titulo(self, prefijo, limite=None):
+        prefijo = _clave(prefijo)
+        if not prefijo:
+            sql, parametros = f"SELECT {COLUMNAS_LIBRO} FROM libros ORDER BY titulo_clave, rowid LIMIT ?", []
+        else:
+            sql = (f"SELECT {COLUMNAS_LIBRO} FROM libros WHERE titulo_clave >= ? AND titulo_clave < ? "
+                   f"ORDER BY titulo_clave, rowid LIMIT ?")
+            parametros = [prefijo, _siguiente_prefijo(prefijo)]
+        parametros.append(-1 if limite is None else limite)
+        for fila in self.conexion.execute(sql, parametros):
+            yield self._libro(fila)
+
+    def listar_todos_los_libros(self, desde=None, hasta=None, limite=None):
+        return list(self.iterar_libros(desde, hasta, limite))
+
+    def listar_todos_los_usuarios(self, desde=None, hasta=None, limite=None):
+        return list(self.iterar_usuarios(desde, hasta, limite))
+
+    # ---------- GRAFO ----------
+    def conexiones_de(self, id, tipo=None):
+        # mismas tuplas (tipo, id) que biblioteca3.Biblioteca.conexiones_de
+        conexiones = []
+        if tipo in (None, USUARIO):
+            conexiones.extend((LIBRO, v) for (v,) in self.conexion.execute(SQL_LIBROS_DE_USUARIO, (id,)))
+        if tipo in (None, LIBRO):
+            conexiones.extend((USUARIO, v) for (v,) in self.conexion.execute(SQL_USUARIOS_DE_LIBRO, (id,)))
+        return conexiones
+
+
+if __name__ == "__main__":
+    import biblioteca3
+    ruta = sys.argv[1] if len(sys.argv) > 1 else "biblioteca.db"
+    root = biblioteca3._cargar_tkinter().Tk()
+    biblioteca3.AppBiblioteca(root, biblioteca=Biblioteca(ruta))
+    root.mainloop()
@@ -0,0 +1,228 @@
+"""
+carga_masiva.py
+Importación masiva de libros y usuarios desde archivos CSV o JSONL.
+
+ - Las filas se leen en streaming (generadores): el archivo nunca se carga entero.
+ - Cada fila se valida (campos obligatorios, ID y año) y los IDs repetidos se
+   rechazan en la misma pasada.
+ - Las filas válidas se agrupan en lotes y se entregan a
+   Biblioteca.registrar_libros_lote / registrar_usuarios_lote, que construyen
+   los índices en bloque (ver ArbolMap.cargar_ordenados) en lugar de insertar
+   registro por registro.
+ - Se informa el progreso y las filas rechazadas (número de línea + motivo).
+
+Columnas esperadas:
+    libros   : id, titulo, autor, genero, anio
+    usuarios : id, nombre, correo
+
+Uso:
+    python carga_masiva.py --libros catalogo.csv --usuarios usuarios.jsonl --modulo biblioteca3
+"""
+
+import argparse
+import csv
+import gc
+import importlib
+import json
+import os
+import sys
+import time
+
+CAMPOS_LIBRO = ("id", "titulo", "autor", "genero", "anio")
+CAMPOS_USUARIO = ("id", "nombre", "correo")
+
+
+# ---------------------------
+# LECTURA (streaming)
+# ---------------------------
+
+def detectar_formato(ruta):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise ValueError(f"No se reconoce el formato de '{ruta}' (use .csv o .jsonl).")
+
+
+def leer_filas(ruta, formato=None):
+    """
+    Generador de (numero_linea, fila, error). 'fila' es un dict (o None si la
+    línea no se pudo interpretar, en cuyo caso 'error' describe el problema).
+    """
+    formato = formato or detectar_formato(ruta)
+    with open(ruta, encoding="utf-8", newline="") as f:
+        if formato == "csv":
+            lector = csv.reader(f)
+            cabecera = [c.strip() for c in next(lector, [])]
+            for valores in lector:
+                if valores:
+                    yield lector.line_num, dict(zip(cabecera, valores)), None
+        else:
+            for numero, linea in enumerate(f, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    fila = json.loads(linea)
+                except json.JSONDecodeError as e:
+                    yield numero, None, f"JSON inválido: {e.msg}"
+                    continue
+                if not isinstance(fila, dict):
+                    yield numero, None, "Se esperaba un objeto JSON."
+                    continue
+                yield numero, fila, None
+
+
+# ---------------------------
+# VALIDACIÓN
+# ---------------------------
+
+def normalizar_id(valor):
+    """Igual que la interfaz: entero si es posible, si no el texto sin espacios."""
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return valor
+    texto = str(valor if valor is not None else "").strip()
+    if not texto:
+        raise ValueError("ID vacío.")
+    try:
+        return int(texto)
+    except ValueError:
+        return texto
+
+
+def _texto(fila, campo):
+    valor = fila.get(campo)
+    return str(valor).strip() if valor is not None else ""
+
+
+def validar_libro(fila):
+    """Convierte una fila en la tupla (id, titulo, autor, genero, anio) o lanza ValueError."""
+    id_libro = normalizar_id(fila.get("id"))
+    titulo = _texto(fila, "titulo")
+    if not titulo:
+        raise ValueError("Falta el campo 'titulo'.")
+    autor = _texto(fila, "autor")
+    if not autor:
+        raise ValueError("Falta el campo 'autor'.")
+    anio_texto = _texto(fila, "anio")
+    try:
+        anio = int(anio_texto) if anio_texto else None
+    except ValueError:
+        raise ValueError(f"Año inválido: '{anio_texto}'.")
+    return id_libro, titulo, autor, _texto(fila, "genero"), anio
+
+
+def validar_usuario(fila):
+    """Convierte una fila en la tupla (id, nombre, correo) o lanza ValueError."""
+    nombre = _texto(fila, "nombre")
+    if not nombre:
+        raise ValueError("Falta el campo 'nombre'.")
+    return normalizar_id(fila.get("id")), nombre, _texto(fila, "correo")
+
+
+# ---------------------------
+# IMPORTACIÓN
+# ---------------------------
+
+class ResultadoCarga:
+    """Resumen de una importación: filas leídas, aceptadas y rechazadas (línea, motivo)."""
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.leidas = 0
+        self.aceptadas = 0
+        self.rechazadas = []
+        self.segundos = 0.0
+
+    def rechazar(self, linea, motivo):
+        self.rechazadas.append((linea, motivo))
+
+    def __repr__(self):
+        return (f"<ResultadoCarga {self.ruta}: leídas={self.leidas} aceptadas={self.aceptadas} "
+                f"rechazadas={len(self.rechazadas)} en {self.segundos:.2f}s>")
+
+
+def importar(biblioteca, ruta, tipo="libros", formato=None, tamanio_lote=1_000_000,
+             progreso=None, cada=100_000):
+    """
+    Importa un archivo de 'libros' o 'usuarios' en la biblioteca.
+    - tamanio_lote: filas válidas que se acumulan antes de registrarlas en bloque.
+      Cada lote fusiona y reconstruye los árboles en O(n + m): lotes grandes
+      significan menos reconstrucciones a cambio de más memoria transitoria.
+    - progreso: función opcional progreso(resultado) llamada cada 'cada' filas leídas.
+    Retorna un ResultadoCarga.
+    """
+    if tipo == "libros":
+        validar, registrar = validar_libro, biblioteca.registrar_libros_lote
+    elif tipo == "usuarios":
+        validar, registrar = validar_usuario, biblioteca.registrar_usuarios_lote
+    else:
+        raise ValueError("tipo debe ser 'libros' o 'usuarios'.")
+
+    resultado = ResultadoCarga(ruta)
+    inicio = time.perf_counter()
+    lote = []
+
+    def volcar():
+        lineas = {id(registro): numero for numero, registro in lote}
+        aceptados, rechazados = registrar([registro for _, registro in lote])
+        resultado.aceptadas += aceptados
+        for registro, motivo in rechazados:
+            resultado.rechazar(lineas[id(registro)], motivo)
+        lote.clear()
+
+    # Con millones de objetos nuevos, las pasadas del recolector cíclico recorren
+    # todo el heap una y otra vez; se pausa durante la carga (no se crean ciclos).
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for numero, fila, error in leer_filas(ruta, formato):
+            resultado.leidas += 1
+            if error is None:
+                try:
+                    lote.append((numero, validar(fila)))
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                resultado.rechazar(numero, error)
+            if len(lote) >= tamanio_lote:
+                volcar()
+            if progreso and resultado.leidas % cada == 0:
+                progreso(resultado)
+        if lote:
+            volcar()
+    finally:
+        if gc_activo:
+            gc.enable()
+
+    resultado.rechazadas.sort()
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importación masiva de libros y usuarios (CSV/JSONL).")
+    parser.add_argument("--libros", help="archivo de libros (.csv o .jsonl)")
+    parser.add_argument("--usuarios", help="archivo de usuarios (.csv o .jsonl)")
+    parser.add_argument("--modulo", default="biblioteca3", help="módulo con la clase Biblioteca")
+    parser.add_argument("--lote", type=int, default=1_000_000, help="filas por lote (cada lote fusiona y reconstruye los índices)")
+    parser.add_argument("--mostrar-rechazos", type=int, default=20, help="máximo de rechazos a listar")
+    args = parser.parse_args(argv)
+
+    biblioteca = importlib.import_module(args.modulo).Biblioteca()
+
+    def progreso(resultado):
+        print(f"  ... {resultado.leidas} filas leídas, {len(resultado.rechazadas)} rechazadas",
+              file=sys.stderr)
+
+    for tipo, ruta in (("usuarios", args.usuarios), ("libros", args.libros)):
+        if not ruta:
+            continue
+        resultado = importar(biblioteca, ruta, tipo, tamanio_lote=args.lote, progreso=progreso)
+        print(resultado)
+        for linea, motivo in resultado.rechazadas[:args.mostrar_rechazos]:
+            print(f"  línea {linea}: {motivo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
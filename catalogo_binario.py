@@ -0,0 +1,386 @@
+"""
+catalogo_binario.py
+Catálogo de libros en un archivo binario de solo lectura, abierto con mmap.
+
+Reconstruir los árboles de biblioteca3 llamando a registrar_libro libro por
+libro cuesta O(n log n) en cada arranque. Este formato guarda el catálogo con
+sus índices ya ordenados: al abrirlo con mmap no se reconstruye nada, las
+búsquedas por id y los recorridos funcionan de inmediato y el sistema
+operativo trae del disco solo las páginas que se tocan. Varios procesos
+lectores comparten las mismas páginas en la caché del sistema.
+
+Formato (little-endian):
+    cabecera  : CABECERA (magia, versión, número de libros y desplazamientos)
+    ranuras   : una RANURA de ancho fijo por libro (48 bytes), en el orden recibido
+    ids       : posiciones de ranura ordenadas por id (uint32)
+    titulos   : entradas (clave_off, clave_len, ranura) ordenadas por título normalizado
+    autores   : ídem por autor normalizado
+    heap      : textos UTF-8 sin repetir (autores y géneros se guardan una vez)
+
+La disponibilidad guardada es la del momento de la exportación: los préstamos
+viven en el motor (y en su log), no en el catálogo.
+
+Uso:
+    python catalogo_binario.py convertir catalogo.csv catalogo.bin
+    python catalogo_binario.py medir catalogo.bin
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from biblioteca3 import Libro
+from consultas import anio_como_entero
+from indices import normalizar
+
+MAGIA = b"BIBLCAT\x00"
+VERSION = 1
+
+# magia, versión, reservado, n, off_ranuras, off_ids, off_titulos, off_autores, off_heap, largo_heap
+CABECERA = struct.Struct("<8sHHIQQQQQQ")
+# id_num, id_off, id_len, titulo_off, titulo_len, autor_off, autor_len, genero_off, genero_len, anio, banderas
+RANURA = struct.Struct("<qIIIIIIIIiB3x")
+POSICION = struct.Struct("<I")
+ENTRADA_CLAVE = struct.Struct("<III")
+
+DISPONIBLE = 1
+ID_TEXTO = 2
+SIN_ANIO = 4        # año vacío, no numérico (p. ej. "s/f") o fuera de int32
+SIN_GENERO = 8
+ANIO_MIN, ANIO_MAX = -2**31, 2**31 - 1
+
+
+def _clave_orden(id):
+    """Orden total de los ids: primero los enteros, luego los textos."""
+    return (1, id) if isinstance(id, str) else (0, id)
+
+
+# ---------------------------
+# ESCRITURA
+# ---------------------------
+
+class _Heap:
+    """Acumula textos UTF-8 sin duplicados y retorna (desplazamiento, largo)."""
+    def __init__(self):
+        self.datos = bytearray()
+        self.vistos = {}
+
+    def agregar(self, texto):
+        ref = self.vistos.get(texto)
+        if ref is None:
+            codificado = texto.encode("utf-8")
+            ref = (len(self.datos), len(codificado))
+            self.datos += codificado
+            self.vistos[texto] = ref
+        return ref
+
+
+def _como_tupla(libro):
+    if isinstance(libro, (tuple, list)):
+        disponible = libro[5] if len(libro) > 5 else True
+        return tuple(libro[:5]) + (disponible,)
+    return libro.id, libro.titulo, libro.autor, libro.genero, libro.anio, libro.disponible
+
+
+def escribir(ruta, libros):
+    """
+    Escribe el catálogo en 'ruta'. 'libros' es un iterable de objetos Libro o de
+    tuplas (id, titulo, autor, genero, anio[, disponible]). Los ids deben ser
+    enteros de 64 bits o textos, sin repetir. Un año que no es un entero de 32
+    bits (vacío, "s/f", ...) se guarda como desconocido y se lee como None, igual
+    que un género None. El archivo se reemplaza de forma
+    atómica: los procesos que ya lo tenían abierto siguen viendo la versión anterior.
+    Retorna el número de libros escritos.
+    """
+    registros = [_como_tupla(l) for l in libros]
+    por_id = sorted(range(len(registros)), key=lambda i: _clave_orden(registros[i][0]))
+    for anterior, actual in zip(por_id, por_id[1:]):
+        if registros[anterior][0] == registros[actual][0]:
+            raise ValueError(f"ID de libro repetido: {registros[actual][0]!r}")
+
+    heap = _Heap()
+    ranuras = bytearray()
+    por_titulo, por_autor = [], []
+    for posicion, (id, titulo, autor, genero, anio, disponible) in enumerate(registros):
+        banderas = DISPONIBLE if disponible else 0
+        if isinstance(id, str):
+            banderas |= ID_TEXTO
+            id_num, (id_off, id_len) = 0, heap.agregar(id)
+        else:
+            id_num, id_off, id_len = int(id), 0, 0
+        anio = anio_como_entero(anio)
+        if anio is None or not ANIO_MIN <= anio <= ANIO_MAX:
+            banderas |= SIN_ANIO
+            anio = 0
+        if genero is None:
+            banderas |= SIN_GENERO
+        titulo, autor, genero = str(titulo), str(autor), str(genero or "")
+        ranuras += RANURA.pack(id_num, id_off, id_len, *heap.agregar(titulo), *heap.agregar(autor),
+                               *heap.agregar(genero), anio, banderas)
+        por_titulo.append((normalizar(titulo), posicion))
+        por_autor.append((normalizar(autor), posicion))
+
+    def tabla_claves(entradas):
+        entradas.sort()
+        tabla = bytearray()
+        for clave, posicion in entradas:
+            tabla += ENTRADA_CLAVE.pack(*heap.agregar(clave), posicion)
+        return tabla
+
+    ids = b"".join(POSICION.pack(i) for i in por_id)
+    titulos = tabla_claves(por_titulo)
+    autores = tabla_claves(por_autor)
+
+    off_ranuras = CABECERA.size
+    off_ids = off_ranuras + len(ranuras)
+    off_titulos = off_ids + len(ids)
+    off_autores = off_titulos + len(titulos)
+    off_heap = off_autores + len(autores)
+    cabecera = CABECERA.pack(MAGIA, VERSION, 0, len(registros), off_ranuras, off_ids,
+                             off_titulos, off_autores, off_heap, len(heap.datos))
+
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for bloque in (cabecera, ranuras, ids, titulos, autores, heap.datos):
+                f.write(bloque)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return len(registros)
+
+
+def exportar(biblioteca, ruta):
+    """Escribe el catálogo de cualquier motor con iterar_libros()."""
+    return escribir(ruta, biblioteca.iterar_libros())
+
+
+# ---------------------------
+# LECTURA (mmap)
+# ---------------------------
+
+class CatalogoBinario:
+    """
+    Vista de solo lectura sobre un catálogo binario. Abrirlo solo valida la
+    cabecera; cada consulta decodifica únicamente las ranuras que visita.
+    Los Libro retornados son copias: modificarlos no altera el archivo.
+    """
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = open(ruta, "rb")
+        try:
+            self._mapa = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._archivo.close()
+            raise ValueError(f"'{ruta}' está vacío: no es un catálogo binario.")
+        if len(self._mapa) < CABECERA.size:
+            self.cerrar()
+            raise ValueError(f"'{ruta}' no es un catálogo binario.")
+        (magia, version, _, self._n, self._off_ranuras, self._off_ids, self._off_titulos,
+         self._off_autores, self._off_heap, largo_heap) = CABECERA.unpack_from(self._mapa, 0)
+        if magia != MAGIA:
+            self.cerrar()
+            raise ValueError(f"'{ruta}' no es un catálogo binario.")
+        if version != VERSION:
+            self.cerrar()
+            raise ValueError(f"Versión de catálogo no soportada: {version}.")
+        if self._off_heap + largo_heap > len(self._mapa):
+            self.cerrar()
+            raise ValueError(f"'{ruta}' está truncado.")
+
+    def cerrar(self):
+        if getattr(self, "_mapa", None) is not None:
+            self._mapa.close()
+            self._mapa = None
+        self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def __len__(self):
+        return self._n
+
+    # ---------- decodificación ----------
+    def _texto(self, off, largo):
+        inicio = self._off_heap + off
+        return self._mapa[inicio:inicio + largo].decode("utf-8")
+
+    def _id(self, posicion):
+        id_num, id_off, id_len = struct.unpack_from("<qII", self._mapa, self._off_ranuras + posicion * RANURA.size)
+        banderas = self._mapa[self._off_ranuras + posicion * RANURA.size + 44]
+        return self._texto(id_off, id_len) if banderas & ID_TEXTO else id_num
+
+    def libro(self, posicion):
+        """Decodifica la ranura 'posicion' (0 <= posicion < len) como un Libro."""
+        (id_num, id_off, id_len, t_off, t_len, a_off, a_len, g_off, g_len,
+         anio, banderas) = RANURA.unpack_from(self._mapa, self._off_ranuras + posicion * RANURA.size)
+        id = self._texto(id_off, id_len) if banderas & ID_TEXTO else id_num
+        libro = Libro(id, self._texto(t_off, t_len), self._texto(a_off, a_len),
+                      None if banderas & SIN_GENERO else self._texto(g_off, g_len),
+                      None if banderas & SIN_ANIO else anio)
+        libro.disponible = bool(banderas & DISPONIBLE)
+        return libro
+
+    def _posicion_id(self, orden):
+        return POSICION.unpack_from(self._mapa, self._off_ids + orden * POSICION.size)[0]
+
+    def _clave_tabla(self, off_tabla, orden):
+        clave_off, clave_len, posicion = ENTRADA_CLAVE.unpack_from(self._mapa, off_tabla + orden * ENTRADA_CLAVE.size)
+        return self._texto(clave_off, clave_len), posicion
+
+    # ---------- búsqueda binaria ----------
+    def _primer_id(self, id):
+        """Menor orden i tal que id(i) >= id."""
+        objetivo = _clave_orden(id)
+        bajo, alto = 0, self._n
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if _clave_orden(self._id(self._posicion_id(medio))) < objetivo:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return bajo
+
+    def _primera_clave(self, off_tabla, clave):
+        bajo, alto = 0, self._n
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self._clave_tabla(off_tabla, medio)[0] < clave:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return bajo
+
+    # ---------- consultas ----------
+    def buscar(self, id):
+        """Libro con ese id, o None. O(log n) lecturas del mapa."""
+        orden = self._primer_id(id)
+        if orden < self._n:
+            posicion = self._posicion_id(orden)
+            if self._id(posicion) == id:
+                return self.libro(posicion)
+        return None
+
+    def __contains__(self, id):
+        orden = self._primer_id(id)
+        return orden < self._n and self._id(self._posicion_id(orden)) == id
+
+    def iterar(self, desde=None, hasta=None, limite=None):
+        """Libros en orden de id, con límites inclusivos opcionales (como ArbolMap.iterar)."""
+        orden = self._primer_id(desde) if desde is not None else 0
+        tope = _clave_orden(hasta) if hasta is not None else None
+        producidos = 0
+        while orden < self._n and (limite is None or producidos < limite):
+            posicion = self._posicion_id(orden)
+            if tope is not None and _clave_orden(self._id(posicion)) > tope:
+                return
+            yield self.libro(posicion)
+            producidos += 1
+            orden += 1
+
+    __iter__ = iterar
+
+    def _iterar_clave(self, off_tabla, clave, prefijo, limite):
+        orden = self._primera_clave(off_tabla, clave)
+        producidos = 0
+        while orden < self._n and (limite is None or producidos < limite):
+            actual, posicion = self._clave_tabla(off_tabla, orden)
+            if not (actual.startswith(clave) if prefijo else actual == clave):
+                return
+            yield self.libro(posicion)
+            producidos += 1
+            orden += 1
+
+    def buscar_por_titulo(self, titulo):
+        """Libros cuyo título normalizado es exactamente 'titulo'."""
+        return list(self._iterar_clave(self._off_titulos, normalizar(titulo), False, None))
+
+    def buscar_por_autor(self, autor):
+        """Libros cuyo autor normalizado es exactamente 'autor'."""
+        return list(self._iterar_clave(self._off_autores, normalizar(autor), False, None))
+
+    def iterar_prefijo_titulo(self, prefijo, limite=None):
+        """Libros cuyo título normalizado empieza con 'prefijo', en orden de título."""
+        return self._iterar_clave(self._off_titulos, normalizar(prefijo), True, limite)
+
+
+def cargar(biblioteca, ruta):
+    """Vuelca un catálogo binario en un motor en memoria (una sola carga en bloque)."""
+    with CatalogoBinario(ruta) as catalogo:
+        return biblioteca.registrar_libros_lote(
+            [(l.id, l.titulo, l.autor, l.genero, l.anio) for l in catalogo.iterar()])
+
+
+# ---------------------------
+# LÍNEA DE COMANDOS
+# ---------------------------
+
+def _convertir(entrada, salida):
+    from carga_masiva import leer_filas, validar_libro
+    registros, rechazadas = [], 0
+    for _, fila, error in leer_filas(entrada):
+        if error is None:
+            try:
+                registros.append(validar_libro(fila))
+                continue
+            except ValueError:
+                pass
+        rechazadas += 1
+    n = escribir(salida, registros)
+    print(f"{n} libros escritos en {salida} ({os.path.getsize(salida)} bytes), {rechazadas} filas rechazadas")
+
+
+def _medir(ruta):
+    from biblioteca3 import Biblioteca
+
+    inicio = time.perf_counter()
+    catalogo = CatalogoBinario(ruta)
+    primero = next(iter(catalogo), None)
+    if primero is not None:
+        catalogo.buscar(primero.id)
+    apertura = time.perf_counter() - inicio
+    libros = list(catalogo.iterar())
+    catalogo.cerrar()
+
+    inicio = time.perf_counter()
+    biblioteca = Biblioteca()
+    for l in libros:
+        biblioteca.registrar_libro(l.id, l.titulo, l.autor, l.genero, l.anio)
+    reconstruccion = time.perf_counter() - inicio
+
+    print(f"{len(libros)} libros")
+    print(f"  mmap (abrir + primera búsqueda) : {apertura * 1000:10.3f} ms")
+    print(f"  biblioteca3 (registrar_libro)   : {reconstruccion * 1000:10.3f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Catálogo binario de libros (mmap).")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("convertir", help="convierte un CSV/JSONL de libros al formato binario")
+    p.add_argument("entrada")
+    p.add_argument("salida")
+    p = sub.add_parser("medir", help="compara el arranque con mmap contra reconstruir los árboles")
+    p.add_argument("archivo")
+    args = parser.parse_args(argv)
+
+    if args.comando == "convertir":
+        _convertir(args.entrada, args.salida)
+    else:
+        _medir(args.archivo)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
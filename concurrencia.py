@@ -0,0 +1,403 @@
+"""
+concurrencia.py
+Modo seguro para hilos de Biblioteca (motores en memoria: biblioteca3, biblioteca2).
+
+Sin sincronización, dos hilos que prestan el mismo libro pueden pasar ambos la
+comprobación 'libro.disponible' y prestarlo dos veces. BibliotecaConcurrente
+envuelve un motor y coordina el acceso con dos niveles de bloqueo:
+
+ - LockLectorEscritor (preferencia de escritores):
+     * lectura  : búsquedas, listados, consultas... y también préstamos y
+                  devoluciones, que no cambian la forma de los árboles.
+     * escritura: registros (insertan en los árboles y en el grafo), exclusivos.
+ - Bloqueos por franjas (striping): prestar/devolver toman además el lock de
+   la franja del libro y los de las franjas de los usuarios que tocan (quien
+   lo tiene y el primero en la cola de espera). Operaciones sobre libros y
+   usuarios distintos corren en paralelo; las que comparten libro o usuario
+   se serializan. Orden de adquisición fijo (franja del libro, luego franjas
+   de usuario ascendentes) para que no haya interbloqueos.
+ - Las estructuras que todo préstamo actualiza, sea cual sea el libro (grafo,
+   recomendaciones y analítica en biblioteca3; autocompletado en biblioteca2),
+   son globales: el motor las actualiza y las consulta bajo
+   'exclusion_interacciones', un Lock breve.
+
+Uso:
+    bib = BibliotecaConcurrente()                 # biblioteca3.Biblioteca por defecto
+    bib.prestar_libro(10, 1)                      # desde cualquier hilo
+    python concurrencia.py --hilos 16 --operaciones 200000   # prueba de estrés
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from biblioteca3 import Biblioteca
+
+FRANJAS_POR_DEFECTO = 64
+
+
+# ---------------------------
+# LOCK LECTOR / ESCRITOR
+# ---------------------------
+
+class LockLectorEscritor:
+    """
+    Muchos lectores o un solo escritor. Un escritor en espera bloquea a los
+    lectores nuevos, así un flujo continuo de lecturas no lo deja sin turno.
+    No es reentrante.
+    """
+    def __init__(self):
+        self._condicion = threading.Condition(threading.Lock())
+        self._lectores = 0
+        self._escribiendo = False
+        self._escritores_esperando = 0
+
+    def adquirir_lectura(self):
+        with self._condicion:
+            while self._escribiendo or self._escritores_esperando:
+                self._condicion.wait()
+            self._lectores += 1
+
+    def liberar_lectura(self):
+        with self._condicion:
+            self._lectores -= 1
+            if not self._lectores:
+                self._condicion.notify_all()
+
+    def adquirir_escritura(self):
+        with self._condicion:
+            self._escritores_esperando += 1
+            while self._escribiendo or self._lectores:
+                self._condicion.wait()
+            self._escritores_esperando -= 1
+            self._escribiendo = True
+
+    def liberar_escritura(self):
+        with self._condicion:
+            self._escribiendo = False
+            self._condicion.notify_all()
+
+    @contextmanager
+    def lectura(self):
+        self.adquirir_lectura()
+        try:
+            yield
+        finally:
+            self.liberar_lectura()
+
+    @contextmanager
+    def escritura(self):
+        self.adquirir_escritura()
+        try:
+            yield
+        finally:
+            self.liberar_escritura()
+
+
+# ---------------------------
+# BIBLIOTECA CONCURRENTE
+# ---------------------------
+
+class BibliotecaConcurrente:
+    """
+    Envoltorio seguro para hilos con la API pública del motor: las mutaciones
+    y consultas con sincronización propia tienen su método; el resto de las
+    consultas se delegan solo si están en LECTURAS.
+    Los iteradores (iterar_libros, iterar_usuarios) se recorren por páginas:
+    cada página se lee con el lock de lectura tomado, y entre páginas no se
+    retiene ningún lock.
+    """
+    TAMANIO_PAGINA = 256
+
+    def __init__(self, biblioteca=None, franjas=FRANJAS_POR_DEFECTO):
+        self.biblioteca = biblioteca if biblioteca is not None else Biblioteca()
+        self.lock = LockLectorEscritor()
+        self.franjas = franjas
+        self._locks_libros = [threading.Lock() for _ in range(franjas)]
+        self._locks_usuarios = [threading.Lock() for _ in range(franjas)]
+        # grafo, recomendaciones y analítica se actualizan desde préstamos de
+        # franjas distintas: esa parte se serializa con su propio lock
+        self.biblioteca.exclusion_interacciones = threading.Lock()
+
+    def _franja(self, clave):
+        return hash(clave) % self.franjas
+
+    @contextmanager
+    def _bloquear(self, id_libro, involucrados=None):
+        """
+        Toma la franja del libro y luego las de los usuarios (sin repetir, en
+        orden ascendente). 'involucrados' es una función que retorna los ids de
+        usuario; se evalúa ya dentro de la franja del libro, porque quién lo
+        tiene y quién espera solo cambian con ese lock tomado.
+        """
+        with self._locks_libros[self._franja(id_libro)]:
+            usuarios = involucrados() if involucrados is not None else ()
+            franjas = sorted({self._franja(u) for u in usuarios if u is not None})
+            tomados = []
+            try:
+                for f in franjas:
+                    self._locks_usuarios[f].acquire()
+                    tomados.append(f)
+                yield
+            finally:
+                for f in reversed(tomados):
+                    self._locks_usuarios[f].release()
+
+    def _involucrados_devolucion(self, id_libro):
+        """Quien tiene el libro y el primero en su cola de espera."""
+        titular = self.biblioteca.prestamos_activos.get(id_libro)
+        cola = self.biblioteca.solicitudes.colas.get(id_libro)
+        return (titular.id if titular is not None else None, cola[0] if cola else None)
+
+    # ---------- mutaciones estructurales (lock de escritura) ----------
+    def registrar_libro(self, id, titulo, autor, genero, anio):
+        with self.lock.escritura():
+            return self.biblioteca.registrar_libro(id, titulo, autor, genero, anio)
+
+    def registrar_usuario(self, id, nombre, correo):
+        with self.lock.escritura():
+            return self.biblioteca.registrar_usuario(id, nombre, correo)
+
+    def registrar_libros_lote(self, registros):
+        with self.lock.escritura():
+            return self.biblioteca.registrar_libros_lote(registros)
+
+    def registrar_usuarios_lote(self, registros):
+        with self.lock.escritura():
+            return self.biblioteca.registrar_usuarios_lote(registros)
+
+    # ---------- préstamos (lectura + franjas) ----------
+    def prestar_libro(self, id_usuario, id_libro):
+        with self.lock.lectura(), self._bloquear(id_libro, lambda: (id_usuario,)):
+            return self.biblioteca.prestar_libro(id_usuario, id_libro)
+
+    def devolver_libro(self, id_libro):
+        with self.lock.lectura(), self._bloquear(id_libro, lambda: self._involucrados_devolucion(id_libro)):
+            return self.biblioteca.devolver_libro(id_libro)
+
+    def prestar_lote(self, transacciones):
+        # un lote toca muchos libros: se aplica entero con el lock exclusivo
+        with self.lock.escritura():
+            return self.biblioteca.prestar_lote(transacciones)
+
+    def devolver_lote(self, ids_libros):
+        with self.lock.escritura():
+            return self.biblioteca.devolver_lote(ids_libros)
+
+    def cancelar_solicitud(self, id_usuario, id_libro):
+        with self.lock.lectura(), self._bloquear(id_libro):
+            return self.biblioteca.cancelar_solicitud(id_usuario, id_libro)
+
+    def posicion_en_espera(self, id_usuario, id_libro):
+        with self.lock.lectura(), self._bloquear(id_libro):
+            return self.biblioteca.posicion_en_espera(id_usuario, id_libro)
+
+    # ---------- consultas (lectura) ----------
+    def buscar_libro_por_id(self, id):
+        with self.lock.lectura():
+            return self.biblioteca.buscar_libro_por_id(id)
+
+    def buscar_usuario_por_id(self, id):
+        with self.lock.lectura():
+            return self.biblioteca.buscar_usuario_por_id(id)
+
+    def solicitudes_en_espera(self, id_libro):
+        with self.lock.lectura():
+            return self.biblioteca.solicitudes_en_espera(id_libro)
+
+    def conexiones_de(self, id, tipo=None):
+        with self.lock.lectura():
+            return self.biblioteca.conexiones_de(id, tipo)
+
+    def listar_todos_los_libros(self, desde=None, hasta=None, limite=None):
+        with self.lock.lectura():
+            return self.biblioteca.listar_todos_los_libros(desde, hasta, limite)
+
+    def listar_todos_los_usuarios(self, desde=None, hasta=None, limite=None):
+        with self.lock.lectura():
+            return self.biblioteca.listar_todos_los_usuarios(desde, hasta, limite)
+
+    def _paginar(self, listar, desde, hasta, limite):
+        producidos = 0
+        while limite is None or producidos < limite:
+            pedir = self.TAMANIO_PAGINA + (1 if producidos else 0)
+            with self.lock.lectura():
+                pagina = listar(desde, hasta, pedir)
+            if producidos and pagina and pagina[0].id == desde:
+                pagina = pagina[1:]  # 'desde' es inclusivo: el último ya se entregó
+            if not pagina:
+                return
+            for elemento in pagina:
+                if limite is not None and producidos >= limite:
+                    return
+                yield elemento
+                producidos += 1
+            if len(pagina) < self.TAMANIO_PAGINA:
+                return
+            desde = pagina[-1].id
+
+    def iterar_libros(self, desde=None, hasta=None, limite=None):
+        return self._paginar(self.biblioteca.listar_todos_los_libros, desde, hasta, limite)
+
+    def iterar_usuarios(self, desde=None, hasta=None, limite=None):
+        return self._paginar(self.biblioteca.listar_todos_los_usuarios, desde, hasta, limite)
+
+    # Consultas que se delegan con el lock de lectura tomado. El lock de lectura
+    # no excluye a los préstamos: solo entran lecturas que no modifican nada ni
+    # recorren estructuras que un préstamo cambia, o que dentro del motor se
+    # sincronizan con 'exclusion_interacciones' (grafo, recomendaciones,
+    # analítica, autocompletado y el bitmap de disponibilidad). Un método nuevo
+    # del motor no se expone hasta agregarlo aquí (y a la mezcla de prueba_estres).
+    LECTURAS = frozenset({
+        # biblioteca3 y biblioteca2
+        "iterar_libros_por_prefijo_titulo", "pagina_libros", "pagina_usuarios",
+        # biblioteca3
+        "iterar_libros_por_prefijo_autor", "buscar_libros", "consultar_libros", "planificar_consulta",
+        "usuarios_cercanos", "mas_conectados", "tamanio_comunidad", "num_comunidades",
+        "libros_similares", "recomendar_para_usuario",
+        # biblioteca2
+        "buscar_libros_por_titulo", "buscar_libros_por_autor",
+        "buscar_libros_por_titulo_aproximado", "buscar_libros_por_autor_aproximado",
+        "sugerir_titulos", "sugerir_autores",
+    })
+
+    def __getattr__(self, nombre):
+        if nombre not in self.LECTURAS:
+            raise AttributeError(f"{type(self).__name__} no expone '{nombre}' (ver LECTURAS)")
+        # AttributeError también si el motor envuelto no tiene esa consulta
+        atributo = getattr(self.__dict__.get("biblioteca"), nombre)
+
+        def con_lectura(*args, **kwargs):
+            with self.lock.lectura():
+                resultado = atributo(*args, **kwargs)
+                # los generadores se materializan dentro del lock
+                return list(resultado) if hasattr(resultado, "__next__") else resultado
+        return con_lectura
+
+
+# ---------------------------
+# PRUEBA DE ESTRÉS
+# ---------------------------
+
+def verificar_invariantes(biblioteca):
+    """
+    Retorna la lista de violaciones encontradas (vacía si todo es coherente):
+     - un libro no disponible tiene exactamente un titular en prestamos_activos,
+       y un libro disponible ninguno;
+     - cada préstamo activo aparece una sola vez, en la pila de su titular y
+       en la de ningún otro usuario;
+     - ninguna solicitud en espera corresponde a un libro disponible sin titular;
+     - el bitmap de disponibilidad (consultas.py) coincide con cada libro.
+    """
+    errores = []
+    activos = biblioteca.prestamos_activos
+    for libro in biblioteca.iterar_libros():
+        titular = activos.get(libro.id)
+        if libro.disponible and titular is not None:
+            errores.append(f"Libro {libro.id} disponible pero prestado a {titular.id}.")
+        if not libro.disponible and titular is None:
+            errores.append(f"Libro {libro.id} no disponible y sin titular.")
+    vistos = {}
+    for usuario in biblioteca.iterar_usuarios():
+        for id_libro in usuario.prestamos:
+            if id_libro in vistos:
+                errores.append(f"Libro {id_libro} prestado a {vistos[id_libro]} y a {usuario.id}.")
+            vistos[id_libro] = usuario.id
+    for id_libro, titular in activos.items():
+        if vistos.get(id_libro) != titular.id:
+            errores.append(f"El préstamo de {id_libro} no está en la pila de {titular.id}.")
+    if len(vistos) != len(activos):
+        errores.append(f"{len(vistos)} préstamos en pilas y {len(activos)} préstamos activos.")
+    for id_usuario, id_libro in biblioteca.solicitudes:
+        if id_libro not in activos:
+            errores.append(f"Solicitud de {id_usuario} por {id_libro}, que está libre.")
+    indices = getattr(biblioteca, "indices_libros", None)
+    if indices is not None:
+        for libro in biblioteca.iterar_libros():
+            if (indices.posicion[libro.id] in indices.disponibles) != libro.disponible:
+                errores.append(f"Bitmap de disponibilidad desactualizado para el libro {libro.id}.")
+    return errores
+
+
+def prueba_estres(hilos=8, operaciones=100_000, libros=200, usuarios=100, semilla=0, biblioteca=None):
+    """
+    Ejecuta préstamos, devoluciones, consultas y registros mezclados desde un
+    pool de hilos sobre una BibliotecaConcurrente y verifica las invariantes.
+    Pocos libros a propósito: fuerza contención sobre las mismas franjas.
+    Retorna (segundos, violaciones).
+    """
+    bib = BibliotecaConcurrente(biblioteca)
+    bib.registrar_libros_lote([(i, f"Libro {i}", f"Autor {i % 7}", "novela", 2000) for i in range(libros)])
+    bib.registrar_usuarios_lote([(u, f"Usuario {u}", f"u{u}@correo.com") for u in range(usuarios)])
+    contador = iter(range(libros, libros + operaciones))
+    # las consultas que tenga el motor (con método propio o en LECTURAS), bajo préstamos concurrentes
+    consultas = {
+        "conexiones_de": lambda rng: bib.conexiones_de(rng.randrange(usuarios)),
+        "pagina_libros": lambda rng: bib.pagina_libros("titulo", None, 20),
+        "iterar_libros_por_prefijo_titulo": lambda rng: bib.iterar_libros_por_prefijo_titulo("libro 1", 20),
+        "iterar_libros_por_prefijo_autor": lambda rng: bib.iterar_libros_por_prefijo_autor("autor", 20),
+        "buscar_libros": lambda rng: bib.buscar_libros(f"libro {rng.randrange(libros)}"),
+        "consultar_libros": lambda rng: bib.consultar_libros("novela", 1990, 2010, True, 50),
+        "libros_similares": lambda rng: bib.libros_similares(rng.randrange(libros), 5),
+        "recomendar_para_usuario": lambda rng: bib.recomendar_para_usuario(rng.randrange(usuarios), 5),
+        "usuarios_cercanos": lambda rng: bib.usuarios_cercanos(rng.randrange(libros), 3),
+        "mas_conectados": lambda rng: bib.mas_conectados(k=5),
+        "tamanio_comunidad": lambda rng: bib.tamanio_comunidad(rng.randrange(usuarios)),
+        "buscar_libros_por_titulo": lambda rng: bib.buscar_libros_por_titulo(f"libro {rng.randrange(10)}"),
+        "buscar_libros_por_titulo_aproximado": lambda rng: bib.buscar_libros_por_titulo_aproximado("librp 1"),
+        "sugerir_titulos": lambda rng: bib.sugerir_titulos("libro 1", 5),
+    }
+    consultas = [consulta for nombre, consulta in consultas.items() if hasattr(bib.biblioteca, nombre)]
+
+    def trabajador(indice):
+        rng = random.Random(semilla * 1000 + indice)
+        for _ in range(operaciones // hilos):
+            r = rng.random()
+            if r < 0.40:
+                bib.prestar_libro(rng.randrange(usuarios), rng.randrange(libros))
+            elif r < 0.75:
+                bib.devolver_libro(rng.randrange(libros))
+            elif r < 0.80:
+                bib.cancelar_solicitud(rng.randrange(usuarios), rng.randrange(libros))
+            elif r < 0.95:
+                bib.buscar_libro_por_id(rng.randrange(libros))
+                bib.buscar_usuario_por_id(rng.randrange(usuarios))
+            elif r < 0.99:
+                if consultas:
+                    rng.choice(consultas)(rng)
+            elif r < 0.995:
+                sum(1 for _ in bib.iterar_libros(limite=300))
+            else:
+                bib.registrar_libro(next(contador), "Nuevo", "Autor", "ensayo", 2024)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        for futuro in [pool.submit(trabajador, i) for i in range(hilos)]:
+            futuro.result()
+    segundos = time.perf_counter() - inicio
+    return segundos, verificar_invariantes(bib.biblioteca)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de estrés de BibliotecaConcurrente.")
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--operaciones", type=int, default=100_000)
+    parser.add_argument("--libros", type=int, default=200)
+    parser.add_argument("--usuarios", type=int, default=100)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    segundos, errores = prueba_estres(args.hilos, args.operaciones, args.libros, args.usuarios, args.semilla)
+    print(f"{args.operaciones} operaciones con {args.hilos} hilos en {segundos:.2f}s")
+    for error in errores[:20]:
+        print("  VIOLACIÓN:", error)
+    print("Invariantes OK" if not errores else f"{len(errores)} violaciones")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
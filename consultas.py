@@ -0,0 +1,232 @@
+"""
+consultas.py
+Índices secundarios de libros y planificador de consultas compuestas
+("novelas disponibles de 1990 a 2000") para biblioteca3.
+
+ - Cada libro recibe una posición (orden de registro) y los índices son
+   bitmaps sobre esas posiciones (bytearray: marcar un bit es O(1)).
+ - Género: diccionario género plegado -> bitmap.
+ - Año: ArbolMap año -> bitmap; un rango de años une los bitmaps de los
+   años del rango (hay pocos años distintos, no pocos libros).
+ - Disponibilidad: un bitmap que se actualiza en cada préstamo y devolución.
+ - Planificador: estima cuántos libros deja pasar cada condición con los
+   contadores de los bitmaps y empieza por la más selectiva. Si deja pocos
+   candidatos, los recorre y prueba las demás condiciones bit a bit; si no,
+   intersecta los bitmaps completos como enteros (AND en C, no en Python).
+
+Uso:
+    indices = IndicesSecundarios()
+    indices.agregar(libro)                 # al registrar
+    indices.actualizar_disponible(libro)   # al prestar / devolver
+    indices.consultar(genero="novela", anio_desde=1990, anio_hasta=2000, disponible=True)
+"""
+
+import re
+
+from estructuras import ArbolMap
+from indices import plegar
+
+# bits encendidos de cada byte posible, y búsqueda de bytes no nulos en C
+_BITS = [tuple(i for i in range(8) if b >> i & 1) for b in range(256)]
+_NO_NULO = re.compile(rb"[^\x00]")
+
+
+def posiciones(datos):
+    """Posiciones de los bits encendidos (bytes little-endian), en orden ascendente."""
+    bits = _BITS
+    for m in _NO_NULO.finditer(datos):
+        i = m.start()
+        base = i * 8
+        for bit in bits[datos[i]]:
+            yield base + bit
+
+
+def anio_como_entero(anio):
+    """El año como int (la interfaz lo entrega como texto); None si no es un número."""
+    try:
+        return int(str(anio).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------------------
+# BITMAP
+# ---------------------------
+
+class Bitmap:
+    """Conjunto de posiciones no negativas en un bytearray, con su cantidad al día."""
+    __slots__ = ("bits", "cantidad")
+
+    def __init__(self):
+        self.bits = bytearray()
+        self.cantidad = 0
+
+    def __len__(self):
+        return self.cantidad
+
+    def __contains__(self, posicion):
+        i = posicion >> 3
+        return i < len(self.bits) and self.bits[i] >> (posicion & 7) & 1 == 1
+
+    def agregar(self, posicion):
+        i = posicion >> 3
+        if i >= len(self.bits):
+            self.bits.extend(bytes(i - len(self.bits) + 1))
+        mascara = 1 << (posicion & 7)
+        if not self.bits[i] & mascara:
+            self.bits[i] |= mascara
+            self.cantidad += 1
+
+    def quitar(self, posicion):
+        i = posicion >> 3
+        mascara = 1 << (posicion & 7)
+        if i < len(self.bits) and self.bits[i] & mascara:
+            self.bits[i] &= ~mascara
+            self.cantidad -= 1
+
+    def entero(self):
+        """El bitmap como int (bit i = posición i), para combinarlo con & | ~ en C."""
+        return int.from_bytes(self.bits, "little")
+
+    def __iter__(self):
+        return posiciones(self.bits)
+
+
+# ---------------------------
+# ÍNDICES SECUNDARIOS
+# ---------------------------
+
+# Una condición que deja pasar menos de total / RECORRER libros se resuelve
+# recorriendo sus candidatos; si no, intersectando bitmaps completos.
+RECORRER = 32
+
+
+class IndicesSecundarios:
+    def __init__(self):
+        self.libros = []                # posición -> Libro
+        self.posicion = {}              # id_libro -> posición
+        self.por_genero = {}            # género plegado -> Bitmap
+        self.por_anio = ArbolMap()      # año (int) -> Bitmap
+        self.disponibles = Bitmap()
+
+    def __len__(self):
+        return len(self.libros)
+
+    # ---------- mantenimiento ----------
+    def agregar(self, libro):
+        if libro.id in self.posicion:
+            return False
+        p = len(self.libros)
+        self.libros.append(libro)
+        self.posicion[libro.id] = p
+        genero = plegar(libro.genero)
+        bitmap = self.por_genero.get(genero)
+        if bitmap is None:
+            bitmap = self.por_genero[genero] = Bitmap()
+        bitmap.agregar(p)
+        anio = anio_como_entero(libro.anio)
+        if anio is not None:
+            bitmap = self.por_anio.buscar(anio)
+            if bitmap is None:
+                bitmap = Bitmap()
+                self.por_anio.insertar(anio, bitmap)
+            bitmap.agregar(p)
+        if libro.disponible:
+            self.disponibles.agregar(p)
+        return True
+
+    def actualizar_disponible(self, libro):
+        """Refleja libro.disponible en el bitmap de disponibilidad."""
+        p = self.posicion.get(libro.id)
+        if p is None:
+            return
+        if libro.disponible:
+            self.disponibles.agregar(p)
+        else:
+            self.disponibles.quitar(p)
+
+    # ---------- planificación ----------
+    def _condiciones(self, genero, anio_desde, anio_hasta, disponible):
+        """
+        [(nombre, estimado, bitmaps, negada)]: la condición se cumple si la
+        posición está en alguno de los bitmaps (o en ninguno, si es negada).
+        """
+        condiciones = []
+        if genero is not None:
+            bitmap = self.por_genero.get(plegar(genero))
+            bitmaps = [bitmap] if bitmap is not None else []
+            condiciones.append((f"genero={genero}", sum(map(len, bitmaps)), bitmaps, False))
+        if anio_desde is not None or anio_hasta is not None:
+            bitmaps = [b for _, b in self.por_anio.iterar(anio_desde, anio_hasta)]
+            condiciones.append((f"anio={anio_desde}..{anio_hasta}", sum(map(len, bitmaps)), bitmaps, False))
+        if disponible is not None:
+            if disponible:
+                condiciones.append(("disponible", len(self.disponibles), [self.disponibles], False))
+            else:
+                condiciones.append(("prestado", len(self.libros) - len(self.disponibles),
+                                    [self.disponibles], True))
+        condiciones.sort(key=lambda c: c[1])
+        return condiciones
+
+    def planificar(self, genero=None, anio_desde=None, anio_hasta=None, disponible=None):
+        """
+        (estrategia, [(condición, libros estimados)]) en el orden en que se
+        aplicarían. estrategia: 'vacio', 'todos', 'recorrer' o 'bitmaps'.
+        """
+        condiciones = self._condiciones(genero, anio_desde, anio_hasta, disponible)
+        return self._estrategia(condiciones), [(nombre, estimado) for nombre, estimado, _, _ in condiciones]
+
+    def _estrategia(self, condiciones):
+        if not condiciones:
+            return "todos"
+        if condiciones[0][1] == 0:
+            return "vacio"
+        if condiciones[0][1] * RECORRER < len(self.libros):
+            return "recorrer"
+        return "bitmaps"
+
+    # ---------- consulta ----------
+    def consultar(self, genero=None, anio_desde=None, anio_hasta=None, disponible=None, limite=None):
+        """Libros que cumplen todas las condiciones dadas, en orden de registro."""
+        if limite is not None and limite <= 0:
+            return []
+        condiciones = self._condiciones(genero, anio_desde, anio_hasta, disponible)
+        estrategia = self._estrategia(condiciones)
+        if estrategia == "vacio":
+            return []
+        if estrategia == "todos":
+            return self.libros[:limite]
+        if estrategia == "recorrer":
+            _, _, bitmaps, negada = condiciones[0]
+            if negada or len(bitmaps) > 1:
+                # complemento o unión de varios años: se arma como entero
+                candidatos = self._combinar(bitmaps, negada)
+            else:
+                candidatos = bitmaps[0].bits
+            resto = condiciones[1:]
+            seleccion = (p for p in posiciones(candidatos)
+                         if all(any(p in b for b in bs) != neg for _, _, bs, neg in resto))
+        else:
+            total = (1 << len(self.libros)) - 1
+            resultado = total
+            for _, _, bitmaps, negada in condiciones:
+                resultado &= self._entero(bitmaps, negada, total)
+                if not resultado:
+                    return []
+            seleccion = posiciones(resultado.to_bytes((len(self.libros) + 7) // 8, "little"))
+        libros = []
+        for p in seleccion:
+            libros.append(self.libros[p])
+            if limite is not None and len(libros) >= limite:
+                break
+        return libros
+
+    def _entero(self, bitmaps, negada, total):
+        union = 0
+        for bitmap in bitmaps:
+            union |= bitmap.entero()
+        return total & ~union if negada else union
+
+    def _combinar(self, bitmaps, negada):
+        total = (1 << len(self.libros)) - 1
+        return self._entero(bitmaps, negada, total).to_bytes((len(self.libros) + 7) // 8, "little")
@@ -0,0 +1,408 @@
+"""
+estructuras.py
+Estructuras de datos compartidas por las distintas versiones de la biblioteca.
+
+ - ArbolMap: árbol AVL (auto-balanceado) que mapea clave -> valor.
+   Todas las operaciones son iterativas: no hay recursión, por lo que no
+   existe límite de profundidad aunque las claves lleguen ordenadas.
+   Los recorridos (iterar, iterar_prefijo) son generadores perezosos con
+   límites de rango opcionales.
+ - ListasEspera: una cola FIFO de solicitudes por libro (id_libro -> cola de
+   id_usuario), sin duplicados (usuario, libro).
+ - compartir: internado de textos muy repetidos (autor, género) para que
+   todos los registros apunten a una sola copia.
+
+"""
+
+import sys
+from collections import deque
+
+# ---------------------------
+# ÁRBOL AVL (mapa clave -> valor)
+# ---------------------------
+
+class NodoArbol:
+    __slots__ = ("clave", "valor", "izquierdo", "derecho", "altura")
+
+    def __init__(self, clave, valor):
+        self.clave = clave
+        self.valor = valor
+        self.izquierdo = None
+        self.derecho = None
+        self.altura = 1
+
+
+def _altura(nodo):
+    return nodo.altura if nodo is not None else 0
+
+
+def _actualizar_altura(nodo):
+    hi = nodo.izquierdo.altura if nodo.izquierdo is not None else 0
+    hd = nodo.derecho.altura if nodo.derecho is not None else 0
+    nodo.altura = (hi if hi > hd else hd) + 1
+
+
+def _rotar_derecha(y):
+    x = y.izquierdo
+    y.izquierdo = x.derecho
+    x.derecho = y
+    _actualizar_altura(y)
+    _actualizar_altura(x)
+    return x
+
+
+def _rotar_izquierda(x):
+    y = x.derecho
+    x.derecho = y.izquierdo
+    y.izquierdo = x
+    _actualizar_altura(x)
+    _actualizar_altura(y)
+    return y
+
+
+def _balancear(nodo):
+    """Recalcula la altura y aplica la rotación necesaria. Retorna la nueva raíz del subárbol."""
+    _actualizar_altura(nodo)
+    factor = _altura(nodo.izquierdo) - _altura(nodo.derecho)
+    if factor > 1:
+        if _altura(nodo.izquierdo.izquierdo) < _altura(nodo.izquierdo.derecho):
+            nodo.izquierdo = _rotar_izquierda(nodo.izquierdo)
+        return _rotar_derecha(nodo)
+    if factor < -1:
+        if _altura(nodo.derecho.derecho) < _altura(nodo.derecho.izquierdo):
+            nodo.derecho = _rotar_derecha(nodo.derecho)
+        return _rotar_izquierda(nodo)
+    return nodo
+
+
+def _construir_balanceado(pares, inicio, fin):
+    """Construye un AVL perfectamente balanceado con pares[inicio:fin] (profundidad O(log n))."""
+    if inicio >= fin:
+        return None
+    medio = (inicio + fin) // 2
+    clave, valor = pares[medio]
+    nodo = NodoArbol(clave, valor)
+    nodo.izquierdo = _construir_balanceado(pares, inicio, medio)
+    nodo.derecho = _construir_balanceado(pares, medio + 1, fin)
+    _actualizar_altura(nodo)
+    return nodo
+
+
+class ArbolMap:
+    """
+    Árbol AVL que mapea clave -> valor (misma API que el ABB original).
+    Si el valor debe soportar múltiples elementos (p. ej. título con varios libros),
+    el 'valor' puede ser una lista y el método insertar lo agregará.
+    La altura se mantiene en O(log n) sin importar el orden de inserción.
+    """
+    def __init__(self):
+        self.raiz = None
+        self._tamanio = 0
+
+    def __len__(self):
+        return self._tamanio
+
+    def __contains__(self, clave):
+        return self._buscar_nodo(clave) is not None
+
+    def _rebalancear_camino(self, camino):
+        """Sube por el camino (raíz -> hoja) rebalanceando y re-enlazando cada subárbol."""
+        for i in range(len(camino) - 1, -1, -1):
+            nodo = camino[i]
+            nuevo = _balancear(nodo)
+            if nuevo is nodo:
+                continue
+            if i == 0:
+                self.raiz = nuevo
+            else:
+                padre = camino[i - 1]
+                if padre.izquierdo is nodo:
+                    padre.izquierdo = nuevo
+                else:
+                    padre.derecho = nuevo
+
+    def insertar(self, clave, valor, append_if_exists=False):
+        """
+        Inserta clave->valor. Si append_if_exists True y la clave existe:
+        - si el nodo.valor es lista -> se hace append,
+        - si no es lista -> lo reemplaza.
+        """
+        camino = []
+        nodo = self.raiz
+        while nodo is not None:
+            if clave < nodo.clave:
+                camino.append(nodo)
+                nodo = nodo.izquierdo
+            elif clave > nodo.clave:
+                camino.append(nodo)
+                nodo = nodo.derecho
+            else:
+                # clave ya existe
+                if append_if_exists and isinstance(nodo.valor, list):
+                    if isinstance(valor, list):
+                        nodo.valor.extend(valor)
+                    else:
+                        nodo.valor.append(valor)
+                else:
+                    nodo.valor = valor
+                return
+
+        nuevo = NodoArbol(clave, valor)
+        self._tamanio += 1
+        if not camino:
+            self.raiz = nuevo
+            return
+        padre = camino[-1]
+        if clave < padre.clave:
+            padre.izquierdo = nuevo
+        else:
+            padre.derecho = nuevo
+        self._rebalancear_camino(camino)
+
+    def cargar_ordenados(self, pares, append_if_exists=False):
+        """
+        Inserta en bloque pares (clave, valor) YA ORDENADOS por clave.
+        Fusiona con el contenido actual y reconstruye el árbol balanceado en O(n + m),
+        en lugar de m inserciones de O(log n) con sus rotaciones.
+        Claves repetidas siguen la misma regla que insertar(append_if_exists).
+        """
+        fusion = []
+        existentes = self.iterar()
+        actual = next(existentes, None)
+        anterior = None
+        for clave, valor in pares:
+            if anterior is not None and clave < anterior:
+                raise ValueError("cargar_ordenados requiere pares ordenados por clave")
+            anterior = clave
+            while actual is not None and actual[0] < clave:
+                fusion.append(actual)
+                actual = next(existentes, None)
+            if actual is not None and actual[0] == clave:
+                fusion.append(actual)
+                actual = next(existentes, None)
+            if fusion and fusion[-1][0] == clave:
+                previo = fusion[-1][1]
+                if append_if_exists and isinstance(previo, list):
+                    if isinstance(valor, list):
+                        previo.extend(valor)
+                    else:
+                        previo.append(valor)
+                else:
+                    fusion[-1] = (clave, valor)
+            else:
+                fusion.append((clave, valor))
+        while actual is not None:
+            fusion.append(actual)
+            actual = next(existentes, None)
+        self.raiz = _construir_balanceado(fusion, 0, len(fusion))
+        self._tamanio = len(fusion)
+
+    def _buscar_nodo(self, clave):
+        nodo = self.raiz
+        while nodo is not None:
+            if clave == nodo.clave:
+                return nodo
+            nodo = nodo.izquierdo if clave < nodo.clave else nodo.derecho
+        return None
+
+    def buscar(self, clave):
+        nodo = self._buscar_nodo(clave)
+        return nodo.valor if nodo is not None else None
+
+    def buscador(self, claves=()):
+        """
+        Retorna una función buscar(clave) con memoria: las 'claves' se resuelven
+        de antemano (cada una distinta una sola vez) y las demás en el primer uso.
+        Pensado para lotes que repiten claves; no ve inserciones posteriores.
+        """
+        encontrados = {clave: self.buscar(clave) for clave in set(claves)}
+
+        def buscar(clave):
+            if clave not in encontrados:
+                encontrados[clave] = self.buscar(clave)
+            return encontrados[clave]
+        return buscar
+
+    def eliminar(self, clave):
+        """Elimina la clave y retorna su valor (None si no existía)."""
+        camino = []
+        nodo = self.raiz
+        while nodo is not None and clave != nodo.clave:
+            camino.append(nodo)
+            nodo = nodo.izquierdo if clave < nodo.clave else nodo.derecho
+        if nodo is None:
+            return None
+        eliminado = nodo.valor
+
+        if nodo.izquierdo is not None and nodo.derecho is not None:
+            # nodo con dos hijos: sustituir por sucesor (mínimo en subárbol derecho)
+            camino.append(nodo)
+            sucesor = nodo.derecho
+            while sucesor.izquierdo is not None:
+                camino.append(sucesor)
+                sucesor = sucesor.izquierdo
+            nodo.clave, nodo.valor = sucesor.clave, sucesor.valor
+            nodo = sucesor
+
+        hijo = nodo.izquierdo if nodo.izquierdo is not None else nodo.derecho
+        if not camino:
+            self.raiz = hijo
+        else:
+            padre = camino[-1]
+            if padre.izquierdo is nodo:
+                padre.izquierdo = hijo
+            else:
+                padre.derecho = hijo
+        self._tamanio -= 1
+        self._rebalancear_camino(camino)
+        return eliminado
+
+    def iterar(self, desde=None, hasta=None, limite=None):
+        """
+        Generador de (clave, valor) en orden ascendente, sin recursión ni listas intermedias.
+        - desde / hasta: límites inclusivos opcionales del rango de claves.
+        - limite: número máximo de elementos a producir.
+        Solo visita los nodos del camino hacia 'desde' y los del rango pedido.
+        No modificar el árbol mientras se consume el generador.
+        """
+        if limite is not None and limite <= 0:
+            return
+        pila = []
+        nodo = self.raiz
+        while nodo is not None:
+            if desde is not None and nodo.clave < desde:
+                nodo = nodo.derecho
+            else:
+                pila.append(nodo)
+                nodo = nodo.izquierdo
+        producidos = 0
+        while pila:
+            nodo = pila.pop()
+            if hasta is not None and nodo.clave > hasta:
+                return
+            yield nodo.clave, nodo.valor
+            producidos += 1
+            if limite is not None and producidos >= limite:
+                return
+            nodo = nodo.derecho
+            while nodo is not None:
+                pila.append(nodo)
+                nodo = nodo.izquierdo
+
+    def iterar_prefijo(self, prefijo, limite=None):
+        """Generador de (clave, valor) cuyas claves (str) empiezan por 'prefijo'."""
+        for clave, valor in self.iterar(desde=prefijo, limite=limite):
+            if not clave.startswith(prefijo):
+                return
+            yield clave, valor
+
+    def iterar_valores(self, desde=None, hasta=None, limite=None):
+        """Igual que iterar(), pero solo produce los valores."""
+        for _, valor in self.iterar(desde, hasta, limite):
+            yield valor
+
+    def __iter__(self):
+        return self.iterar()
+
+    def inorder(self):
+        """Retorna lista de (clave, valor) en orden ascendente por clave."""
+        return list(self.iterar())
+
+    def valores(self):
+        """Retorna lista de valores (sin claves) en orden."""
+        return list(self.iterar_valores())
+
+
+# ---------------------------
+# LISTAS DE ESPERA POR LIBRO
+# ---------------------------
+
+class ListasEspera:
+    """
+    Solicitudes de préstamo en espera, agrupadas por libro.
+    - encolar / siguiente en O(1); cada devolución solo toca la cola de su libro.
+    - Una misma solicitud (usuario, libro) no se encola dos veces.
+    'tipo_cola' permite usar otra cola FIFO basada en deque (p. ej. ColaSolicitudes).
+    """
+    def __init__(self, tipo_cola=deque):
+        self.tipo_cola = tipo_cola
+        self.colas = {}          # id_libro -> cola de id_usuario
+        self.pendientes = set()  # (id_usuario, id_libro) en espera
+
+    def __len__(self):
+        return len(self.pendientes)
+
+    def __contains__(self, solicitud):
+        return solicitud in self.pendientes
+
+    def __iter__(self):
+        """Recorre las solicitudes como tuplas (id_usuario, id_libro), agrupadas por libro."""
+        for id_libro, cola in self.colas.items():
+            for id_usuario in cola:
+                yield id_usuario, id_libro
+
+    def encolar(self, id_usuario, id_libro):
+        """Agrega la solicitud al final de la cola del libro. False si ya estaba en espera."""
+        solicitud = (id_usuario, id_libro)
+        if solicitud in self.pendientes:
+            return False
+        cola = self.colas.get(id_libro)
+        if cola is None:
+            cola = self.colas[id_libro] = self.tipo_cola()
+        cola.append(id_usuario)
+        self.pendientes.add(solicitud)
+        return True
+
+    def siguiente(self, id_libro):
+        """Remueve y retorna el primer id_usuario en espera por el libro (None si no hay)."""
+        cola = self.colas.get(id_libro)
+        if not cola:
+            return None
+        id_usuario = cola.popleft()
+        if not cola:
+            del self.colas[id_libro]
+        self.pendientes.discard((id_usuario, id_libro))
+        return id_usuario
+
+    def cancelar(self, id_usuario, id_libro):
+        """Retira una solicitud concreta (O(longitud de la cola de ese libro))."""
+        if (id_usuario, id_libro) not in self.pendientes:
+            return False
+        cola = self.colas[id_libro]
+        cola.remove(id_usuario)
+        if not cola:
+            del self.colas[id_libro]
+        self.pendientes.discard((id_usuario, id_libro))
+        return True
+
+    def descartar(self, id_libro):
+        """Elimina todas las solicitudes de un libro y retorna cuántas había."""
+        cola = self.colas.pop(id_libro, None)
+        if not cola:
+            return 0
+        for id_usuario in cola:
+            self.pendientes.discard((id_usuario, id_libro))
+        return len(cola)
+
+    def longitud(self, id_libro):
+        cola = self.colas.get(id_libro)
+        return len(cola) if cola else 0
+
+    def posicion(self, id_usuario, id_libro):
+        """Posición (1 = siguiente) del usuario en la cola del libro, o None si no está."""
+        if (id_usuario, id_libro) not in self.pendientes:
+            return None
+        return self.colas[id_libro].index(id_usuario) + 1
+
+
+# ---------------------------
+# TEXTOS COMPARTIDOS
+# ---------------------------
+
+def compartir(texto):
+    """
+    Retorna la copia internada de 'texto' (sys.intern) si es un str.
+    Con miles de libros del mismo autor o género, cada registro guarda solo
+    un puntero a la misma cadena en lugar de su propia copia.
+    """
+    return sys.intern(texto) if type(texto) is str else texto
@@ -0,0 +1,152 @@
+"""
+grafo.py
+Grafo de interacciones usuario–libro de biblioteca3.
+
+ - Nodos con espacio de nombres: (USUARIO, id) y (LIBRO, id), así el usuario 5
+   y el libro 5 son nodos distintos.
+ - Adyacencia con diccionarios nodo -> {vecino: peso}: insertar una arista o
+   preguntar si existe es O(1) sin importar el grado del nodo. El peso cuenta
+   cuántas veces se repitió la interacción (préstamos del mismo libro).
+ - csr(): foto compacta en formato CSR (compressed sparse row) para análisis
+   del grafo completo. Con NumPy los arreglos son ndarray y los cálculos
+   (grados, pesos por nodo) son vectorizados; sin NumPy se usan array.array
+   y el mismo código funciona con bucles de Python.
+
+"""
+
+from array import array
+
+USUARIO = "usuario"
+LIBRO = "libro"
+
+
+def _numpy():
+    """NumPy es opcional: solo se importa al construir una foto CSR."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+# ---------------------------
+# GRAFO
+# ---------------------------
+
+class Grafo:
+    def __init__(self):
+        self.ady = {}          # (tipo, id) -> {(tipo, id): peso}
+        self.num_aristas = 0
+
+    def __len__(self):
+        return len(self.ady)
+
+    def __contains__(self, nodo):
+        return nodo in self.ady
+
+    def agregar_nodo(self, nodo):
+        if nodo not in self.ady:
+            self.ady[nodo] = {}
+
+    def agregar_arista(self, a, b, peso=1):
+        """Conecta a y b (no dirigido). Si la arista ya existía, suma 'peso'. Retorna el peso resultante."""
+        vecinos_a = self.ady.get(a)
+        if vecinos_a is None:
+            vecinos_a = self.ady[a] = {}
+        vecinos_b = self.ady.get(b)
+        if vecinos_b is None:
+            vecinos_b = self.ady[b] = {}
+        actual = vecinos_a.get(b)
+        if actual is None:
+            self.num_aristas += 1
+            actual = 0
+        vecinos_a[b] = vecinos_b[a] = actual + peso
+        return actual + peso
+
+    def vecinos(self, nodo):
+        return list(self.ady.get(nodo, ()))
+
+    def peso(self, a, b):
+        return self.ady.get(a, {}).get(b, 0)
+
+    def grado(self, nodo):
+        return len(self.ady.get(nodo, ()))
+
+    def csr(self):
+        """Foto inmutable del grafo en formato CSR (ver GrafoCSR)."""
+        return GrafoCSR(self)
+
+    def __repr__(self):
+        return f"Grafo({len(self.ady)} nodos, {self.num_aristas} aristas)"
+
+
+# ---------------------------
+# FOTO CSR
+# ---------------------------
+
+class GrafoCSR:
+    """
+    Grafo en formato CSR: los vecinos del nodo i son
+    indices[indptr[i]:indptr[i+1]], con sus pesos en el mismo rango de 'pesos'.
+     - nodos  : lista posición -> nodo (tipo, id)
+     - indice : dict nodo -> posición
+    Es una copia: los préstamos posteriores no la modifican.
+    """
+    def __init__(self, grafo):
+        np = _numpy()
+        self.nodos = list(grafo.ady)
+        self.indice = {nodo: i for i, nodo in enumerate(self.nodos)}
+        indice = self.indice
+        indptr = array("q", [0])
+        indices = array("q")
+        pesos = array("q")
+        total = 0
+        for nodo in self.nodos:
+            vecinos = grafo.ady[nodo]
+            indices.extend(indice[v] for v in vecinos)
+            pesos.extend(vecinos.values())
+            total += len(vecinos)
+            indptr.append(total)
+        if np is not None:
+            # frombuffer evita copiar elemento por elemento; copy() suelta el array.array
+            indptr = np.frombuffer(indptr, dtype=np.int64).copy()
+            indices = np.frombuffer(indices, dtype=np.int64).copy()
+            pesos = np.frombuffer(pesos, dtype=np.int64).copy()
+        self.np = np
+        self.indptr = indptr
+        self.indices = indices
+        self.pesos = pesos
+
+    def __len__(self):
+        return len(self.nodos)
+
+    @property
+    def num_aristas(self):
+        return len(self.indices) // 2
+
+    def vecinos(self, nodo):
+        i = self.indice.get(nodo)
+        if i is None:
+            return []
+        return [self.nodos[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def grados(self):
+        """Grado de cada nodo (en el orden de 'nodos')."""
+        if self.np is not None:
+            return self.np.diff(self.indptr)
+        return array("q", (self.indptr[i + 1] - self.indptr[i] for i in range(len(self.nodos))))
+
+    def pesos_por_nodo(self):
+        """Suma de los pesos de las aristas de cada nodo (préstamos totales del usuario o libro)."""
+        if self.np is not None:
+            np = self.np
+            filas = np.repeat(np.arange(len(self.nodos)), np.diff(self.indptr))
+            return np.bincount(filas, weights=self.pesos, minlength=len(self.nodos)).astype(np.int64)
+        return array("q", (sum(self.pesos[self.indptr[i]:self.indptr[i + 1]]) for i in range(len(self.nodos))))
+
+    def mascara(self, tipo):
+        """Posiciones de los nodos de un tipo (USUARIO o LIBRO)."""
+        posiciones = [i for i, nodo in enumerate(self.nodos) if nodo[0] == tipo]
+        if self.np is not None:
+            return self.np.asarray(posiciones, dtype=self.np.int64)
+        return array("q", posiciones)
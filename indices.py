@@ -0,0 +1,543 @@
+"""
+indices.py
+Índices auxiliares de búsqueda para la biblioteca.
+
+ - IndiceNgramas: índice invertido de n-gramas (trigramas por defecto) para
+   búsquedas por subcadena. Cada n-grama apunta al conjunto de identificadores
+   cuyo texto lo contiene; una consulta intersecta esas listas (empezando por
+   la más pequeña) y solo verifica con 'in' a los candidatos, así el costo
+   depende del número de coincidencias y no del tamaño del catálogo.
+ - IndiceBM25: búsqueda por palabras con ranking de relevancia BM25 sobre
+   varios campos (título, autor, género). Los términos se pliegan (sin tildes
+   ni mayúsculas), cada campo pesa distinto y el top-k se calcula con MaxScore:
+   en cuanto los términos que faltan no alcanzan para entrar al top-k, sus
+   listas ya no se recorren y solo se consultan para los candidatos.
+ - IndiceDifuso: búsqueda tolerante a errores de tipeo ("Borjes" -> Borges)
+   con un árbol BK sobre las claves plegadas. La desigualdad triangular de la
+   distancia de edición descarta ramas enteras, así una consulta calcula la
+   distancia contra una fracción pequeña de las claves.
+ - TrieAutocompletado: sugerencias por prefijo mientras se escribe. Trie
+   comprimido (aristas con varias letras) en el que cada nodo guarda sus k
+   completaciones más populares: sugerir es bajar por el prefijo y copiar esa
+   lista. Como la popularidad solo crece, sumar un préstamo solo toca los
+   nodos del camino de esa clave.
+
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+
+# ---------------------------
+# NORMALIZACIÓN
+# ---------------------------
+
+def normalizar(texto):
+    """Normalización usada por todos los índices textuales (igual que las claves de los árboles)."""
+    return str(texto).strip().lower()
+
+
+def plegar(texto):
+    """normalizar() sin tildes ni diacríticos: 'García Márquez' -> 'garcia marquez' (la ñ queda como n)."""
+    texto = normalizar(texto)
+    if texto.isascii():
+        return texto
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+
+_PALABRA = re.compile(r"\w+")
+
+def tokenizar(texto):
+    """Palabras plegadas del texto, en orden y con repeticiones."""
+    return _PALABRA.findall(plegar(texto))
+
+
+# ---------------------------
+# ÍNDICE DE N-GRAMAS
+# ---------------------------
+
+
+class IndiceNgramas:
+    """
+    Índice invertido n-grama -> set(identificadores).
+    El identificador puede ser cualquier valor hashable (id de libro, clave de
+    título, posición en un arreglo...). Se mantiene incrementalmente con agregar/eliminar.
+    """
+    def __init__(self, n=3):
+        self.n = n
+        self.postings = {}   # n-grama -> set de identificadores
+        self.textos = {}     # identificador -> texto normalizado
+        self.cortos = set()  # identificadores con texto de longitud < n (no generan n-gramas)
+
+    def __len__(self):
+        return len(self.textos)
+
+    def _ngramas(self, texto):
+        n = self.n
+        return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+    def agregar(self, identificador, texto):
+        """Indexa (o re-indexa) el texto asociado al identificador."""
+        if identificador in self.textos:
+            self.eliminar(identificador)
+        texto = normalizar(texto)
+        self.textos[identificador] = texto
+        if len(texto) < self.n:
+            self.cortos.add(identificador)
+            return
+        for gram in self._ngramas(texto):
+            lista = self.postings.get(gram)
+            if lista is None:
+                self.postings[gram] = {identificador}
+            else:
+                lista.add(identificador)
+
+    def eliminar(self, identificador):
+        texto = self.textos.pop(identificador, None)
+        if texto is None:
+            return False
+        if identificador in self.cortos:
+            self.cortos.discard(identificador)
+            return True
+        for gram in self._ngramas(texto):
+            lista = self.postings.get(gram)
+            if lista is not None:
+                lista.discard(identificador)
+                if not lista:
+                    del self.postings[gram]
+        return True
+
+    def candidatos(self, fragmento):
+        """Conjunto de identificadores que *podrían* contener el fragmento (sin verificar)."""
+        if len(fragmento) < self.n:
+            # fragmento corto: unir las listas de los n-gramas que lo contienen
+            # (el vocabulario de n-gramas está acotado, no depende del número de libros)
+            resultado = set(self.cortos)
+            for gram, lista in self.postings.items():
+                if fragmento in gram:
+                    resultado |= lista
+            return resultado
+        listas = []
+        for gram in self._ngramas(fragmento):
+            lista = self.postings.get(gram)
+            if lista is None:
+                return set()
+            listas.append(lista)
+        listas.sort(key=len)
+        resultado = set(listas[0])
+        for lista in listas[1:]:
+            resultado &= lista
+            if not resultado:
+                break
+        return resultado
+
+    def buscar(self, fragmento):
+        """Retorna el set de identificadores cuyo texto contiene el fragmento (case-insensitive)."""
+        fragmento = normalizar(fragmento)
+        if not fragmento:
+            return set(self.textos)
+        textos = self.textos
+        return {i for i in self.candidatos(fragmento) if fragmento in textos[i]}
+
+
+# ---------------------------
+# ÍNDICE BM25
+# ---------------------------
+
+# Una palabra del título describe más al libro que una del género.
+PESOS_CAMPOS = {"titulo": 2.0, "autor": 1.5, "genero": 1.0}
+
+
+class IndiceBM25:
+    """
+    Índice invertido término -> {identificador: frecuencia ponderada}.
+    La frecuencia de un término en un documento es la suma, por campo, de sus
+    apariciones por el peso del campo (BM25F simplificado); la longitud del
+    documento se mide igual. Se mantiene incrementalmente con agregar/eliminar.
+    """
+    def __init__(self, pesos=None, k1=1.2, b=0.75):
+        self.pesos = dict(pesos or PESOS_CAMPOS)
+        self.k1 = k1
+        self.b = b
+        self.postings = {}        # término -> {identificador: frecuencia ponderada}
+        self.longitudes = {}      # identificador -> longitud ponderada
+        self.longitud_total = 0.0
+
+    def __len__(self):
+        return len(self.longitudes)
+
+    def __contains__(self, identificador):
+        return identificador in self.longitudes
+
+    def _frecuencias(self, campos):
+        frecuencias, longitud = {}, 0.0
+        for campo, peso in self.pesos.items():
+            texto = campos.get(campo)
+            if texto is None:
+                continue
+            for termino in tokenizar(texto):
+                frecuencias[termino] = frecuencias.get(termino, 0.0) + peso
+                longitud += peso
+        return frecuencias, longitud
+
+    def agregar(self, identificador, campos):
+        """Indexa un documento nuevo; 'campos' es un dict campo -> texto. Retorna False si ya estaba."""
+        if identificador in self.longitudes:
+            return False
+        frecuencias, longitud = self._frecuencias(campos)
+        postings = self.postings
+        for termino, tf in frecuencias.items():
+            lista = postings.get(termino)
+            if lista is None:
+                postings[termino] = {identificador: tf}
+            else:
+                lista[identificador] = tf
+        self.longitudes[identificador] = longitud
+        self.longitud_total += longitud
+        return True
+
+    def eliminar(self, identificador, campos):
+        """Quita un documento; 'campos' deben ser los mismos con los que se agregó."""
+        longitud = self.longitudes.pop(identificador, None)
+        if longitud is None:
+            return False
+        self.longitud_total -= longitud
+        for termino in self._frecuencias(campos)[0]:
+            lista = self.postings.get(termino)
+            if lista is not None:
+                lista.pop(identificador, None)
+                if not lista:
+                    del self.postings[termino]
+        return True
+
+    def idf(self, termino):
+        n = len(self.longitudes)
+        df = len(self.postings.get(termino, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def buscar(self, consulta, k=10):
+        """
+        [(identificador, puntaje)] de los k documentos más relevantes, de mayor
+        a menor puntaje. Basta con que el documento tenga uno de los términos.
+        Los empates se ordenan por identificador: el orden no depende de k, así
+        que los primeros k de una búsqueda más larga son exactamente estos.
+        """
+        if k <= 0 or not self.longitudes:
+            return []
+        k1, b = self.k1, self.b
+        promedio = self.longitud_total / len(self.longitudes) or 1.0
+        longitudes = self.longitudes
+        terminos = []
+        for termino in set(tokenizar(consulta)):
+            lista = self.postings.get(termino)
+            if lista:
+                idf = self.idf(termino)
+                # tf / (tf + K) < 1, así que ningún documento saca más que idf * (k1 + 1)
+                terminos.append((idf * (k1 + 1), idf, lista))
+        if not terminos:
+            return []
+        # términos más raros (cota más alta) primero: generan pocos candidatos con puntaje alto
+        terminos.sort(key=lambda t: t[0], reverse=True)
+        restantes = [0.0] * (len(terminos) + 1)
+        for i in range(len(terminos) - 1, -1, -1):
+            restantes[i] = restantes[i + 1] + terminos[i][0]
+
+        acumulado = {}
+        umbral = 0.0    # k-ésimo mejor puntaje parcial (cota inferior del k-ésimo final)
+        for i, (_, idf, lista) in enumerate(terminos):
+            completo = len(acumulado) >= k and restantes[i] <= umbral
+            if not completo:
+                # un documento que aún no apareció todavía puede entrar al top-k
+                for id, tf in lista.items():
+                    s = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * longitudes[id] / promedio))
+                    acumulado[id] = acumulado.get(id, 0.0) + s
+            else:
+                # MaxScore: ya no entran documentos nuevos; se descartan los candidatos
+                # que no alcanzan el umbral ni sumando todo lo que falta
+                acumulado = {id: s for id, s in acumulado.items() if s + restantes[i] >= umbral}
+                if len(lista) < len(acumulado):
+                    pares = ((id, tf) for id, tf in lista.items() if id in acumulado)
+                else:
+                    pares = ((id, lista[id]) for id in acumulado if id in lista)
+                for id, tf in pares:
+                    acumulado[id] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * longitudes[id] / promedio))
+            if len(acumulado) >= k:
+                umbral = heapq.nlargest(k, acumulado.values())[-1]
+        return heapq.nsmallest(k, acumulado.items(), key=lambda par: (-par[1], _orden_id(par[0])))
+
+
+def _orden_id(identificador):
+    """Orden total entre ids enteros y de texto (los enteros primero)."""
+    return (1, identificador) if isinstance(identificador, str) else (0, identificador)
+
+
+# ---------------------------
+# BÚSQUEDA DIFUSA (ÁRBOL BK)
+# ---------------------------
+
+def distancia_edicion(a, b):
+    """
+    Distancia de Levenshtein (inserciones, borrados y sustituciones).
+    Algoritmo bit-paralelo de Myers/Hyyrö: una columna completa de la tabla de
+    programación dinámica cabe en un entero, así el costo es O(len(a)) operaciones
+    con enteros en vez de O(len(a) * len(b)) pasos de Python.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+    patron = {}
+    for i, c in enumerate(b):
+        patron[c] = patron.get(c, 0) | (1 << i)
+    mascara = (1 << m) - 1
+    ultimo = 1 << (m - 1)
+    pv, mv, distancia = mascara, 0, m
+    for c in a:
+        eq = patron.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mascara)
+        mh = pv & xh
+        if ph & ultimo:
+            distancia += 1
+        elif mh & ultimo:
+            distancia -= 1
+        ph = ((ph << 1) | 1) & mascara
+        mh = (mh << 1) & mascara
+        pv = mh | (~(xv | ph) & mascara)
+        mv = ph & xv
+    return distancia
+
+
+class IndiceDifuso:
+    """
+    Árbol BK: cada nodo guarda una clave plegada y sus hijos cuelgan según la
+    distancia a ella. Para buscar a distancia <= k de q, en un nodo a distancia
+    d solo pueden servir los hijos con arista en [d - k, d + k].
+    Varios identificadores pueden compartir clave ("García" y "Garcia").
+    Se mantiene incrementalmente con agregar/eliminar.
+    """
+    def __init__(self):
+        self.raiz = None
+        self.nodos = {}     # clave plegada -> nodo [clave, set(identificadores), {distancia: nodo}]
+        self.claves = {}    # identificador -> clave plegada
+
+    def __len__(self):
+        return len(self.claves)
+
+    def agregar(self, identificador, texto):
+        """Indexa (o re-indexa) el texto asociado al identificador."""
+        if identificador in self.claves:
+            self.eliminar(identificador)
+        clave = plegar(texto)
+        self.claves[identificador] = clave
+        nodo = self.nodos.get(clave)
+        if nodo is not None:
+            nodo[1].add(identificador)
+            return
+        nuevo = self.nodos[clave] = [clave, {identificador}, {}]
+        if self.raiz is None:
+            self.raiz = nuevo
+            return
+        nodo = self.raiz
+        while True:
+            d = distancia_edicion(clave, nodo[0])
+            hijo = nodo[2].get(d)
+            if hijo is None:
+                nodo[2][d] = nuevo
+                return
+            nodo = hijo
+
+    def eliminar(self, identificador):
+        """El nodo queda en el árbol (sostiene a sus hijos) pero sin identificadores."""
+        clave = self.claves.pop(identificador, None)
+        if clave is None:
+            return False
+        self.nodos[clave][1].discard(identificador)
+        return True
+
+    def buscar(self, texto, max_distancia=None, limite=None):
+        """
+        [(identificador, distancia)] a distancia <= max_distancia del texto, de
+        la más cercana a la más lejana. Sin max_distancia se tolera 1 error en
+        textos cortos (hasta 5 letras) y 2 en los demás.
+        """
+        consulta = plegar(texto)
+        if max_distancia is None:
+            max_distancia = 1 if len(consulta) <= 5 else 2
+        encontrados = []
+        pendientes = [self.raiz] if self.raiz is not None else []
+        while pendientes:
+            clave, identificadores, hijos = pendientes.pop()
+            d = distancia_edicion(consulta, clave)
+            if d <= max_distancia and identificadores:
+                encontrados.append((d, clave, identificadores))
+            for arista, hijo in hijos.items():
+                if d - max_distancia <= arista <= d + max_distancia:
+                    pendientes.append(hijo)
+        encontrados.sort(key=lambda e: (e[0], e[1]))
+        resultado = []
+        for d, _, identificadores in encontrados:
+            for identificador in sorted(identificadores, key=str):
+                resultado.append((identificador, d))
+                if limite is not None and len(resultado) >= limite:
+                    return resultado
+        return resultado
+
+
+# ---------------------------
+# AUTOCOMPLETADO (TRIE COMPRIMIDO)
+# ---------------------------
+
+class _NodoTrie:
+    __slots__ = ("etiqueta", "hijos", "clave", "top")
+
+    def __init__(self, etiqueta="", clave=None):
+        self.etiqueta = etiqueta   # letras de la arista que llega a este nodo
+        self.hijos = {}            # primera letra de la arista -> _NodoTrie
+        self.clave = clave         # clave plegada si una termina aquí
+        self.top = []              # claves del subárbol más populares, de mayor a menor
+
+
+class TrieAutocompletado:
+    """
+    Trie comprimido sobre claves plegadas, cada una con un puntaje (préstamos).
+    Cada nodo guarda en 'top' las k mejores claves de su subárbol, ordenadas por
+    (-puntaje, clave). Se mantiene incrementalmente con agregar/sumar.
+    """
+    def __init__(self, k=10):
+        self.k = k
+        self.raiz = _NodoTrie()
+        self.puntajes = {}    # clave plegada -> puntaje
+        self.textos = {}      # clave plegada -> texto a mostrar (el primero registrado)
+        self._plegados = {}   # texto tal como llega -> clave plegada (sumar no vuelve a plegar)
+
+    def __len__(self):
+        return len(self.puntajes)
+
+    def __contains__(self, texto):
+        return plegar(texto) in self.puntajes
+
+    def _orden(self, clave):
+        return (-self.puntajes[clave], clave)
+
+    def _plegar(self, texto):
+        clave = self._plegados.get(texto)
+        if clave is None:
+            clave = self._plegados[texto] = plegar(texto)
+        return clave
+
+    def _insertar(self, clave):
+        """Agrega la clave al trie (partiendo aristas si hace falta) y retorna el camino raíz -> nodo."""
+        nodo, camino, i = self.raiz, [self.raiz], 0
+        while i < len(clave):
+            hijo = nodo.hijos.get(clave[i])
+            if hijo is None:
+                hijo = nodo.hijos[clave[i]] = _NodoTrie(clave[i:])
+                camino.append(hijo)
+                nodo = hijo
+                break
+            etiqueta = hijo.etiqueta
+            comun = 1
+            while comun < len(etiqueta) and i + comun < len(clave) and etiqueta[comun] == clave[i + comun]:
+                comun += 1
+            if comun < len(etiqueta):
+                # partir la arista: el nodo intermedio hereda el subárbol (y su top) del hijo
+                medio = _NodoTrie(etiqueta[:comun])
+                medio.top = list(hijo.top)
+                hijo.etiqueta = etiqueta[comun:]
+                medio.hijos[hijo.etiqueta[0]] = hijo
+                nodo.hijos[clave[i]] = hijo = medio
+            camino.append(hijo)
+            nodo = hijo
+            i += comun
+        nodo.clave = clave
+        return camino
+
+    def _camino(self, clave):
+        nodo, camino, i = self.raiz, [self.raiz], 0
+        while i < len(clave):
+            nodo = nodo.hijos[clave[i]]
+            camino.append(nodo)
+            i += len(nodo.etiqueta)
+        return camino
+
+    def _subir(self, camino, clave):
+        """
+        Reubica 'clave' (cuyo puntaje acaba de crecer) en el top de los nodos del
+        camino, de la hoja a la raíz. El top de un ancestro es al menos tan
+        exigente como el de sus descendientes: si la clave no entra en un nodo,
+        tampoco entra más arriba.
+        """
+        k, puntajes = self.k, self.puntajes
+        orden = (-puntajes[clave], clave)
+        for nodo in reversed(camino):
+            top = nodo.top
+            try:
+                i = top.index(clave)
+            except ValueError:
+                if len(top) >= k:
+                    ultimo = top[-1]
+                    if orden >= (-puntajes[ultimo], ultimo):
+                        break
+                    top.pop()
+                top.append(clave)
+                i = len(top) - 1
+            # inserción: la clave solo puede avanzar hacia el frente
+            while i > 0:
+                previo = top[i - 1]
+                if (-puntajes[previo], previo) <= orden:
+                    break
+                top[i] = previo
+                i -= 1
+            top[i] = clave
+
+    def agregar(self, texto, puntaje=0):
+        """Indexa el texto (si su clave plegada ya estaba, no hace nada). Retorna False si ya estaba."""
+        clave = self._plegar(texto)
+        if clave in self.puntajes:
+            return False
+        self.puntajes[clave] = puntaje
+        self.textos[clave] = texto
+        self._subir(self._insertar(clave), clave)
+        return True
+
+    def sumar(self, texto, cantidad=1):
+        """Suma popularidad al texto (agregándolo si no estaba). Solo actualiza su camino."""
+        clave = self._plegar(texto)
+        if clave not in self.puntajes:
+            self.agregar(texto, cantidad)
+            return
+        self.puntajes[clave] += cantidad
+        self._subir(self._camino(clave), clave)
+
+    def sugerir(self, prefijo, k=None):
+        """[(texto, puntaje)] de las claves que empiezan con el prefijo, las más populares primero."""
+        k = self.k if k is None else k
+        prefijo = plegar(prefijo)
+        nodo, i = self.raiz, 0
+        while i < len(prefijo):
+            nodo = nodo.hijos.get(prefijo[i])
+            if nodo is None:
+                return []
+            etiqueta = nodo.etiqueta
+            tramo = prefijo[i:i + len(etiqueta)]
+            if not etiqueta.startswith(tramo):
+                return []
+            i += len(etiqueta)
+        if k <= self.k:
+            claves = nodo.top[:k]
+        else:
+            # más de lo que guarda cada nodo: recorrer el subárbol
+            claves, pendientes = [], [nodo]
+            while pendientes:
+                n = pendientes.pop()
+                if n.clave is not None:
+                    claves.append(n.clave)
+                pendientes.extend(n.hijos.values())
+            claves = heapq.nsmallest(k, claves, key=self._orden)
+        return [(self.textos[c], self.puntajes[c]) for c in claves]
@@ -0,0 +1,379 @@
+"""
+persistencia.py
+Durabilidad para Biblioteca: registro de escritura anticipada (WAL) + snapshots.
+
+ - Cada llamada que modifica el estado (registrar_*, prestar_libro, devolver_libro,
+   cancelar_solicitud, cargas y préstamos en lote) se agrega como un registro compacto
+   (una línea JSON con número de secuencia y CRC32) a un log de solo-agregar.
+ - Group commit: los registros se escriben al buffer del archivo y un solo fsync
+   cubre varios de ellos. El nivel de durabilidad es configurable:
+     * "sincrona" : fsync en cada operación (no se pierde nada confirmado).
+     * "grupo"    : fsync cada 'lote_fsync' registros o cada 'intervalo_fsync'
+                    segundos (un hilo lo garantiza aunque no haya tráfico).
+     * "ninguna"  : solo el buffer del sistema operativo (máximo throughput).
+ - Cada 'snapshot_cada' operaciones se guarda una foto completa del estado
+   (pickle, escrita de forma atómica) y se rota el log: la recuperación carga el
+   snapshot y solo re-ejecuta la cola del log posterior a él.
+
+Uso:
+    bib = BibliotecaPersistente("datos/")      # recupera el estado si existe
+    bib.prestar_libro(1, 10)                    # se registra y se aplica
+    bib.cerrar()                                # fsync + snapshot final
+
+    python persistencia.py --operaciones 50000 --durabilidad grupo   # mide overhead y recuperación
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+from biblioteca3 import Biblioteca
+
+DURABILIDADES = ("sincrona", "grupo", "ninguna")
+
+# código corto en el log -> método de Biblioteca
+OPERACIONES = {
+    "rl": "registrar_libro",
+    "ru": "registrar_usuario",
+    "pl": "prestar_libro",
+    "dl": "devolver_libro",
+    "cs": "cancelar_solicitud",
+    "ll": "registrar_libros_lote",
+    "ul": "registrar_usuarios_lote",
+    "pb": "prestar_lote",
+    "db": "devolver_lote",
+}
+
+ARCHIVO_SNAPSHOT = "snapshot.pkl"
+PREFIJO_LOG = "wal-"
+
+
+# ---------------------------
+# FORMATO DEL LOG
+# ---------------------------
+
+def codificar(lsn, op, args):
+    cuerpo = json.dumps([lsn, op, *args], separators=(",", ":"), ensure_ascii=False)
+    return f"{cuerpo}\t{zlib.crc32(cuerpo.encode('utf-8')):08x}\n"
+
+
+def decodificar(linea):
+    """Retorna (lsn, op, args) o None si la línea está incompleta o corrupta."""
+    if not linea.endswith("\n"):
+        return None
+    cuerpo, _, crc = linea[:-1].rpartition("\t")
+    if not cuerpo or crc != f"{zlib.crc32(cuerpo.encode('utf-8')):08x}":
+        return None
+    try:
+        lsn, op, *args = json.loads(cuerpo)
+    except (ValueError, TypeError):
+        return None
+    return lsn, op, args
+
+
+def segmentos_log(directorio):
+    """Archivos de log ordenados por su primer LSN: [(lsn_inicial, ruta)]."""
+    segmentos = []
+    for nombre in os.listdir(directorio):
+        if nombre.startswith(PREFIJO_LOG) and nombre.endswith(".log"):
+            segmentos.append((int(nombre[len(PREFIJO_LOG):-4]), os.path.join(directorio, nombre)))
+    return sorted(segmentos)
+
+
+def leer_log(ruta):
+    """Generador de (lsn, op, args); se detiene en el primer registro incompleto (cola rota)."""
+    with open(ruta, encoding="utf-8", newline="\n") as f:
+        for linea in f:
+            registro = decodificar(linea)
+            if registro is None:
+                return
+            yield registro
+
+
+def _fsync_directorio(directorio):
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directorio, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+# ---------------------------
+# BIBLIOTECA PERSISTENTE
+# ---------------------------
+
+class BibliotecaPersistente:
+    """
+    Envoltorio de una Biblioteca que registra cada mutación en el WAL.
+    Las consultas (buscar_*, listar_*, conexiones_de, ...) se delegan sin costo extra.
+    Solo las mutaciones hechas a través de este objeto quedan registradas.
+    """
+    def __init__(self, directorio, fabrica=Biblioteca, durabilidad="grupo", lote_fsync=128,
+                 intervalo_fsync=0.05, snapshot_cada=100_000):
+        if durabilidad not in DURABILIDADES:
+            raise ValueError(f"durabilidad debe ser una de {DURABILIDADES}")
+        self.directorio = directorio
+        self.fabrica = fabrica
+        self.durabilidad = durabilidad
+        self.lote_fsync = lote_fsync
+        self.intervalo_fsync = intervalo_fsync
+        self.snapshot_cada = snapshot_cada
+
+        self._cerrojo = threading.Lock()
+        self._archivo = None
+        self._pendientes = 0          # registros escritos desde el último fsync
+        self._ultimo_fsync = time.monotonic()
+        self._desde_snapshot = 0      # operaciones desde el último snapshot
+        self.estadisticas = {"registros": 0, "fsyncs": 0, "bytes": 0, "snapshots": 0}
+
+        os.makedirs(directorio, exist_ok=True)
+        self.biblioteca, self.lsn = self._recuperar()
+        self._abrir_segmento(self.lsn + 1)
+
+        self._detener = threading.Event()
+        self._hilo = None
+        if durabilidad == "grupo":
+            self._hilo = threading.Thread(target=self._sincronizar_periodicamente, daemon=True)
+            self._hilo.start()
+
+    # ---------- Recuperación ----------
+    def _recuperar(self):
+        inicio = time.perf_counter()
+        ruta_snapshot = os.path.join(self.directorio, ARCHIVO_SNAPSHOT)
+        if os.path.exists(ruta_snapshot):
+            with open(ruta_snapshot, "rb") as f:
+                lsn, biblioteca = pickle.load(f)
+        else:
+            lsn, biblioteca = 0, self.fabrica()
+        lsn_snapshot = lsn
+
+        reaplicados = fallidos = 0
+        for _, ruta in segmentos_log(self.directorio):
+            for registro_lsn, op, args in leer_log(ruta):
+                if registro_lsn <= lsn:
+                    continue
+                try:
+                    getattr(biblioteca, OPERACIONES[op])(*args)
+                except Exception:
+                    # también falló al ejecutarse la primera vez (se registra antes de
+                    # aplicar): al reproducirla sobre el mismo estado queda igual
+                    fallidos += 1
+                lsn = registro_lsn
+                reaplicados += 1
+
+        self.estadisticas["recuperacion"] = {
+            "lsn_snapshot": lsn_snapshot,
+            "registros_reaplicados": reaplicados,
+            "registros_con_error": fallidos,
+            "segundos": round(time.perf_counter() - inicio, 4),
+        }
+        self._desde_snapshot = reaplicados
+        return biblioteca, lsn
+
+    # ---------- Log ----------
+    def _abrir_segmento(self, lsn_inicial):
+        ruta = os.path.join(self.directorio, f"{PREFIJO_LOG}{lsn_inicial:012d}.log")
+        # un segmento con este nombre solo puede existir sin registros válidos (cola rota
+        # de una caída justo tras rotar): se reemplaza
+        self._archivo = open(ruta, "w", encoding="utf-8", newline="\n", buffering=1 << 16)
+        _fsync_directorio(self.directorio)
+
+    def _sincronizar(self):
+        """flush + fsync de lo pendiente (llamar con el cerrojo tomado)."""
+        if self._pendientes == 0:
+            return
+        self._archivo.flush()
+        if self.durabilidad != "ninguna":
+            os.fsync(self._archivo.fileno())
+            self.estadisticas["fsyncs"] += 1
+        self._pendientes = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def _sincronizar_periodicamente(self):
+        while not self._detener.wait(self.intervalo_fsync):
+            with self._cerrojo:
+                if self._archivo is not None:
+                    self._sincronizar()
+
+    def _registrar(self, op, args):
+        """Agrega el registro al log (llamar con el cerrojo tomado)."""
+        linea = codificar(self.lsn + 1, op, args)
+        self._archivo.write(linea)
+        self.lsn += 1
+        self._pendientes += 1
+        self.estadisticas["registros"] += 1
+        self.estadisticas["bytes"] += len(linea)
+        if self.durabilidad == "sincrona":
+            self._sincronizar()
+        elif self.durabilidad == "grupo" and (
+                self._pendientes >= self.lote_fsync
+                or time.monotonic() - self._ultimo_fsync >= self.intervalo_fsync):
+            self._sincronizar()
+        self._desde_snapshot += 1
+
+    def _aplicar(self, op, *args):
+        # Registrar y aplicar bajo el mismo cerrojo: el orden del log es el orden en
+        # que se aplicaron. Se registra antes (escritura anticipada): si escribir
+        # falla, el estado en memoria no cambió; si la operación lanza una excepción,
+        # la recuperación la reproduce igual.
+        with self._cerrojo:
+            self._registrar(op, args)
+            resultado = getattr(self.biblioteca, OPERACIONES[op])(*args)
+        if self.snapshot_cada and self._desde_snapshot >= self.snapshot_cada:
+            self.snapshot()
+        return resultado
+
+    # ---------- Snapshots ----------
+    def snapshot(self):
+        """Guarda el estado completo de forma atómica y rota el log. Retorna la duración (s)."""
+        inicio = time.perf_counter()
+        with self._cerrojo:
+            self._sincronizar()
+            lsn = self.lsn
+            descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+            with os.fdopen(descriptor, "wb") as f:
+                pickle.dump((lsn, self.biblioteca), f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, os.path.join(self.directorio, ARCHIVO_SNAPSHOT))
+            self._archivo.close()
+            self._abrir_segmento(lsn + 1)
+            # los segmentos anteriores quedan cubiertos por el snapshot
+            for lsn_inicial, ruta in segmentos_log(self.directorio):
+                if lsn_inicial <= lsn:
+                    os.remove(ruta)
+            _fsync_directorio(self.directorio)
+            self._desde_snapshot = 0
+            self.estadisticas["snapshots"] += 1
+        return time.perf_counter() - inicio
+
+    def sincronizar(self):
+        """Fuerza el fsync de los registros pendientes."""
+        with self._cerrojo:
+            self._sincronizar()
+
+    def cerrar(self, snapshot_final=True):
+        """Cierre ordenado: detiene el hilo de fsync, sincroniza y (opcional) guarda un snapshot."""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+        if snapshot_final:
+            self.snapshot()
+        with self._cerrojo:
+            self._sincronizar()
+            self._archivo.close()
+            self._archivo = None
+
+    # ---------- Mutaciones registradas ----------
+    def registrar_libro(self, id, titulo, autor, genero, anio):
+        return self._aplicar("rl", id, titulo, autor, genero, anio)
+
+    def registrar_usuario(self, id, nombre, correo):
+        return self._aplicar("ru", id, nombre, correo)
+
+    def prestar_libro(self, id_usuario, id_libro):
+        return self._aplicar("pl", id_usuario, id_libro)
+
+    def devolver_libro(self, id_libro):
+        return self._aplicar("dl", id_libro)
+
+    def cancelar_solicitud(self, id_usuario, id_libro):
+        return self._aplicar("cs", id_usuario, id_libro)
+
+    # Los lotes se materializan en una lista pero se pasan los registros
+    # originales: los rechazados que retorna la biblioteca son los mismos
+    # objetos que recibió el llamador (json guarda las tuplas como listas).
+    def registrar_libros_lote(self, registros):
+        return self._aplicar("ll", list(registros))
+
+    def registrar_usuarios_lote(self, registros):
+        return self._aplicar("ul", list(registros))
+
+    def prestar_lote(self, transacciones):
+        # un solo registro para todo el lote
+        return self._aplicar("pb", list(transacciones))
+
+    def devolver_lote(self, ids_libros):
+        return self._aplicar("db", list(ids_libros))
+
+    # ---------- Consultas ----------
+    def __getattr__(self, nombre):
+        # solo se llama para atributos que no existen aquí: se delega a la biblioteca
+        biblioteca = self.__dict__.get("biblioteca")
+        if biblioteca is None:
+            raise AttributeError(nombre)
+        return getattr(biblioteca, nombre)
+
+
+# ---------------------------
+# MEDICIÓN
+# ---------------------------
+
+def medir(operaciones, durabilidad, libros, usuarios, semilla=42):
+    """Overhead del log por operación y tiempo de recuperación para el log resultante."""
+    from benchmark import generar_catalogo, generar_operaciones, generar_usuarios, MEZCLA_POR_DEFECTO
+
+    catalogo, titulos = generar_catalogo(libros, "aleatorio", semilla)
+    lista_usuarios = generar_usuarios(usuarios, "aleatorio", semilla)
+    carga = generar_operaciones(operaciones, [c[0] for c in catalogo], [u[0] for u in lista_usuarios],
+                                titulos, {k: v for k, v in MEZCLA_POR_DEFECTO.items() if k != "buscar"}, semilla)
+
+    def ejecutar(bib):
+        inicio = time.perf_counter()
+        for datos in lista_usuarios:
+            bib.registrar_usuario(*datos)
+        for datos in catalogo:
+            bib.registrar_libro(*datos)
+        for op in carga:
+            if op[0] == "prestar":
+                bib.prestar_libro(op[1], op[2])
+            else:
+                bib.devolver_libro(op[1])
+        return time.perf_counter() - inicio
+
+    total = len(lista_usuarios) + len(catalogo) + len(carga)
+    base = ejecutar(Biblioteca())
+    with tempfile.TemporaryDirectory() as directorio:
+        bib = BibliotecaPersistente(directorio, durabilidad=durabilidad, snapshot_cada=0)
+        con_log = ejecutar(bib)
+        bib.cerrar(snapshot_final=False)
+        tamanio = sum(os.path.getsize(r) for _, r in segmentos_log(directorio))
+        recuperada = BibliotecaPersistente(directorio, durabilidad=durabilidad, snapshot_cada=0)
+        recuperacion = recuperada.estadisticas["recuperacion"]
+        recuperada.cerrar(snapshot_final=False)
+
+    return {
+        "durabilidad": durabilidad,
+        "operaciones": total,
+        "sin_log_us_por_op": round(base / total * 1e6, 2),
+        "con_log_us_por_op": round(con_log / total * 1e6, 2),
+        "overhead_us_por_op": round((con_log - base) / total * 1e6, 2),
+        "fsyncs": bib.estadisticas["fsyncs"],
+        "log_bytes": tamanio,
+        "recuperacion_s": recuperacion["segundos"],
+        "registros_reaplicados": recuperacion["registros_reaplicados"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Overhead del WAL y tiempo de recuperación.")
+    parser.add_argument("--operaciones", type=int, default=50_000)
+    parser.add_argument("--libros", type=int, default=10_000)
+    parser.add_argument("--usuarios", type=int, default=2_000)
+    parser.add_argument("--durabilidad", choices=DURABILIDADES + ("todas",), default="todas")
+    args = parser.parse_args(argv)
+    niveles = DURABILIDADES if args.durabilidad == "todas" else (args.durabilidad,)
+    for nivel in niveles:
+        print(json.dumps(medir(args.operaciones, nivel, args.libros, args.usuarios), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+recomendaciones.py
+"Quienes pidieron este libro también pidieron...": recomendaciones por
+co-préstamo sobre el grafo de interacciones de biblioteca3.
+
+ - Contadores de co-ocurrencia incrementales: cuando un usuario pide por
+   primera vez un libro B, B se cuenta junto a cada libro que ese usuario ya
+   había pedido (O(libros del usuario)); préstamos repetidos no cuentan de
+   nuevo. co[A][B] = número de usuarios que pidieron A y B.
+ - Tabla top-k por libro en caché: se calcula al consultarla y solo se
+   recalcula si la fila de ese libro cambió desde entonces (marca de
+   "sucio"), así una consulta cuesta una búsqueda en diccionario y las
+   actualizaciones no recorren el catálogo.
+ - Recomendaciones por usuario: se combinan las tablas top-k de sus libros
+   (suma de co-préstamos), excluyendo lo que ya pidió.
+
+"""
+
+import heapq
+
+from grafo import LIBRO, USUARIO
+
+
+class Recomendador:
+    def __init__(self, grafo, k=10):
+        self.grafo = grafo
+        self.k = k
+        self.co = {}            # id_libro -> {id_libro: usuarios en común}
+        self.lectores = {}      # id_libro -> número de usuarios distintos
+        self._tabla = {}        # id_libro -> [(id_libro, co-préstamos)] (top-k)
+        self._sucios = set()    # libros cuya fila cambió desde el último cálculo
+
+    # ---------- actualización ----------
+    def nueva_interaccion(self, id_usuario, id_libro):
+        """Llamar cuando el usuario pide el libro por primera vez (arista nueva en el grafo)."""
+        co = self.co
+        fila = co.get(id_libro)
+        if fila is None:
+            fila = co[id_libro] = {}
+        for tipo, otro in self.grafo.ady.get((USUARIO, id_usuario), ()):
+            if tipo != LIBRO or otro == id_libro:
+                continue
+            fila[otro] = fila.get(otro, 0) + 1
+            fila_otro = co.get(otro)
+            if fila_otro is None:
+                fila_otro = co[otro] = {}
+            fila_otro[id_libro] = fila_otro.get(id_libro, 0) + 1
+            self._sucios.add(otro)
+        self._sucios.add(id_libro)
+        self.lectores[id_libro] = self.lectores.get(id_libro, 0) + 1
+
+    def reconstruir(self):
+        """Recalcula todos los contadores desde el grafo (p. ej. tras cargar un grafo existente)."""
+        self.co, self.lectores, self._tabla, self._sucios = {}, {}, {}, set()
+        co, lectores = self.co, self.lectores
+        for (tipo, _), vecinos in self.grafo.ady.items():
+            if tipo != USUARIO:
+                continue
+            libros = [id for t, id in vecinos if t == LIBRO]
+            for i, a in enumerate(libros):
+                lectores[a] = lectores.get(a, 0) + 1
+                fila = co.get(a)
+                if fila is None:
+                    fila = co[a] = {}
+                for b in libros[:i]:
+                    fila[b] = fila.get(b, 0) + 1
+                    fila_b = co.get(b)
+                    if fila_b is None:
+                        fila_b = co[b] = {}
+                    fila_b[a] = fila_b.get(a, 0) + 1
+        self._sucios.update(co)
+
+    # ---------- consultas ----------
+    def _top(self, id_libro):
+        fila = self.co.get(id_libro)
+        if fila is None:
+            return []       # libro sin co-préstamos (o inexistente): no se guarda en la caché
+        if id_libro in self._sucios or id_libro not in self._tabla:
+            lectores = self.lectores
+            # desempate: el libro más leído primero
+            self._tabla[id_libro] = heapq.nlargest(
+                self.k, fila.items(), key=lambda par: (par[1], lectores.get(par[0], 0)))
+            self._sucios.discard(id_libro)
+        return self._tabla[id_libro]
+
+    def similares(self, id_libro, k=None):
+        """Hasta k libros (id, co-préstamos) más pedidos por los mismos usuarios."""
+        if k is not None and k <= 0:
+            return []
+        top = self._top(id_libro)
+        if k is None or k == self.k:
+            return list(top)
+        if k < self.k:
+            return top[:k]
+        fila = self.co.get(id_libro, {})
+        return heapq.nlargest(k, fila.items(), key=lambda par: (par[1], self.lectores.get(par[0], 0)))
+
+    def para_usuario(self, id_usuario, k=None):
+        """Hasta k libros (id, puntaje) recomendados según todo lo que pidió el usuario."""
+        if k is None:
+            k = self.k
+        pedidos = {id for t, id in self.grafo.ady.get((USUARIO, id_usuario), ()) if t == LIBRO}
+        puntajes = {}
+        for id_libro in pedidos:
+            for otro, cuenta in self._top(id_libro):
+                if otro not in pedidos:
+                    puntajes[otro] = puntajes.get(otro, 0) + cuenta
+        return heapq.nlargest(k, puntajes.items(), key=lambda par: (par[1], self.lectores.get(par[0], 0)))
@@ -0,0 +1,418 @@
+"""
+servidor.py
+Servicio de red (asyncio, solo biblioteca estándar) sobre una única Biblioteca.
+
+Protocolo: JSON por líneas sobre TCP. Cada petición es un objeto en una línea
+    {"id": 7, "op": "prestar_libro", "args": [10, 1]}
+y cada respuesta, también en una línea y en el mismo orden de llegada:
+    {"id": 7, "ok": true, "mensaje": "Libro 'Rayuela' prestado a Ana."}
+    {"id": 8, "ok": true, "resultado": [{...}, ...]}        (consultas)
+    {"id": 9, "ok": false, "error": "Operación desconocida: 'x'."}
+
+ - Pipelining: el cliente puede enviar muchas peticiones sin esperar las
+   respuestas. Por conexión, un lector ejecuta las peticiones y deja las
+   respuestas en una cola acotada ('profundidad'); un escritor las envía en
+   orden. Si el cliente no lee, la cola se llena y el lector deja de leer
+   (contrapresión en lugar de memoria sin límite).
+ - Concurrencia acotada: como máximo 'max_conexiones' conexiones atendidas a la
+   vez; las demás esperan en el backlog hasta que se libere un lugar.
+ - Las operaciones corren en el hilo del bucle de eventos, de a una: la
+   Biblioteca no necesita bloqueos y el orden de las mutaciones es el de llegada.
+ - Apagado ordenado (SIGINT/SIGTERM o detener()): se deja de aceptar, se
+   terminan las peticiones ya leídas, se cierran las conexiones y se llama a
+   biblioteca.cerrar() si existe (con --directorio: fsync del log + snapshot).
+
+Uso:
+    python servidor.py servir --modulo biblioteca3 --puerto 8765 --directorio datos/
+    python servidor.py carga --puerto 8765 --conexiones 8 --peticiones 50000
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import random
+import signal
+import sys
+import time
+
+from benchmark import generar_catalogo, generar_usuarios, percentil
+
+PROFUNDIDAD_POR_DEFECTO = 64
+MAX_CONEXIONES_POR_DEFECTO = 256
+LIMITE_LINEA = 1 << 20
+
+
+# ---------------------------
+# OPERACIONES
+# ---------------------------
+
+def libro_a_dict(libro):
+    return {"id": libro.id, "titulo": libro.titulo, "autor": libro.autor,
+            "genero": libro.genero, "anio": libro.anio, "disponible": libro.disponible}
+
+
+def usuario_a_dict(usuario):
+    return {"id": usuario.id, "nombre": usuario.nombre, "correo": usuario.correo,
+            "prestamos": list(usuario.prestamos)}
+
+
+def _buscar_por_titulo(bib, fragmento, limite=None):
+    if hasattr(bib, "buscar_libros_por_titulo"):
+        libros = bib.buscar_libros_por_titulo(fragmento)
+        return [libro_a_dict(l) for l in (libros[:limite] if limite is not None else libros)]
+    # biblioteca3 no tiene búsqueda por fragmento: se usa el prefijo del título
+    return [libro_a_dict(l) for l in bib.iterar_libros_por_prefijo_titulo(fragmento, limite)]
+
+
+def _buscar_por_autor(bib, fragmento, limite=None):
+    if hasattr(bib, "buscar_libros_por_autor"):
+        libros = bib.buscar_libros_por_autor(fragmento)
+        return [libro_a_dict(l) for l in (libros[:limite] if limite is not None else libros)]
+    # ídem: en biblioteca3, prefijo del autor
+    return [libro_a_dict(l) for l in bib.iterar_libros_por_prefijo_autor(fragmento, limite)]
+
+
+def _buscar_libros(bib, consulta, pagina=1, por_pagina=20):
+    return [dict(libro_a_dict(l), puntaje=round(p, 4)) for l, p in bib.buscar_libros(consulta, pagina, por_pagina)]
+
+
+def _opcional(funcion, convertir):
+    def consulta(bib, *args):
+        valor = funcion(bib, *args)
+        return convertir(valor) if valor is not None else None
+    return consulta
+
+
+# nombre -> (función(biblioteca, *args), es_consulta)
+# Las mutaciones retornan (bool, mensaje); las consultas y los lotes, datos JSON.
+OPERACIONES = {
+    "registrar_libro": (lambda b, *a: b.registrar_libro(*a), False),
+    "registrar_usuario": (lambda b, *a: b.registrar_usuario(*a), False),
+    "prestar_libro": (lambda b, *a: b.prestar_libro(*a), False),
+    "devolver_libro": (lambda b, *a: b.devolver_libro(*a), False),
+    "cancelar_solicitud": (lambda b, *a: b.cancelar_solicitud(*a), False),
+    "prestar_lote": (lambda b, transacciones: [list(r) for r in b.prestar_lote(transacciones)], True),
+    "devolver_lote": (lambda b, ids_libros: [list(r) for r in b.devolver_lote(ids_libros)], True),
+    "buscar_libro_por_id": (_opcional(lambda b, id: b.buscar_libro_por_id(id), libro_a_dict), True),
+    "buscar_usuario_por_id": (_opcional(lambda b, id: b.buscar_usuario_por_id(id), usuario_a_dict), True),
+    "buscar_libros_por_titulo": (_buscar_por_titulo, True),
+    "buscar_libros_por_autor": (_buscar_por_autor, True),
+    "buscar_libros": (_buscar_libros, True),
+    "consultar_libros": (lambda b, genero=None, anio_desde=None, anio_hasta=None, disponible=None, limite=100:
+                         [libro_a_dict(l) for l in b.consultar_libros(genero, anio_desde, anio_hasta,
+                                                                      disponible, limite)], True),
+    "listar_libros": (lambda b, desde=None, hasta=None, limite=100:
+                      [libro_a_dict(l) for l in b.iterar_libros(desde, hasta, limite)], True),
+    "listar_usuarios": (lambda b, desde=None, hasta=None, limite=100:
+                        [usuario_a_dict(u) for u in b.iterar_usuarios(desde, hasta, limite)], True),
+    "conexiones_de": (lambda b, id, tipo=None: [list(c) for c in b.conexiones_de(id, tipo)], True),
+    "posicion_en_espera": (lambda b, *a: b.posicion_en_espera(*a), True),
+    "solicitudes_en_espera": (lambda b, *a: b.solicitudes_en_espera(*a), True),
+    "ping": (lambda b: "pong", True),
+}
+
+
+def atender(biblioteca, linea):
+    """Ejecuta una línea de petición y retorna la respuesta (dict). Nunca lanza."""
+    try:
+        peticion = json.loads(linea)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return {"id": None, "ok": False, "error": f"JSON inválido: {e}"}
+    if not isinstance(peticion, dict):
+        return {"id": None, "ok": False, "error": "Se esperaba un objeto JSON."}
+    id_peticion = peticion.get("id")
+    op = peticion.get("op")
+    args = peticion.get("args") or []
+    entrada = OPERACIONES.get(op)
+    if entrada is None:
+        return {"id": id_peticion, "ok": False, "error": f"Operación desconocida: {op!r}."}
+    if not isinstance(args, list):
+        return {"id": id_peticion, "ok": False, "error": "'args' debe ser una lista."}
+    funcion, es_consulta = entrada
+    try:
+        resultado = funcion(biblioteca, *args)
+    except TypeError as e:
+        return {"id": id_peticion, "ok": False, "error": f"Argumentos inválidos para '{op}': {e}"}
+    except Exception as e:  # un error en una petición no debe tumbar la conexión
+        return {"id": id_peticion, "ok": False, "error": f"{type(e).__name__}: {e}"}
+    if es_consulta:
+        return {"id": id_peticion, "ok": True, "resultado": resultado}
+    ok, mensaje = resultado
+    return {"id": id_peticion, "ok": ok, "mensaje": mensaje}
+
+
+# ---------------------------
+# SERVIDOR
+# ---------------------------
+
+class ServidorBiblioteca:
+    """Servidor TCP de JSON por líneas. Ver el docstring del módulo."""
+    def __init__(self, biblioteca, host="127.0.0.1", puerto=8765,
+                 max_conexiones=MAX_CONEXIONES_POR_DEFECTO, profundidad=PROFUNDIDAD_POR_DEFECTO):
+        self.biblioteca = biblioteca
+        self.host = host
+        self.puerto = puerto
+        self.profundidad = profundidad
+        self._cupos = asyncio.Semaphore(max_conexiones)
+        self._servidor = None
+        self._conexiones = set()
+        self._detenido = None
+        self.estadisticas = {"conexiones": 0, "peticiones": 0}
+
+    async def iniciar(self):
+        self._detenido = asyncio.Event()
+        self._servidor = await asyncio.start_server(self._atender_conexion, self.host, self.puerto,
+                                                    limit=LIMITE_LINEA)
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+        return self
+
+    async def _atender_conexion(self, lector, escritor):
+        tarea = asyncio.current_task()
+        self._conexiones.add(tarea)
+        try:
+            async with self._cupos:
+                self.estadisticas["conexiones"] += 1
+                respuestas = asyncio.Queue(self.profundidad)
+                envio = asyncio.create_task(self._enviar(respuestas, escritor))
+                try:
+                    await self._leer(lector, respuestas, envio)
+                except asyncio.CancelledError:
+                    pass  # apagado: se envía lo ya ejecutado y se cierra
+                finally:
+                    await self._encolar(respuestas, None, envio)
+                    try:
+                        await envio
+                    except (ConnectionError, asyncio.CancelledError):
+                        pass
+        except asyncio.CancelledError:
+            pass  # apagado mientras esperaba un cupo
+        finally:
+            escritor.close()
+            self._conexiones.discard(tarea)
+
+    async def _leer(self, lector, respuestas, envio):
+        while True:
+            try:
+                linea = await lector.readline()
+            except (ConnectionError, ValueError):
+                # ValueError: línea más larga que LIMITE_LINEA
+                return
+            if not linea:
+                return
+            if not linea.strip():
+                continue
+            self.estadisticas["peticiones"] += 1
+            if not await self._encolar(respuestas, atender(self.biblioteca, linea), envio):
+                return
+
+    @staticmethod
+    async def _encolar(respuestas, respuesta, envio):
+        """
+        Deja la respuesta en la cola esperando lugar (contrapresión), salvo que
+        el escritor haya terminado: si la conexión se cayó nadie vacía la cola
+        y un put() esperaría para siempre. Retorna False si ya no hay escritor.
+        """
+        if envio.done():
+            return False
+        if not respuestas.full():
+            respuestas.put_nowait(respuesta)
+            return True
+        poner = asyncio.ensure_future(respuestas.put(respuesta))
+        try:
+            await asyncio.wait({poner, envio}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not poner.done():
+                poner.cancel()
+        return poner.done() and not poner.cancelled() and not envio.done()
+
+    async def _enviar(self, respuestas, escritor):
+        while True:
+            respuesta = await respuestas.get()
+            if respuesta is None:
+                break
+            # se agrupan en una sola escritura las respuestas ya listas
+            partes = [json.dumps(respuesta, ensure_ascii=False)]
+            fin = False
+            while not respuestas.empty():
+                siguiente = respuestas.get_nowait()
+                if siguiente is None:
+                    fin = True
+                    break
+                partes.append(json.dumps(siguiente, ensure_ascii=False))
+            escritor.write(("\n".join(partes) + "\n").encode("utf-8"))
+            await escritor.drain()
+            if fin:
+                break
+
+    async def servir(self):
+        """Atiende hasta que se llame a detener(); luego apaga en orden."""
+        if self._servidor is None:
+            await self.iniciar()
+        try:
+            await self._detenido.wait()
+        finally:
+            await self._apagar()
+
+    def detener(self):
+        if self._detenido is not None:
+            self._detenido.set()
+
+    async def _apagar(self, espera=5.0):
+        self._servidor.close()
+        await self._servidor.wait_closed()
+        conexiones = list(self._conexiones)
+        for tarea in conexiones:
+            tarea.cancel()
+        if conexiones:
+            await asyncio.wait(conexiones, timeout=espera)
+        cerrar = getattr(self.biblioteca, "cerrar", None)
+        if cerrar is not None:
+            cerrar()
+
+
+# ---------------------------
+# CLIENTE DE CARGA
+# ---------------------------
+
+async def _conexion_carga(host, puerto, peticiones, profundidad, latencias, errores):
+    lector, escritor = await asyncio.open_connection(host, puerto, limit=LIMITE_LINEA)
+    envios = {}
+    ventana = asyncio.Semaphore(profundidad)
+
+    async def recibir():
+        for _ in range(len(peticiones)):
+            linea = await lector.readline()
+            if not linea:
+                raise ConnectionError("El servidor cerró la conexión.")
+            respuesta = json.loads(linea)
+            latencias.append(time.perf_counter_ns() - envios.pop(respuesta["id"]))
+            if "error" in respuesta:
+                errores.append(respuesta["error"])
+            ventana.release()
+
+    receptor = asyncio.create_task(recibir())
+    for peticion in peticiones:
+        await ventana.acquire()
+        envios[peticion["id"]] = time.perf_counter_ns()
+        escritor.write(json.dumps(peticion).encode("utf-8") + b"\n")
+        if ventana.locked():
+            await escritor.drain()
+    await escritor.drain()
+    await receptor
+    escritor.close()
+    await escritor.wait_closed()
+
+
+def generar_peticiones(n, ids_libros, ids_usuarios, titulos, semilla=0):
+    """Mezcla de préstamos, devoluciones, búsquedas y consultas por id."""
+    rng = random.Random(semilla)
+    peticiones = []
+    for i in range(n):
+        r = rng.random()
+        if r < 0.35:
+            op, args = "prestar_libro", [rng.choice(ids_usuarios), rng.choice(ids_libros)]
+        elif r < 0.65:
+            op, args = "devolver_libro", [rng.choice(ids_libros)]
+        elif r < 0.85:
+            titulo = rng.choice(titulos)
+            op, args = "buscar_libros_por_titulo", [titulo[:rng.randint(3, 8)], 20]
+        else:
+            op, args = "buscar_libro_por_id", [rng.choice(ids_libros)]
+        peticiones.append({"id": i, "op": op, "args": args})
+    return peticiones
+
+
+async def carga(host, puerto, conexiones, peticiones, profundidad, ids_libros, ids_usuarios, titulos, semilla=0):
+    """Reparte las peticiones entre 'conexiones' clientes con pipelining y retorna métricas."""
+    todas = generar_peticiones(peticiones, ids_libros, ids_usuarios, titulos, semilla)
+    latencias, errores = [], []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_conexion_carga(host, puerto, todas[i::conexiones], profundidad, latencias, errores)
+                           for i in range(conexiones)))
+    segundos = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        "peticiones": len(latencias),
+        "errores": len(errores),
+        "segundos": round(segundos, 3),
+        "peticiones_por_seg": round(len(latencias) / segundos, 1) if segundos else 0.0,
+        "p50_ms": round(percentil(latencias, 50) / 1e6, 3),
+        "p99_ms": round(percentil(latencias, 99) / 1e6, 3),
+        "p999_ms": round(percentil(latencias, 99.9) / 1e6, 3),
+    }
+
+
+# ---------------------------
+# LÍNEA DE COMANDOS
+# ---------------------------
+
+def crear_biblioteca(modulo, directorio=None):
+    fabrica = importlib.import_module(modulo).Biblioteca
+    if directorio:
+        from persistencia import BibliotecaPersistente
+        return BibliotecaPersistente(directorio, fabrica=fabrica)
+    return fabrica()
+
+
+async def _servir(args):
+    biblioteca = crear_biblioteca(args.modulo, args.directorio)
+    if args.precargar:
+        catalogo, _ = generar_catalogo(args.precargar, semilla=args.semilla)
+        biblioteca.registrar_libros_lote(catalogo)
+        biblioteca.registrar_usuarios_lote(generar_usuarios(max(1, args.precargar // 5), semilla=args.semilla))
+    servidor = await ServidorBiblioteca(biblioteca, args.host, args.puerto,
+                                        args.max_conexiones, args.profundidad).iniciar()
+    bucle = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            bucle.add_signal_handler(senal, servidor.detener)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: se detiene con KeyboardInterrupt
+    print(f"Escuchando en {args.host}:{servidor.puerto} ({args.modulo})", file=sys.stderr)
+    await servidor.servir()
+    print(f"Servidor detenido: {servidor.estadisticas}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio JSON/TCP de la biblioteca y cliente de carga.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("servir", help="inicia el servidor")
+    p.add_argument("--modulo", default="biblioteca3", help="módulo con la clase Biblioteca")
+    p.add_argument("--directorio", help="persistir con WAL + snapshots en este directorio")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--puerto", type=int, default=8765)
+    p.add_argument("--max-conexiones", type=int, default=MAX_CONEXIONES_POR_DEFECTO)
+    p.add_argument("--profundidad", type=int, default=PROFUNDIDAD_POR_DEFECTO,
+                   help="respuestas pendientes por conexión antes de dejar de leer")
+    p.add_argument("--precargar", type=int, default=0, help="libros sintéticos a cargar al iniciar")
+    p.add_argument("--semilla", type=int, default=42)
+
+    p = sub.add_parser("carga", help="cliente de carga: reporta peticiones/s y latencias")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--puerto", type=int, default=8765)
+    p.add_argument("--conexiones", type=int, default=8)
+    p.add_argument("--peticiones", type=int, default=20000)
+    p.add_argument("--profundidad", type=int, default=32, help="peticiones en vuelo por conexión")
+    p.add_argument("--libros", type=int, default=10000, help="rango de ids de libro (igual que --precargar)")
+    p.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.comando == "servir":
+        try:
+            asyncio.run(_servir(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    catalogo, titulos = generar_catalogo(args.libros, semilla=args.semilla)
+    usuarios = generar_usuarios(max(1, args.libros // 5), semilla=args.semilla)
+    metricas = asyncio.run(carga(args.host, args.puerto, args.conexiones, args.peticiones, args.profundidad,
+                                 [c[0] for c in catalogo], [u[0] for u in usuarios], titulos, args.semilla))
+    print(json.dumps(metricas, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
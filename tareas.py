@@ -0,0 +1,203 @@
+"""
+tareas.py
+Ejecución en segundo plano para las interfaces Tkinter: las operaciones de la
+biblioteca corren en un pool de hilos y la ventana nunca se congela.
+
+ - EjecutorTareas: recibe funciones y las ejecuta en un ThreadPoolExecutor.
+   Tk no es seguro para hilos: los trabajadores solo dejan mensajes en una
+   cola y el hilo de Tk la revisa con root.after, así todos los callbacks
+   (al_terminar, al_fallar, al_progresar) corren en el hilo de la interfaz.
+ - Tarea: se puede cancelar. Si aún no empezó, no se ejecuta; si ya corre,
+   su resultado se descarta y las funciones largas que reciben la tarea
+   (con_tarea=True) cortan antes al llamar tarea.progreso() / tarea.verificar().
+ - Antirrebote: para búsquedas mientras se escribe. Espera una pausa en el
+   tecleo, cancela la consulta anterior y solo muestra la más reciente.
+
+Uso:
+    ejecutor = EjecutorTareas(root)
+    ejecutor.enviar(biblioteca.buscar_libros, "borges", al_terminar=mostrar)
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TareaCancelada(Exception):
+    """La lanza Tarea.verificar() dentro del trabajador cuando se pidió cancelar."""
+
+
+class Tarea:
+    def __init__(self, ejecutor, descripcion, al_terminar, al_fallar, al_progresar):
+        self.ejecutor = ejecutor
+        self.descripcion = descripcion
+        self.al_terminar = al_terminar
+        self.al_fallar = al_fallar
+        self.al_progresar = al_progresar
+        self.futuro = None
+        self._cancelada = threading.Event()
+
+    @property
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def cancelar(self):
+        self._cancelada.set()
+        if self.futuro is not None and self.futuro.cancel():
+            # no llegó a empezar: nadie más va a avisar que terminó
+            self.ejecutor._cola.put((self, "cancelada", None))
+
+    def verificar(self):
+        """Desde el trabajador: lanza TareaCancelada si se pidió cancelar."""
+        if self.cancelada:
+            raise TareaCancelada()
+
+    def progreso(self, hechos, total=None):
+        """Desde el trabajador: informa el avance (y corta si se canceló)."""
+        self.verificar()
+        self.ejecutor._cola.put((self, "progreso", (hechos, total)))
+
+    def __repr__(self):
+        return f"<Tarea {self.descripcion!r}{' cancelada' if self.cancelada else ''}>"
+
+
+# ---------------------------
+# EJECUTOR
+# ---------------------------
+
+class EjecutorTareas:
+    """
+    al_cambiar(tareas) se llama en el hilo de Tk cada vez que cambia el
+    conjunto de tareas en curso (p. ej. para una barra de estado);
+    al_fallar(error) es el manejador de errores por defecto.
+    """
+    def __init__(self, root, hilos=4, intervalo_ms=50, al_cambiar=None, al_fallar=None):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.al_cambiar = al_cambiar
+        self.al_fallar = al_fallar
+        self.activas = []
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="biblioteca-gui")
+        self._cola = queue.SimpleQueue()
+        self._revision = None
+
+    def enviar(self, funcion, *args, al_terminar=None, al_fallar=None, al_progresar=None,
+               con_tarea=False, descripcion=""):
+        """
+        Ejecuta funcion(*args) en segundo plano (funcion(tarea, *args) si
+        con_tarea) y entrega el resultado a al_terminar en el hilo de Tk.
+        Retorna la Tarea.
+        """
+        tarea = Tarea(self, descripcion or getattr(funcion, "__name__", "tarea"),
+                      al_terminar, al_fallar, al_progresar)
+
+        def trabajo():
+            if tarea.cancelada:
+                self._cola.put((tarea, "cancelada", None))
+                return
+            try:
+                resultado = funcion(tarea, *args) if con_tarea else funcion(*args)
+            except TareaCancelada:
+                self._cola.put((tarea, "cancelada", None))
+            except Exception as e:  # el error se muestra en la interfaz, no se pierde en el hilo
+                self._cola.put((tarea, "error", e))
+            else:
+                self._cola.put((tarea, "resultado", resultado))
+
+        tarea.futuro = self._pool.submit(trabajo)
+        self.activas.append(tarea)
+        self._notificar()
+        self._programar()
+        return tarea
+
+    def cancelar_todas(self):
+        for tarea in list(self.activas):
+            tarea.cancelar()
+
+    def cerrar(self):
+        """Cancela lo pendiente y deja de revisar la cola (al cerrar la ventana)."""
+        self.cancelar_todas()
+        if self._revision is not None:
+            self.root.after_cancel(self._revision)
+            self._revision = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- hilo de Tk ----------
+    def _programar(self):
+        if self._revision is None:
+            self._revision = self.root.after(self.intervalo_ms, self._revisar)
+
+    def _revisar(self):
+        self._revision = None
+        terminadas = False
+        try:
+            while True:
+                try:
+                    tarea, tipo, valor = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if tipo == "progreso":
+                    if tarea.al_progresar is not None and not tarea.cancelada:
+                        tarea.al_progresar(*valor)
+                    continue
+                if tarea in self.activas:
+                    self.activas.remove(tarea)
+                    terminadas = True
+                if tarea.cancelada:
+                    continue        # resultado de una tarea cancelada: se descarta
+                if tipo == "resultado":
+                    if tarea.al_terminar is not None:
+                        tarea.al_terminar(valor)
+                elif tipo == "error":
+                    manejador = tarea.al_fallar or self.al_fallar
+                    if manejador is not None:
+                        manejador(valor)
+        finally:
+            if terminadas:
+                self._notificar()
+            if self.activas:
+                self._programar()
+
+    def _notificar(self):
+        if self.al_cambiar is not None:
+            self.al_cambiar(list(self.activas))
+
+
+# ---------------------------
+# ANTIRREBOTE
+# ---------------------------
+
+class Antirrebote:
+    """
+    pedir(*args) en cada tecla: funcion(*args) solo se ejecuta cuando pasan
+    retardo_ms sin otra llamada, y lanzar una consulta cancela la anterior,
+    así al_terminar solo recibe el resultado de la última.
+    """
+    def __init__(self, ejecutor, funcion, al_terminar, retardo_ms=250, descripcion="búsqueda"):
+        self.ejecutor = ejecutor
+        self.funcion = funcion
+        self.al_terminar = al_terminar
+        self.retardo_ms = retardo_ms
+        self.descripcion = descripcion
+        self._espera = None
+        self._tarea = None
+
+    def pedir(self, *args):
+        root = self.ejecutor.root
+        if self._espera is not None:
+            root.after_cancel(self._espera)
+        self._espera = root.after(self.retardo_ms, self._lanzar, args)
+
+    def _lanzar(self, args):
+        self._espera = None
+        if self._tarea is not None:
+            self._tarea.cancelar()
+        self._tarea = self.ejecutor.enviar(self.funcion, *args, al_terminar=self.al_terminar,
+                                           descripcion=self.descripcion)
+
+    def cancelar(self):
+        if self._espera is not None:
+            self.ejecutor.root.after_cancel(self._espera)
+            self._espera = None
+        if self._tarea is not None:
+            self._tarea.cancelar()
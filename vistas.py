@@ -0,0 +1,168 @@
+"""
+vistas.py
+Ventana de resultados paginada para las interfaces Tkinter (biblioteca2 y
+biblioteca3).
+
+ - VentanaResultados: ttk.Treeview que muestra una página a la vez; solo las
+   filas de esa página existen como ítems del Treeview, así listar un
+   catálogo grande no arma un texto gigante ni congela la ventana.
+ - Las filas se piden a una función pagina(orden, despues_de, n) que retorna
+   hasta n pares (cursor, valores) estrictamente después del cursor dado
+   (paginación por clave: siguen siendo correctas aunque se registren libros
+   entre una página y otra). Biblioteca.pagina_libros / pagina_usuarios
+   cumplen ese contrato recorriendo los árboles en orden.
+ - Ordenar por columna cambia el índice que se recorre ('id', 'titulo',
+   'autor'); no se reordena nada en Python.
+ - paginar_iterador adapta cualquier iterable perezoso (p. ej. resultados de
+   una búsqueda) al mismo contrato, consumiéndolo solo a medida que se avanza.
+ - Con un ejecutor (tareas.EjecutorTareas) cada página se pide en segundo
+   plano; mientras llega, los botones quedan deshabilitados.
+
+"""
+
+import threading
+
+# tkinter se importa solo al abrir una ventana (igual que en las interfaces).
+tk = ttk = None
+
+def _cargar_tkinter():
+    global tk, ttk
+    if tk is None:
+        import tkinter
+        from tkinter import ttk as _ttk
+        tk, ttk = tkinter, _ttk
+    return tk
+
+
+def paginar_iterador(iterable):
+    """
+    Función pagina(orden, despues_de, n) sobre un iterable que se consume de a
+    poco; el cursor es la posición de la fila. Las filas ya leídas se guardan
+    para poder volver a páginas anteriores. 'orden' se ignora. Se puede
+    llamar desde hilos trabajadores: el iterador se avanza de a uno a la vez.
+    """
+    iterador = iter(iterable)
+    leidas = []
+    lock = threading.Lock()
+
+    def pagina(orden, despues_de, n):
+        inicio = 0 if despues_de is None else despues_de + 1
+        with lock:
+            while len(leidas) < inicio + n:
+                try:
+                    leidas.append(next(iterador))
+                except StopIteration:
+                    break
+            return list(enumerate(leidas[inicio:inicio + n], inicio))
+
+    return pagina
+
+
+class VentanaResultados:
+    """
+    columnas: [(encabezado, ancho)]; ordenes: {encabezado: orden} para las
+    columnas que corresponden a un índice ordenado (clic = ordenar por él).
+    ejecutor: si se da, pagina() corre en sus hilos y no en el de Tk.
+    """
+    def __init__(self, root, titulo, columnas, pagina, ordenes=None, orden=None,
+                 por_pagina=100, total=None, ejecutor=None):
+        _cargar_tkinter()
+        self.pagina = pagina
+        self.ejecutor = ejecutor
+        self.tarea = None         # página que se está cargando en segundo plano
+        self.ordenes = ordenes or {}
+        self.orden = orden
+        self.por_pagina = por_pagina
+        self.total = total
+        self.inicios = [None]     # cursor con el que empieza cada página visitada
+        self.siguiente = None     # cursor de la última fila mostrada, si hay más páginas
+
+        self.ventana = tk.Toplevel(root)
+        self.ventana.title(titulo)
+        self.ventana.protocol("WM_DELETE_WINDOW", self.cerrar)
+        marco = tk.Frame(self.ventana)
+        marco.pack(fill="both", expand=True, padx=8, pady=8)
+        nombres = [nombre for nombre, _ in columnas]
+        self.tabla = ttk.Treeview(marco, columns=nombres, show="headings", height=20)
+        for nombre, ancho in columnas:
+            if nombre in self.ordenes:
+                self.tabla.heading(nombre, text=nombre, command=lambda n=nombre: self.ordenar(n))
+            else:
+                self.tabla.heading(nombre, text=nombre)
+            self.tabla.column(nombre, width=ancho, anchor="w")
+        barra = ttk.Scrollbar(marco, orient="vertical", command=self.tabla.yview)
+        self.tabla.configure(yscrollcommand=barra.set)
+        self.tabla.pack(side="left", fill="both", expand=True)
+        barra.pack(side="right", fill="y")
+
+        controles = tk.Frame(self.ventana)
+        controles.pack(fill="x", padx=8, pady=(0, 8))
+        self.boton_anterior = tk.Button(controles, text="« Anterior", command=self.pagina_anterior)
+        self.boton_anterior.pack(side="left")
+        self.boton_siguiente = tk.Button(controles, text="Siguiente »", command=self.pagina_siguiente)
+        self.boton_siguiente.pack(side="left", padx=5)
+        self.estado = tk.Label(controles, anchor="e")
+        self.estado.pack(side="right")
+
+        self.mostrar_pagina()
+
+    def mostrar_pagina(self):
+        # una fila de más dice si existe otra página sin tener que contar
+        pedido = (self.orden, self.inicios[-1], self.por_pagina + 1)
+        if self.ejecutor is None:
+            self.pintar(self.pagina(*pedido))
+            return
+        if self.tarea is not None:
+            self.tarea.cancelar()   # p. ej. se cambió el orden antes de que llegara
+        self.boton_anterior.config(state="disabled")
+        self.boton_siguiente.config(state="disabled")
+        self.estado.config(text="Cargando…")
+        self.tarea = self.ejecutor.enviar(self.pagina, *pedido, al_terminar=self.pintar,
+                                          al_fallar=self.fallo, descripcion="página de resultados")
+
+    def pintar(self, filas):
+        self.tarea = None
+        hay_mas = len(filas) > self.por_pagina
+        filas = filas[:self.por_pagina]
+        self.tabla.delete(*self.tabla.get_children())
+        for _, valores in filas:
+            self.tabla.insert("", "end", values=valores)
+        self.siguiente = filas[-1][0] if hay_mas else None
+        self.boton_anterior.config(state="normal" if len(self.inicios) > 1 else "disabled")
+        self.boton_siguiente.config(state="normal" if hay_mas else "disabled")
+        self.actualizar_estado(len(filas))
+
+    def fallo(self, error):
+        self.tarea = None
+        self.boton_anterior.config(state="normal" if len(self.inicios) > 1 else "disabled")
+        self.estado.config(text=f"Error al cargar la página: {error}")
+
+    def cerrar(self):
+        if self.tarea is not None:
+            self.tarea.cancelar()
+        self.ventana.destroy()
+
+    def actualizar_estado(self, filas):
+        numero = len(self.inicios)
+        desde = (numero - 1) * self.por_pagina
+        texto = f"Página {numero}: filas {desde + 1 if filas else 0}–{desde + filas}"
+        if self.total is not None:
+            texto += f" de {self.total}"
+        if self.orden is not None:
+            texto += f" (orden: {self.orden})"
+        self.estado.config(text=texto)
+
+    def pagina_siguiente(self):
+        if self.siguiente is not None:
+            self.inicios.append(self.siguiente)
+            self.mostrar_pagina()
+
+    def pagina_anterior(self):
+        if len(self.inicios) > 1:
+            self.inicios.pop()
+            self.mostrar_pagina()
+
+    def ordenar(self, columna):
+        self.orden = self.ordenes[columna]
+        self.inicios = [None]
+        self.mostrar_pagina()